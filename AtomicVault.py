@@ -1,628 +1,540 @@
 
+import time
+BOOT_STARTED = time.perf_counter()  # Start of the "import" startup phase
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 import json
-import time
-import re
 import os
-import random
-import string
 import asyncio
-from datetime import timedelta
-from dotenv import load_dotenv
-from flask import Flask
-from threading import Thread
-import motor.motor_asyncio
-
+import hashlib
+from contextlib import contextmanager
+from storage import StorageUnavailable, guild_config, open_storage
+from config import (
+    ALLOWED_GUILDS, COMMAND_TREE_CONFIG, EMBED_COLOR, FORCE_COMMAND_SYNC, GUILD_DEFAULTS,
+    MONGO_URL, PORT, SHARD_COUNT, SHARD_IDS, TOKEN,
+)
+from guilds import GuildSettingsCache, is_core
+from leveling import LevelRoleIndex, XPBuffer, XPThrottle, XP_FLUSH_INTERVAL
+from afk import AFKRegistry
+from pulse import PulseScheduler, PULSE_MIN_EDIT_INTERVAL
+from migrate import FILES_TO_MIGRATE
+from server import KeepAliveServer
+from outbox import Outbox
+from members import MemberResolver
+from profiles import ProfileCache
+from profiler import SamplingProfiler
+import metrics
 
-app = Flask('')
+# ─── CONFIGURATION ──────────────────────────────────────────
+# Deployment settings live in config.py; the subsystems are cogs (cogs/),
+# loaded at startup and reloadable at runtime with /reload
+EXTENSIONS = (
+    "cogs.xp",
+    "cogs.leaderboards",
+    "cogs.vouches",
+    "cogs.services",
+    "cogs.moderation",
+    "cogs.afk",
+    "cogs.pulse",
+)
+STORAGE_SWEEP_INTERVAL = 600    # Seconds between stale job / old bucket sweeps (no-op on Mongo, TTL indexes)
+VOUCH_COMPACT_INTERVAL = 30     # Seconds between vouch ledger → count folds (Mongo only)
+# --- STORAGE SETUP ---
+if not MONGO_URL and not os.getenv("STORAGE_BACKEND"):
+    print("⚠️ MONGO_URL is missing, using local SQLite storage instead.")
+# MongoDB, SQLite or in-memory, picked by STORAGE_BACKEND (see storage.py)
+store = open_storage(mongo_url=MONGO_URL)
+
+# ─── COMMAND TREE ──────────────────────────────────────────
+LOOP_LAG_INTERVAL = 1.0  # Seconds between event-loop lag probes
+
+class VaultTree(app_commands.CommandTree):
+    # Stamps each interaction so on_app_command_completion / on_error can
+    # record per-command latency. Every command works on per-guild data, so
+    # DMs are turned away here.
+    async def interaction_check(self, interaction):
+        interaction.extras["started"] = time.perf_counter()
+        if interaction.guild_id is None:
+            await interaction.response.send_message("❌ Vault commands only work inside a server.", ephemeral=True)
+            return False
+        return True
+
+    async def on_error(self, interaction, error):
+        observe_command(interaction, interaction.command, "error")
+        if isinstance(getattr(error, "original", error), StorageUnavailable):
+            message = "🛰️ The Vault database is unreachable right now. Try again in a minute."
+            if interaction.response.is_done():
+                return await interaction.followup.send(message, ephemeral=True)
+            return await interaction.response.send_message(message, ephemeral=True)
+        if isinstance(error, app_commands.CheckFailure):
+            message = "❌ Unauthorized"
+        else:
+            await super().on_error(interaction, error)
+            message = "❌ Something went wrong. Check the result before retrying."
+        # Never leave the user on "The application did not respond"
+        try:
+            if interaction.response.is_done():
+                await interaction.followup.send(message, ephemeral=True)
+            else:
+                await interaction.response.send_message(message, ephemeral=True)
+        except discord.HTTPException:
+            pass
+
+def observe_command(interaction, command, status):
+    started = interaction.extras.get("started")
+    if started is not None and command is not None:
+        metrics.COMMAND_LATENCY.labels(command.qualified_name, status).observe(time.perf_counter() - started)
+
+def guild_allowed(guild_id):
+    return ALLOWED_GUILDS is None or guild_id in ALLOWED_GUILDS
+
+# ─── STARTUP TIMING ───────────────────────────────────────
+class StartupTimer:
+    # Boot phase durations, exported as vault_startup_phase_seconds and on
+    # /healthz. lap() times consecutive phases, phase() ones that overlap.
+    def __init__(self, started):
+        self.started = started
+        self.mark = started
+        self.phases = {}
+        self.finished = False
+
+    def record(self, name, seconds):
+        self.phases[name] = seconds
+        metrics.STARTUP_PHASE.labels(name).set(seconds)
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.record(name, now - self.mark)
+        self.mark = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
 
-@app.route('/')
-def home():
-    return "Vault Status: OPERATIONAL"
+    def finish(self):
+        # First on_ready only; reconnects don't count as startups
+        if self.finished:
+            return
+        self.finished = True
+        self.lap("gateway_ready")
+        self.record("total", time.perf_counter() - self.started)
+        print("⏱️ Startup: " + " · ".join(f"{name} {secs:.2f}s" for name, secs in self.phases.items()))
 
-def run():
-    app.run(host='0.0.0.0', port=8080)
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
-# ─── CONFIGURATION ──────────────────────────────────────────
-load_dotenv()
-TOKEN = os.getenv("DISCORD_TOKEN")
-
-ALLOWED_GUILD_ID = 1380731003655557192
-VOUCH_CHANNEL_ID = 1470447530725609533
-SERVICE_LOG_CHANNEL_ID = 1470490292166721687
-EMBED_COLOR = 0x00f7ff
-# Add this with your other IDs
-LEVEL_LOG_CHANNEL_ID = 1471099337537749032  # Replace with your actual channel ID
-CORE_TEAM = {
-    1380723814115315803: "The Atomic Vault",
-    1203199020189753354: "Sir Haruto",
-    1351156564739751956: "Ifad_plays",
-    1414709841112600579: "marloww",
-    1155023196907647006: "Crazy Captain"
-}
-# --- MONGODB SETUP ---
-# Fetching the URL from Render's Environment Variables
-# --- MONGODB SETUP ---
-MONGO_URL = os.getenv("MONGO_URL")
-
-if not MONGO_URL:
-    print("❌ ERROR: MONGO_URL environment variable is missing!")
-    # This stops the bot from trying to connect to localhost
-    cluster = None 
-else:
-    # Adding tlsAllowInvalidCertificates helps avoid connection issues on some hosts
-    cluster = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URL, tlsAllowInvalidCertificates=True)
-    db = cluster["AtomicVault"]
-# Collections (Think of these as your new "JSON Files")
-xp_col = db["levels"]
-vouch_col = db["vouches"]
-service_stats_col = db["service_stats"]
-active_services_col = db["active_services"]
-config_col = db["bot_config"] # Stores Pulse & Global Settings
 # ─── BOT CLASS ─────────────────────────────────────────────
-# ─── BOT CLASS ─────────────────────────────────────────────
-class VaultBot(commands.Bot):
+class VaultBot(commands.AutoShardedBot):
+    # Owns everything that must outlive a /reload: storage, buffers, caches,
+    # pulse schedulers, the outbox. Cogs only hold logic and reach this
+    # state through the bot.
     def __init__(self):
         intents = discord.Intents.default()
         intents.message_content = True
         intents.members = True
-        super().__init__(command_prefix="!", intents=intents, help_command=None)
-        self.afk_users = {}
+        super().__init__(
+            command_prefix="!", intents=intents, help_command=None, tree_cls=VaultTree,
+            shard_count=SHARD_COUNT, shard_ids=SHARD_IDS
+        )
+        self.started_at = time.time()
+        self.startup = StartupTimer(BOOT_STARTED)
+        # Global jobs (command sync, service sweep) run in one process only
+        self.is_primary = SHARD_IDS is None or 0 in SHARD_IDS
+        self.store = store
+        self.settings = GuildSettingsCache(store, GUILD_DEFAULTS)
+        self.afk = AFKRegistry(store)
+        self.level_roles = LevelRoleIndex(self.settings)
+        self.profiles = ProfileCache(store)
+        self.xp_buffer = XPBuffer(store, self.profiles)
+        self.xp_throttle = XPThrottle()
+        self.pulses = {}  # guild id -> PulseScheduler
+        self.unloaded_guilds = set()  # Admitted during an outage; retried by xp_flush
+        self._lag_probe = None
+        self.web = KeepAliveServer(self, port=PORT)
+        self.outbox = Outbox()
+        self.members = MemberResolver(self)
+        self.profiler = SamplingProfiler()
+        metrics.OUTBOX_QUEUED.set_function(self.outbox.queued)
+        metrics.XP_THROTTLE_TRACKED.set_function(lambda: len(self.xp_throttle))
+        metrics.GATEWAY_LATENCY.set_function(lambda: self.latency if self.is_ready() else float("nan"))
 
     async def setup_hook(self):
-        await self.migrate_json_to_mongo()
-        self.vault_pulse.start()
-        await self.tree.sync()
+        self.startup.lap("login")
+        with self.startup.phase("web_server"):
+            await self.web.start()
+        # Commands must be on the tree before it is fingerprinted and synced
+        with self.startup.phase("extensions"):
+            await self.load_vault_extensions()
+        # Independent round trips: the index check (which also opens the
+        # Mongo connection) and the command sync run side by side
+        await asyncio.gather(
+            self.timed("storage", self.ensure_indexes()),
+            self.timed("command_sync", self.sync_commands())
+        )
+        with self.startup.phase("migration_check"):
+            self.check_pending_migration()
+        self.xp_flush.start()
+        if self.is_primary:
+            self.storage_sweep.start()
+            self.vouch_compactor.start()
+        self.afk.load()
+        self._lag_probe = asyncio.ensure_future(self.probe_loop_lag())
+        self.startup.lap("setup")
         print("🛰️ Vault Systems Synchronized with Cloud Database.")
 
-    async def migrate_json_to_mongo(self):
-        import json
-        files_to_migrate = {
-            "xp.json": {"col": xp_col, "field": "xp"},
-            "vouches.json": {"col": vouch_col, "field": "count"},
-            "service_stats.json": {"col": service_stats_col, "field": "completed"}
-        }
-        for filename, info in files_to_migrate.items():
-            if os.path.exists(filename):
-                try:
-                    with open(filename, "r") as f:
-                        data = json.load(f)
-                        for uid, val in data.items():
-                            await info["col"].update_one(
-                                {"_id": str(uid)},
-                                {"$set": {info["field"]: val}},
-                                upsert=True
-                            )
-                    print(f"✅ SUCCESS: {filename} migrated.")
-                    os.rename(filename, f"migrated_{filename}")
-                except Exception as e:
-                    print(f"❌ Error migrating {filename}: {e}")
-
-    # --- THE PULSE LOOP (Fixed Indentation & MongoDB) ---
-    @tasks.loop(seconds=60)
-    async def vault_pulse(self):
-        # Fetch config from MongoDB
-        config = await config_col.find_one({"_id": "pulse"}) or {}
-        if not config.get("channel_id"): 
-            return
-        
-        channel = self.get_channel(config["channel_id"])
-        guild = self.get_guild(ALLOWED_GUILD_ID)
-        if not channel or not guild: 
-            return
+    async def timed(self, name, coro):
+        with self.startup.phase(name):
+            return await coro
 
-        # Calculate Total Vouches from MongoDB
-        total_vouches = 0
-        async for doc in vouch_col.find():
-            total_vouches += doc.get("count", 0)
+    async def load_vault_extensions(self):
+        # A broken cog is reported and skipped; the rest of the bot still starts
+        for name in EXTENSIONS:
+            try:
+                await self.load_extension(name)
+            except commands.ExtensionError as e:
+                print(f"❌ Failed to load {name}: {e}")
+
+    async def reload_vault_extension(self, name):
+        # Re-imports the cog module; state on the bot is untouched
+        if name in self.extensions:
+            await self.reload_extension(name)
+        else:
+            await self.load_extension(name)
 
-        # Get Top Contributor from MongoDB
-        top_user_doc = await vouch_col.find().sort("count", -1).limit(1).to_list(length=1)
-        if top_user_doc:
-            top_user = top_user_doc[0]
-            top_contributor = f"<@{top_user['_id']}> ({top_user['count']}⭐)"
+    async def ensure_indexes(self):
+        try:
+            await store.ensure_indexes()
+            print("📇 Indexes verified.")
+        except Exception as e:
+            print(f"❌ Error creating indexes: {e}")
+
+    async def sync_commands(self):
+        # Syncing is a rate-limited API call, so the tree is only pushed when
+        # its fingerprint (command payloads + target guilds) differs from the
+        # one saved at the last successful sync
+        if not self.is_primary:
+            return
+        guild_ids = sorted(ALLOWED_GUILDS) if ALLOWED_GUILDS is not None else None
+        # Sorted: a reloaded cog re-adds its commands at the end of the tree
+        payload = sorted((command.to_dict(self.tree) for command in self.tree.get_commands()), key=lambda c: c["name"])
+        fingerprint = hashlib.sha256(
+            json.dumps({"guilds": guild_ids, "commands": payload}, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        try:
+            saved = await store.get_config(COMMAND_TREE_CONFIG) or {}
+        except StorageUnavailable:
+            saved = {}
+        if saved.get("fingerprint") == fingerprint and not FORCE_COMMAND_SYNC:
+            return print("🌳 Command tree unchanged, sync skipped.")
+
+        if guild_ids is None:
+            await self.tree.sync()
+        else:
+            # Guild commands update instantly and have per-guild rate limits
+            for guild_id in guild_ids:
+                guild = discord.Object(guild_id)
+                # Cleared first so a command dropped by a /reload is dropped here too
+                self.tree.clear_commands(guild=guild)
+                self.tree.copy_global_to(guild=guild)
+                try:
+                    await self.tree.sync(guild=guild)
+                except discord.HTTPException as e:
+                    # Not in that guild yet: leave the fingerprint so the next boot retries
+                    fingerprint = None
+                    print(f"❌ Command sync failed for guild {guild_id}: {e}")
+            if saved.get("guilds") is None:
+                # Drop commands an earlier boot registered globally, or
+                # every command would be listed twice
+                try:
+                    await self.http.bulk_upsert_global_commands(self.application_id, [])
+                except discord.HTTPException as e:
+                    fingerprint = None
+                    print(f"❌ Could not clear global commands: {e}")
+        if fingerprint:
+            try:
+                await store.set_config(COMMAND_TREE_CONFIG, {
+                    "fingerprint": fingerprint, "guilds": guild_ids, "synced_at": time.time()
+                })
+            except StorageUnavailable as e:
+                # The sync itself went through; the next boot just syncs again
+                print(f"⚠️ Command tree fingerprint not saved: {e}")
+        print(f"🌳 Slash commands synced ({'global' if guild_ids is None else f'{len(guild_ids)} guild(s)'}).")
+
+    def check_pending_migration(self):
+        # The JSON import runs separately (python migrate.py), not on boot
+        pending = [f for f in FILES_TO_MIGRATE if os.path.exists(f)]
+        if pending:
+            print(f"📦 Legacy data not migrated yet: {', '.join(pending)}. Run `python migrate.py`.")
+
+    # --- GUILDS ---
+    async def admit_guilds(self, guilds):
+        # Leaves guilds outside ALLOWED_GUILD_IDS, then loads settings, level
+        # roles and pulse dashboards for the rest. During a database outage
+        # they run on default settings until xp_flush loads them again.
+        allowed = []
+        for guild in guilds:
+            if guild_allowed(guild.id):
+                allowed.append(guild)
+            else:
+                await guild.leave()
+                print(f"❌ Left unauthorized server: {guild.name}")
+        guild_ids = [g.id for g in allowed]
+        try:
+            await self.settings.load(guild_ids)
+            await self.load_pulses(guild_ids)
+        except StorageUnavailable as e:
+            if not self.unloaded_guilds.issuperset(guild_ids):
+                print(f"⚠️ Settings for {len(guild_ids)} server(s) not loaded, using defaults: {e}")
+            self.unloaded_guilds.update(guild_ids)
         else:
-            top_contributor = "None yet"
-
-        embed = discord.Embed(title="💠 ATOMIC VAULT: LIVE PULSE", color=EMBED_COLOR)
-        embed.add_field(name="👑 Vault Architect", value="<@1155023196907647006>", inline=True)
-        embed.add_field(name="⚙️ Engine", value="`Python 3.12`", inline=True)
-        embed.add_field(name="🛰️ Status", value="`OPERATIONAL`", inline=True)
-        embed.add_field(name="🧠 Latency", value=f"`{round(self.latency * 1000)}ms`", inline=True)
-        embed.add_field(name="👥 Population", value=f"`{guild.member_count}`", inline=True)
-        embed.add_field(name="🌟 Total Vouches", value=f"`{total_vouches}`", inline=True)
-        embed.add_field(name="🏆 Top Contributor", value=top_contributor, inline=True)
-        
-        recent_event = config.get("recent_action", "Monitoring Active")
-        embed.add_field(name="📟 Recent Activity", value=f"```fix\n> {recent_event}```", inline=False)
-        embed.set_footer(text=f"Last Sync: {time.strftime('%H:%M:%S')} • W Code Aura Active")
-
-        msg_id = config.get("last_msg_id")
+            self.unloaded_guilds.difference_update(guild_ids)
+        # Level roles are matched against the (loaded or default) titles
+        for guild in allowed:
+            self.level_roles.build(guild)
+
+    async def load_pulses(self, guild_ids):
+        # One round trip; only guilds with a deployed dashboard get a scheduler
+        keys = {guild_config(g, "pulse"): g for g in guild_ids}
+        docs = await store.get_configs(list(keys)) if keys else {}
+        for key, guild_id in keys.items():
+            if docs.get(key, {}).get("channel_id"):
+                self.pulse_for(guild_id).mark_dirty()
+
+    def pulse_for(self, guild_id):
+        pulse = self.pulses.get(guild_id)
+        if pulse is None:
+            render = lambda: self.render_pulse(guild_id)
+            pulse = self.pulses[guild_id] = PulseScheduler(render, PULSE_MIN_EDIT_INTERVAL)
+        return pulse
+
+    async def render_pulse(self, guild_id):
+        # Looked up on every render, so a reloaded pulse cog takes over at once
+        cog = self.get_cog("Pulse")
+        if cog is not None:
+            await cog.render(guild_id)
+
+    def last_pulse(self):
+        # Most recent successful dashboard refresh in any guild
+        return max((p.last_success for p in self.pulses.values() if p.last_success), default=None)
+
+    async def close(self):
+        # Write any buffered XP before the process exits
+        self.xp_flush.cancel()
+        self.storage_sweep.cancel()
+        self.vouch_compactor.cancel()
+        for pulse in self.pulses.values():
+            pulse.cancel()
+        if self._lag_probe:
+            self._lag_probe.cancel()
+        await self.xp_buffer.close()
+        await self.outbox.drain()
+        # Unloads the cogs (stopping the pulse loop) and disconnects
+        await super().close()
+        await self.web.stop()
+        await store.close()
+
+    @tasks.loop(seconds=XP_FLUSH_INTERVAL)
+    async def xp_flush(self):
+        await self.xp_buffer.flush()
+        # Replays writes journaled during a database outage, in order
+        await store.sync_journal()
+        if self.unloaded_guilds:
+            guilds = [g for g in self.guilds if g.id in self.unloaded_guilds]
+            self.unloaded_guilds.intersection_update(g.id for g in guilds)
+            await self.admit_guilds(guilds)
+
+    @tasks.loop(seconds=STORAGE_SWEEP_INTERVAL)
+    async def storage_sweep(self):
+        # Abandoned PENDING jobs expire after PENDING_SERVICE_TTL_HOURS,
+        # leaderboard buckets after BUCKET_RETENTION_DAYS
         try:
-            msg = await channel.fetch_message(msg_id)
-            await msg.edit(embed=embed)
-        except:
-            new_msg = await channel.send(embed=embed)
-            await config_col.update_one(
-                {"_id": "pulse"}, 
-                {"$set": {"last_msg_id": new_msg.id}}, 
-                upsert=True
-            )
+            expired = await store.expire_services()
+            buckets = await store.expire_buckets()
+        except Exception as e:
+            return print(f"❌ Storage sweep failed: {e}")
+        if expired:
+            print(f"🧹 Expired {expired} abandoned service(s).")
+        if buckets:
+            print(f"🧹 Dropped {buckets} old leaderboard bucket(s).")
+
+    @tasks.loop(seconds=VOUCH_COMPACT_INTERVAL)
+    async def vouch_compactor(self):
+        # Folds new ledger events into the counts /stats and the pulse read
+        try:
+            folded = await store.compact_vouches()
+        except Exception as e:
+            return print(f"❌ Vouch compaction failed: {e}")
+        for guild_id in folded:
+            if int(guild_id) in self.pulses:
+                self.pulses[int(guild_id)].mark_dirty()
+
+    async def probe_loop_lag(self):
+        # A sleeping task that wakes late means something is blocking the loop
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            metrics.LOOP_LAG.observe(max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL))
 
 bot = VaultBot()
 tree = bot.tree
-# ─── UTILITIES ──────────────────────────────────────────
-def afk_time_ago(seconds):
-    mins = seconds // 60
-    if mins < 60: return f"{mins}m"
-    hrs = mins // 60
-    if hrs < 24: return f"{hrs}h"
-    return f"{hrs // 24}d"
-
-def parse_duration(duration: str):
-    match = re.fullmatch(r"(\d+)([smhd])", duration.lower())
-    if not match: return None
-    amount, unit = match.groups()
-    return {"s": timedelta(seconds=int(amount)), "m": timedelta(minutes=int(amount)), 
-            "h": timedelta(hours=int(amount)), "d": timedelta(days=int(amount))}.get(unit)
-
-def generate_otp():
-    return ''.join(random.choices(string.digits, k=6))
 
 # ─── EVENTS ─────────────────────────────────────────────
+# Messages go to the cog listeners; the default on_message runs prefix commands
 @bot.event
 async def on_ready():
-    print(f"✅ Logged in as {bot.user}")
-    for guild in bot.guilds:
-        if guild.id != ALLOWED_GUILD_ID:
-            await guild.leave()
-            print(f"❌ Left unauthorized server: {guild.name}")
-    
+    print(f"✅ Logged in as {bot.user} ({bot.shard_count} shard(s), running {bot.shard_ids or 'all'})")
+    bot.startup.finish()
+    await bot.admit_guilds(bot.guilds)
+
     activity = discord.Activity(type=discord.ActivityType.competing, name="the Atomic Vault 💠")
     await bot.change_presence(status=discord.Status.dnd, activity=activity)
 
 @bot.event
-async def on_message(message):
-    # Ignore bots and DMs
-    if message.author.bot or not message.guild:
-        return
-
-    # ─── 1. AFK LOGIC ──────────────────────────────────────
-    if message.author.id in bot.afk_users:
-        data = bot.afk_users.pop(message.author.id)
-        duration = afk_time_ago(int(time.time()) - data["time"])
-        await message.channel.send(
-            f"👋 Welcome back **{message.author.display_name}**\n⏱️ AFK for: {duration}",
-            delete_after=6
-        )
+async def on_guild_join(guild):
+    await bot.admit_guilds([guild])
 
-    for user in message.mentions:
-        if user.id in bot.afk_users:
-            data = bot.afk_users[user.id]
-            duration = afk_time_ago(int(time.time()) - data["time"])
-            await message.channel.send(
-                f"💤 **{user.display_name} is AFK**\n📌 Reason: {data['reason']}\n⏱️ {duration}",
-                delete_after=8
-            )
-
-    # ─── 2. XP + LEVELING SYSTEM (MongoDB Version) ─────────
-    user_id = str(message.author.id)
-
-    # Fetch from MongoDB
-    user_data = await xp_col.find_one({"_id": user_id})
-    current_xp = user_data["xp"] if user_data else 0
-
-    # XP calculation
-    if message.author.id in CORE_TEAM:
-        added_xp = random.randint(50, 150)
-        boost_text = " (10× Staff Boost! 🔥)"
-    else:
-        added_xp = random.randint(5, 15)
-        boost_text = ""
-
-    new_xp = current_xp + added_xp
-    
-    # Save to MongoDB
-    await xp_col.update_one({"_id": user_id}, {"$set": {"xp": new_xp}}, upsert=True)
-
-    # Level calculation
-    old_level = current_xp // 100
-    new_level = new_xp // 100
-
-    # Level-up handling
-    if new_level > old_level:
-        level_titles = {
-            1:  "Newbie Adventurer",
-            5:  "Sea Explorer",
-            10: "Fruit Hunter",
-            15: "Raid Participant",
-            20: "Awakened Grinder",
-            25: "Bounty Chaser",
-            30: "Sea Beast Slayer",
-            40: "Mirage Hunter",
-            50: "Legendary Pirate",
-            60: "God of the Seas",
-        }
-
-        title = level_titles.get(new_level, "Adventurer")
-        role_name = f"Level {new_level} - {title}"
-
-        # ─── ROLE CHECK (No Creation) ───
-        # This will ONLY give the role if it already exists in your server
-        role = discord.utils.get(message.guild.roles, name=role_name)
-        
-        if role:
-            try:
-                await message.author.add_roles(role)
-            except discord.Forbidden:
-                print(f"❌ Cannot add role {role_name}: Check bot role hierarchy.")
-
-        # Level-up announcement
-        embed = discord.Embed(
-            title="🎉 LEVEL UP!",
-            description=f"{message.author.mention} has reached **Level {new_level}**!{boost_text}",
-            color=0x00ff88 if message.author.id not in CORE_TEAM else 0xffaa00
-        )
-        embed.add_field(name="New Rank", value=title, inline=False)
-        embed.set_thumbnail(url=message.author.display_avatar.url)
-        embed.set_footer(text="Keep chatting to level up! 🍍")
-
-        # ─── LOGGING ───
-        log_channel = bot.get_channel(LEVEL_LOG_CHANNEL_ID)
-        if log_channel:
-            await log_channel.send(content=f"Congrats {message.author.mention}!", embed=embed)
-        else:
-            # Fallback to current channel if log channel is missing
-            await message.channel.send(embed=embed, delete_after=10)
+@bot.event
+async def on_guild_role_create(role):
+    bot.level_roles.observe(role)
 
-    # ─── 3. PROCESS COMMANDS ──────────────────────────────
-    # This is CRITICAL for !ping and other prefix commands to work
-    await bot.process_commands(message)# ─── PREFIX COMMANDS ────────────────────────────────────
+@bot.event
+async def on_guild_role_update(before, after):
+    bot.level_roles.observe(after)
+
+@bot.event
+async def on_guild_role_delete(role):
+    bot.level_roles.forget(role)
+
+@bot.event
+async def on_app_command_completion(interaction, command):
+    observe_command(interaction, command, "ok")
+
+# ─── PREFIX COMMANDS ────────────────────────────────────
 @bot.command()
 async def ping(ctx):
     await ctx.send("⚡ Atomic Vault is online")
 
-@bot.command()
-async def afk(ctx, *, reason="AFK"):
-    bot.afk_users[ctx.author.id] = {"reason": reason, "time": int(time.time())}
-    await ctx.send(f"💤 **AFK set:** {reason}", delete_after=6)
-
 # ─── SLASH COMMANDS ─────────────────────────────────────
-@tree.command(name="level", description="Check your level and XP progress")
-async def level(interaction: discord.Interaction, member: discord.Member = None):
-    target = member or interaction.user
-    user_id = str(target.id)
-    
-    # FIX: Fetch from MongoDB instead of bot.xp_data
-    user_data = await xp_col.find_one({"_id": user_id})
-    xp = user_data["xp"] if user_data else 0
-    
-    level = xp // 100
-    next_level_xp = (level + 1) * 100
-    progress = xp % 100
-    bar = "🟦" * (progress // 10) + "⬛" * (10 - (progress // 10))
-    
-    embed = discord.Embed(title=f"{target.display_name}'s Level", color=0x00f7ff)
-    embed.set_thumbnail(url=target.display_avatar.url)
-    embed.add_field(name="Level", value=f"**{level}**", inline=True)
-    embed.add_field(name="Total XP", value=f"{xp}", inline=True)
-    embed.add_field(name="Progress", value=f"{bar} ({progress}/100)", inline=False)
-    
-    await interaction.response.send_message(embed=embed, ephemeral=True)
-@tree.command(name="levelsboard", description="Top members by level")
-async def levelsboard(interaction: discord.Interaction):
-    # FIX: Get top 10 users directly from MongoDB sorted by XP
-    cursor = xp_col.find().sort("xp", -1).limit(10)
-    top_users = await cursor.to_list(length=10)
-
-    if not top_users:
-        return await interaction.response.send_message("No levels yet 😔", ephemeral=True)
-    
-    embed = discord.Embed(title="🏆 Level Leaderboard", color=0x00f7ff)
-    for i, data in enumerate(top_users, 1):
-        user_id = data["_id"]
-        xp = data["xp"]
-        lvl = xp // 100
-        embed.add_field(name=f"#{i} Member ID: {user_id}", value=f"Lvl {lvl} | XP: {xp}", inline=False)
-    
-    await interaction.response.send_message(embed=embed)@tree.command(name="ping", description="Check bot latency")
+@tree.command(name="ping", description="Check bot latency")
 async def slash_ping(interaction: discord.Interaction):
     await interaction.response.send_message(f"🏓 Pong `{round(bot.latency * 1000)}ms`", ephemeral=True)
-@tree.command(name="vouch", description="Give a member a Vault Vouch")
-async def vouch(interaction: discord.Interaction, target: discord.Member, reason: str):
-    if target.id == interaction.user.id:
-        return await interaction.response.send_message("❌ You cannot vouch for yourself.", ephemeral=True)
-
-    # 1. Update/Increment vouch count in MongoDB
-    target_id = str(target.id)
-    result = await vouch_col.find_one_and_update(
-        {"_id": target_id},
-        {"$inc": {"count": 1}},
-        upsert=True,
-        return_document=True
-    )
-    total = result.get("count", 1)
-
-    # 2. Clearance Logic
-    if target.id in CORE_TEAM: 
-        clearance = f"⭐ {CORE_TEAM[target.id]}"
-    elif total >= 25: 
-        clearance = "💎 ELITE"
-    elif total >= 10: 
-        clearance = "✅ TRUSTED"
-    else: 
-        clearance = "👤 MEMBER"
-
-    # 3. Create Embed
-    public_embed = discord.Embed(title="💠 NEW VAULT VOUCH", color=0x00ff00)
-    public_embed.set_thumbnail(url=target.display_avatar.url)
-    public_embed.add_field(name="👤 Recipient", value=target.mention, inline=True)
-    public_embed.add_field(name="👤 From", value=interaction.user.mention, inline=True)
-    public_embed.add_field(name="🌟 Total Vouches", value=f"`{total}`", inline=True)
-    public_embed.add_field(name="📝 Reason", value=f"```fix\n{reason}```", inline=False)
-    public_embed.add_field(name="🛰️ Clearance", value=f"`{clearance}`", inline=True)
-    public_embed.set_footer(text="Atomic Vault Security System")
-    
-    # 4. Send to Vouch Channel
-    v_chan = bot.get_channel(VOUCH_CHANNEL_ID)
-    if v_chan: 
-        await v_chan.send(embed=public_embed)
-    
-    # 5. Update Recent Activity in MongoDB
-    await config_col.update_one(
-        {"_id": "pulse"},
-        {"$set": {"recent_action": f"⭐ {interaction.user.name} vouched {target.name}"}},
-        upsert=True
-    )
-    
-    # Refresh the pulse dashboard
-    bot.loop.create_task(bot.vault_pulse())
-
-    await interaction.response.send_message(f"✅ Vouch posted in <#{VOUCH_CHANNEL_ID}>", ephemeral=True)
-@tree.command(name="stats", description="Check profile stats")
-async def stats(interaction: discord.Interaction, member: discord.Member = None):
-    target = member or interaction.user
-    target_id = str(target.id)
-
-    # Fetch data from multiple collections
-    vouch_data = await vouch_col.find_one({"_id": target_id})
-    service_data = await service_stats_col.find_one({"_id": target_id})
-    
-    vouches = vouch_data.get("count", 0) if vouch_data else 0
-    services = service_data.get("completed", 0) if service_data else 0
-
-    color = 0x00ffff if target.id in CORE_TEAM else EMBED_COLOR
-    embed = discord.Embed(title="📊 Vault Profile", color=color)
-    embed.set_author(name=target.display_name, icon_url=target.display_avatar.url)
-    
-    # Clearance Logic
-    if target.id in CORE_TEAM: clearance = f"⭐ {CORE_TEAM[target.id]}"
-    elif vouches >= 25: clearance = "💎 ELITE"
-    elif vouches >= 10: clearance = "✅ TRUSTED"
-    else: clearance = "👤 MEMBER"
-
-    embed.add_field(name="🛰️ Clearance", value=f"`{clearance}`", inline=True)
-    embed.add_field(name="🌟 Total Vouches", value=f"`{vouches}`", inline=True)
-    
-    if target.id in CORE_TEAM:
-        embed.add_field(name="🛠️ Jobs Completed", value=f"`{services}`", inline=True)
-    
-    # Visual Progress Bar
-    bar_length = 10
-    progress = min(int(vouches / 25 * bar_length), bar_length)
-    bar = "🟦" * progress + "⬛" * (bar_length - progress)
-    embed.add_field(name="📈 Trust Progress (to Elite)", value=f"{bar}", inline=False)
-    
-    await interaction.response.send_message(embed=embed)
-# ─── SERVICE SYSTEM ──────────────────────────────────────
-@tree.command(name="create-service", description="Staff: Create a service")
-async def create_service(interaction: discord.Interaction, customer: discord.Member, service_name: str):
-    if interaction.user.id not in CORE_TEAM: 
-        return await interaction.response.send_message("❌ Unauthorized", ephemeral=True)
-
-    s_otp, e_otp, c_otp = generate_otp(), generate_otp(), generate_otp()
-    
-    # Save to MongoDB
-    await active_services_col.update_one(
-        {"_id": str(customer.id)},
-        {"$set": {
-            "name": service_name,
-            "staff": interaction.user.name,
-            "staff_id": interaction.user.id,
-            "s_otp": s_otp,
-            "e_otp": e_otp,
-            "c_otp": c_otp,
-            "status": "PENDING"
-        }},
-        upsert=True
-    )
-    log_chan = bot.get_channel(SERVICE_LOG_CHANNEL_ID)
-    if log_chan: await log_chan.send(embed=discord.Embed(title="📝 SERVICE CREATED", description=f"**{service_name}** for {customer.mention}", color=0xffa500))
 
-    try:
-        dm = discord.Embed(title="💠 VAULT SERVICE CODES", color=EMBED_COLOR)
-        dm.add_field(name="🔑 START OTP", value=f"`{s_otp}`", inline=True)
-        dm.add_field(name="🔒 END OTP", value=f"`{e_otp}`", inline=True)
-        dm.add_field(name="🚫 CANCEL OTP", value=f"`{c_otp}`", inline=True)
-        await customer.send(embed=dm)
-        await interaction.response.send_message(f"✅ Service created for {customer.name}.", ephemeral=True)
-    except: await interaction.response.send_message("⚠️ Failed to DM customer.", ephemeral=True)
-
-@tree.command(name="start-service", description="Staff: Verify Start OTP")
-async def start_service(interaction: discord.Interaction, customer: discord.Member, otp: str):
-    active = bot.load_json(ACTIVE_SERVICES_FILE)
-    job = active.get(str(customer.id))
-    if not job or otp != job["s_otp"]: return await interaction.response.send_message("❌ Invalid OTP", ephemeral=True)
-    job["status"] = "IN_PROGRESS"
-    bot.save_json(ACTIVE_SERVICES_FILE, active)
-    await interaction.response.send_message(f"⚙️ Service started for {customer.mention}")
-
-@tree.command(name="complete-service", description="Staff: Verify End OTP and generate receipt")
-async def complete_service(interaction: discord.Interaction, customer: discord.Member, otp: str):
-    if interaction.user.id not in CORE_TEAM:
+@tree.command(name="reload", description="Owner: Reload bot modules without restarting")
+@app_commands.describe(module="Only this module (default: all)")
+@app_commands.choices(module=[app_commands.Choice(name=name.split(".")[-1], value=name) for name in EXTENSIONS])
+async def reload(interaction: discord.Interaction, module: str = None):
+    if not await bot.is_owner(interaction.user):
         return await interaction.response.send_message("❌ Unauthorized", ephemeral=True)
+    await interaction.response.defer(ephemeral=True, thinking=True)
 
-    # Fetch the active job from MongoDB
-    job = await active_services_col.find_one({"_id": str(customer.id)})
-    
-    if not job or otp != job["e_otp"]: 
-        return await interaction.response.send_message("❌ Invalid OTP. Verification failed.", ephemeral=True)
-
-    # Increment Staff Stats in MongoDB
-    staff_id = str(interaction.user.id)
-    stats_result = await service_stats_col.find_one_and_update(
-        {"_id": staff_id},
-        {"$inc": {"completed": 1}},
-        upsert=True,
-        return_document=True
-    )
-    total_jobs = stats_result.get("completed", 1)
-
-    # --- GENERATE RECEIPT ---
-    receipt = discord.Embed(title="📄 SERVICE COMPLETION RECEIPT", color=0x2bff88)
-    receipt.set_author(name="Atomic Vault Ledger", icon_url=interaction.user.display_avatar.url)
-    
-    receipt.add_field(name="🛠️ Service Type", value=f"`{job['name']}`", inline=False)
-    receipt.add_field(name="👤 Customer", value=customer.mention, inline=True)
-    receipt.add_field(name="👑 Staff", value=interaction.user.mention, inline=True)
-    receipt.add_field(name="🌟 Staff Total Jobs", value=f"`{total_jobs}`", inline=True)
-    receipt.set_footer(text=f"ID: {generate_otp()} • {time.strftime('%Y-%m-%d %H:%M:%S')}")
-
-    # Log to Channel
-    log_chan = bot.get_channel(SERVICE_LOG_CHANNEL_ID)
-    if log_chan:
-        await log_chan.send(embed=receipt)
-
-    # Remove from Active Services in MongoDB
-    await active_services_col.delete_one({"_id": str(customer.id)})
-
-    await interaction.response.send_message(content="🏁 **Service Finalized.** Receipt generated.", embed=receipt)
-@tree.command(name="cancel-service", description="Staff: Verify Cancel OTP")
-async def cancel_service(interaction: discord.Interaction, customer: discord.Member, otp: str, reason: str):
-    if interaction.user.id not in CORE_TEAM:
+    lines = []
+    for name in [module] if module else EXTENSIONS:
+        try:
+            await bot.reload_vault_extension(name)
+            lines.append(f"✅ `{name}`")
+        except commands.ExtensionError as e:
+            # A failed reload keeps the previous version of the cog running
+            lines.append(f"❌ `{name}`: {e}")
+    # Only pushed to Discord if a command's name, options or description changed
+    await bot.sync_commands()
+    await interaction.followup.send("🔄 **Reload complete**\n" + "\n".join(lines), ephemeral=True)
+
+@tree.command(name="db-report", description="Owner: Hot and slow database queries")
+async def db_report(interaction: discord.Interaction):
+    if not await bot.is_owner(interaction.user):
         return await interaction.response.send_message("❌ Unauthorized", ephemeral=True)
-
-    # 1. Look for the active job in MongoDB
-    job = await active_services_col.find_one({"_id": str(customer.id)})
-    
-    # 2. Check if job exists and OTP matches
-    if not job:
-        return await interaction.response.send_message("🛰️ No active service found for this user.", ephemeral=True)
-    
-    if otp != job["c_otp"]:
-        return await interaction.response.send_message("❌ Invalid Cancel OTP. Verification failed.", ephemeral=True)
-
-    # 3. Remove the job from the database
-    await active_services_col.delete_one({"_id": str(customer.id)})
-
-    # 4. Create a Cancel Log Embed
-    cancel_embed = discord.Embed(title="🚫 SERVICE VOIDED", color=0xff4444)
-    cancel_embed.add_field(name="🛠️ Service", value=f"`{job['name']}`", inline=True)
-    cancel_embed.add_field(name="👤 Customer", value=customer.mention, inline=True)
-    cancel_embed.add_field(name="👑 Cancelled By", value=interaction.user.mention, inline=True)
-    cancel_embed.add_field(name="📝 Reason", value=f"```fix\n{reason}```", inline=False)
-    cancel_embed.set_footer(text=f"Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-
-    # Send log to channel
-    log_chan = bot.get_channel(SERVICE_LOG_CHANNEL_ID)
-    if log_chan:
-        await log_chan.send(embed=cancel_embed)
-
-    await interaction.response.send_message(f"✅ Service for {customer.mention} has been successfully voided.")@tree.command(name="view-active", description="Staff: View all active services")
-async def view_active(interaction: discord.Interaction):
-    if interaction.user.id not in CORE_TEAM: 
-        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
-    
-    # Fetch all documents from the active collection
-    cursor = active_services_col.find({})
-    active_jobs = await cursor.to_list(length=100)
-    
-    if not active_jobs: 
-        return await interaction.response.send_message("🛰️ No active services.", ephemeral=True)
-    
-    embed = discord.Embed(title="🛰️ CURRENT ACTIVE SERVICES", color=EMBED_COLOR)
-    for job in active_jobs:
-        customer_id = job["_id"]
-        embed.add_field(
-            name=f"🛠️ {job['name']}", 
-            value=f"**Customer:** <@{customer_id}>\n**Staff:** {job['staff']}\n**Status:** `{job['status']}`", 
-            inline=False
+    if store.monitor is None:
+        return await interaction.response.send_message(
+            "❌ Command monitoring is off. Set `MONGO_COMMAND_MONITORING=1` (MongoDB only) and restart.", ephemeral=True
         )
+    report = store.monitor.report()
+
+    hot = [
+        f"`{coll}.{op}` {s.count}× · avg {s.total_ms / s.count:.1f}ms · max {s.max_ms:.0f}ms"
+        + (f" · 🐢 {s.slow}" if s.slow else "") + (f" · ❌ {s.failed}" if s.failed else "")
+        for (coll, op), s in report["hot"]
+    ]
+    slow = []
+    for entry in report["slow"]:
+        line = f"`{entry['collection']}.{entry['op']}` {entry['ms']:.0f}ms at {entry['at'][11:]}"
+        if entry["plan"]:
+            line += f"\n  {'⚠️ ' if 'COLLSCAN' in entry['plan'] else ''}`{entry['plan']}`"
+        slow.append(line)
+
+    embed = discord.Embed(title="🗄️ DATABASE REPORT", color=EMBED_COLOR)
+    embed.description = f"Last {report['window'] * 2 // 60} minutes · slow = over {report['slow_ms']:.0f}ms"
+    embed.add_field(name="🔥 Hottest (total time)", value="\n".join(hot)[:1024] or "No queries yet", inline=False)
+    embed.add_field(name="🐢 Recent slow queries", value="\n".join(slow)[:1024] or "None", inline=False)
+    embed.set_footer(text=f"Full log: {store.monitor.log_path}")
     await interaction.response.send_message(embed=embed, ephemeral=True)
-# ─── MODERATION ──────────────────────────────────────────
-@tree.command(name="ban", description="Ban a member")
-@app_commands.checks.has_permissions(ban_members=True)
-async def ban(interaction: discord.Interaction, member: discord.Member, reason: str = "No reason"):
-    if member.id == interaction.user.id: return await interaction.response.send_message("❌ Cannot ban self.", ephemeral=True)
-    await member.ban(reason=reason)
-    await interaction.response.send_message(f"🔨 Banned {member}")
-
-@tree.command(name="kick", description="Kick a member")
-@app_commands.checks.has_permissions(kick_members=True)
-async def kick(interaction: discord.Interaction, member: discord.Member, reason: str = "No reason"):
-    await member.kick(reason=reason)
-    await interaction.response.send_message(f"👢 Kicked {member}")
-
-@tree.command(name="unban", description="Unban a user by ID")
-@app_commands.checks.has_permissions(ban_members=True)
-async def unban(interaction: discord.Interaction, user_id: str, reason: str = "No reason"):
-    user = await bot.fetch_user(int(user_id))
-    await interaction.guild.unban(user, reason=reason)
-    await interaction.response.send_message(f"✅ Unbanned {user.name}")
-
-@tree.command(name="mute", description="Mute a member")
-@app_commands.checks.has_permissions(moderate_members=True)
-async def mute(interaction: discord.Interaction, member: discord.Member, duration: str, reason: str = "No reason"):
-    delta = parse_duration(duration)
-    if not delta: return await interaction.response.send_message("❌ Use 10s / 5m / 2h / 1d", ephemeral=True)
-    await member.timeout(delta, reason=reason)
-    await interaction.response.send_message(f"🔇 Muted {member} for {duration}")
-
-@tree.command(name="unmute", description="Unmute a member")
-@app_commands.checks.has_permissions(moderate_members=True)
-async def unmute(interaction: discord.Interaction, member: discord.Member):
-    await member.timeout(None)
-    await interaction.response.send_message(f"🔊 Unmuted {member}")
-
-@tree.command(name="set-pulse", description="Deploy the Atomic Pulse dashboard")
+
+@tree.command(name="profile", description="Owner: Sample where the bot spends its time")
+@app_commands.describe(seconds="How long to sample (default 10)")
+async def profile(interaction: discord.Interaction, seconds: app_commands.Range[int, 1, 120] = 10):
+    if not await bot.is_owner(interaction.user):
+        return await interaction.response.send_message("❌ Unauthorized", ephemeral=True)
+    if bot.profiler.running:
+        return await interaction.response.send_message("❌ A profile is already running.", ephemeral=True)
+    # Claimed with no await since the check: the next invocation is turned away
+    with bot.profiler.claim():
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        path, summary = await bot.profiler.run(seconds)
+    handlers = [f"`{name}` cpu {cpu:.2f}s · await {wait:.2f}s" for name, cpu, wait in summary["handlers"]]
+    hot = [f"`{frame}` {share:.0%}" for frame, share in summary["cpu"]]
+
+    embed = discord.Embed(title="🔬 PROFILE", color=EMBED_COLOR)
+    embed.description = f"{summary['seconds']:.1f}s · {summary['ticks']} samples · loop idle {summary['idle']:.0%}"
+    embed.add_field(name="🧵 Handlers", value="\n".join(handlers)[:1024] or "Nothing ran", inline=False)
+    embed.add_field(name="🔥 Hottest CPU frames", value="\n".join(hot)[:1024] or "None", inline=False)
+    embed.set_footer(text="Attached: collapsed stacks (flamegraph.pl / speedscope)")
+    await interaction.followup.send(embed=embed, file=discord.File(path), ephemeral=True)
+
+@tree.command(name="configure", description="Admin: Set this server's Vault channels")
 @app_commands.checks.has_permissions(administrator=True)
-async def set_pulse(interaction: discord.Interaction):
-    config = bot.load_json(PULSE_FILE)
-    config["channel_id"] = interaction.channel_id
-    config["last_msg_id"] = None
-    config["recent_action"] = f"Vault Pulse Initialized by {interaction.user.name}"
-    bot.save_json(PULSE_FILE, config)
-    bot.loop.create_task(bot.vault_pulse())
-    await interaction.response.send_message("💠 Vault Link Established.", ephemeral=True)
-@tree.command(name="my-service", description="Customer: View your active service details and OTPs")
-async def my_service(interaction: discord.Interaction):
-    active = bot.load_json(ACTIVE_SERVICES_FILE)
-    job = active.get(str(interaction.user.id))
-    
-    if not job:
-        return await interaction.response.send_message("🛰️ **No active services found** linked to your ID.", ephemeral=True)
-    
-    embed = discord.Embed(title="💠 YOUR ACTIVE SERVICE", color=EMBED_COLOR)
-    embed.add_field(name="🛠️ Operation", value=f"`{job['name']}`", inline=False)
-    embed.add_field(name="👤 Assigned Staff", value=f"`{job['staff']}`", inline=True)
-    embed.add_field(name="🛰️ Status", value=f"`{job['status']}`", inline=True)
-    
-    # Provide keys again in case they lost them
-    embed.add_field(name="🔑 START OTP", value=f"||{job['s_otp']}||", inline=True)
-    embed.add_field(name="🔒 END OTP", value=f"||{job['e_otp']}||", inline=True)
-    embed.add_field(name="🚫 CANCEL OTP", value=f"||{job['c_otp']}||", inline=True)
-    
-    embed.set_footer(text="Keep these codes confidential. Click to reveal.")
+@app_commands.describe(
+    vouch_channel="Where vouches are posted",
+    service_log_channel="Where service events are logged",
+    level_log_channel="Where level-ups are announced"
+)
+async def configure(interaction: discord.Interaction, vouch_channel: discord.TextChannel = None,
+                    service_log_channel: discord.TextChannel = None, level_log_channel: discord.TextChannel = None):
+    fields = {}
+    if vouch_channel: fields["vouch_channel_id"] = vouch_channel.id
+    if service_log_channel: fields["service_log_channel_id"] = service_log_channel.id
+    if level_log_channel: fields["level_log_channel_id"] = level_log_channel.id
+    settings = await bot.settings.update(interaction.guild_id, **fields)
+
+    def show(channel_id):
+        return f"<#{channel_id}>" if channel_id else "`not set`"
+
+    embed = discord.Embed(title="⚙️ VAULT CONFIGURATION", color=EMBED_COLOR)
+    embed.add_field(name="🌟 Vouches", value=show(settings.vouch_channel_id), inline=True)
+    embed.add_field(name="🛠️ Service Log", value=show(settings.service_log_channel_id), inline=True)
+    embed.add_field(name="🎉 Level Log", value=show(settings.level_log_channel_id), inline=True)
     await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@tree.command(name="core-team", description="Admin: Add or remove a core team member")
+@app_commands.checks.has_permissions(administrator=True)
+@app_commands.choices(action=[
+    app_commands.Choice(name="Add", value="add"),
+    app_commands.Choice(name="Remove", value="remove")
+])
+async def core_team(interaction: discord.Interaction, action: str, member: discord.Member, title: str = None):
+    team = dict(bot.settings.get(interaction.guild_id).core_team)
+    if action == "add":
+        team[member.id] = title or member.display_name
+    elif team.pop(member.id, None) is None:
+        return await interaction.response.send_message(f"❌ {member.mention} is not on the core team.", ephemeral=True)
+    await bot.settings.update(interaction.guild_id, core_team=team)
+    verb = "added to" if action == "add" else "removed from"
+    await interaction.response.send_message(f"✅ {member.mention} {verb} the core team.", ephemeral=True)
 @tree.command(name="help", description="Access the Atomic Vault command directory")
 async def help_command(interaction: discord.Interaction):
-    # Check if user is in your CORE_TEAM
-    is_staff = interaction.user.id in CORE_TEAM
+    # Check if user is in this server's core team
+    is_staff = is_core(interaction)
     # Check if user has admin/mod permissions for the Mod section
     is_admin = interaction.user.guild_permissions.administrator
     is_mod = interaction.user.guild_permissions.moderate_members
@@ -637,9 +549,10 @@ async def help_command(interaction: discord.Interaction):
     embed.add_field(
         name="🔑 MEMBER OPERATIONS",
         value=(
-            "> `/my-service` — View your active OTPs & status.\n"
+            "> `/my-service` — View your active service & status.\n"
             "> `/stats` — Check your profile, vouches, and trust bar.\n"
-            "> `/vouch` — Record a successful transaction for a member."
+            "> `/vouch` — Record a successful transaction for a member.\n"
+            "> `/xp-board` / `/vouch-board` / `/service-board` — Daily, weekly & monthly leaders."
         ),
         inline=False
     )
@@ -653,38 +566,40 @@ async def help_command(interaction: discord.Interaction):
                 "> `/start-service` — Verify Start OTP to begin.\n"
                 "> `/complete-service` — Verify End OTP & log receipt.\n"
                 "> `/cancel-service` — Void an active job with Cancel OTP.\n"
-                "> `/view-active` — Monitor all global active tasks."
+                "> `/view-active` — Browse active tasks (filter by staff/status)."
             ),
             inline=False
         )
 
     # --- MODERATION SECTION ---
-        if is_admin or is_mod:
-            embed.add_field(
-                name="🔨 MODERATION & ADMIN",
-                value=(
-                    "> `/mute` / `/unmute` — Manage member communication.\n"
-                    "> `/kick` / `/ban` — Remove threats from the Vault.\n"
-                    "> `/set-pulse` — Deploy/Relocate the live Pulse dashboard.\n"
-                    "> `/setup` — Auto-configure categories and channels."
-                ),
-                inline=False
-            )
-
-        embed.set_footer(text=f"User: {interaction.user.display_name} • Aura: W Code Active")
-        
-        if self.user.display_avatar:
-            embed.set_thumbnail(url=self.user.display_avatar.url)
-
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+    if is_admin or is_mod:
+        embed.add_field(
+            name="🔨 MODERATION & ADMIN",
+            value=(
+                "> `/mute` / `/unmute` — Manage member communication.\n"
+                "> `/kick` / `/ban` — Remove threats from the Vault.\n"
+                "> `/set-pulse` — Deploy/Relocate the live Pulse dashboard.\n"
+                "> `/resync-roles` — Re-apply missing level roles to all members.\n"
+                "> `/configure` / `/core-team` — Server channels and staff.\n"
+                "> `/reload` — Bot owner: reload modules without a restart.\n"
+                "> `/db-report` — Bot owner: hot and slow database queries.\n"
+                "> `/profile` — Bot owner: sample where the bot spends its time.\n"
+                "> `/setup` — Auto-configure categories and channels."
+            ),
+            inline=False
+        )
+
+    embed.set_footer(text=f"User: {interaction.user.display_name} • Aura: W Code Active")
+
+    if interaction.user.display_avatar:
+        embed.set_thumbnail(url=interaction.user.display_avatar.url)
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 # ─── FINAL STARTUP ──────────────────────────────────────────
 
 if __name__ == "__main__":
-    # 1. Start the Flask web server first
-    print("🌐 Initializing Keep-Alive...")
-    keep_alive()
-    
-    # 2. Start the Discord Bot
+    # The keep-alive server starts with the bot (see VaultBot.setup_hook)
+    bot.startup.lap("import")
     print("🤖 Connecting to Discord...")
     try:
         if not TOKEN:
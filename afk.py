@@ -0,0 +1,77 @@
+# ─── AFK STATE ──────────────────────────────────────────────
+# AFK entries shared by the AFK cog and any other listener; kept on the bot
+# (bot.afk) so a /reload doesn't drop them.
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from storage import StorageUnavailable
+
+AFK_TTL = 7 * 24 * 3600      # AFK entries expire after a week
+AFK_PRUNE_INTERVAL = 3600    # Seconds between in-memory sweeps
+
+
+class AFKRegistry:
+    # AFK state lives in storage (TTL-indexed on expires_at) and is mirrored in
+    # `entries` as member key -> (since, reason) tuples for lookups on every message.
+    def __init__(self, store, ttl=AFK_TTL):
+        self.store = store
+        self.ttl = ttl
+        self.entries = {}
+        self._load_task = None
+        self._next_prune = 0
+
+    def load(self):
+        # Started from setup_hook; on_message awaits it before the first lookup
+        if self._load_task is None:
+            self._load_task = asyncio.ensure_future(self._load())
+        return self._load_task
+
+    async def _load(self):
+        cutoff = int(time.time()) - self.ttl
+        try:
+            docs = await self.store.load_afk(cutoff)
+        except StorageUnavailable as e:
+            # Retried by the next message
+            self._load_task = None
+            return print(f"⚠️ AFK entries not loaded yet: {e}")
+        for doc in docs:
+            self.entries[doc["_id"]] = (doc["time"], doc["reason"])
+        self._next_prune = time.time() + AFK_PRUNE_INTERVAL
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry and entry[0] + self.ttl < time.time():
+            del self.entries[key]
+            return None
+        return entry
+
+    async def set(self, key, reason):
+        now = int(time.time())
+        self.entries[key] = (now, reason)
+        self._maybe_prune()
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        try:
+            await self.store.set_afk(key, reason, now, expires_at)
+        except StorageUnavailable as e:
+            # Still answered from memory by this process; lost on a restart
+            print(f"⚠️ AFK entry for {key} not saved to storage: {e}")
+
+    async def pop(self, key):
+        entry = self.get(key)
+        if key in self.entries:
+            del self.entries[key]
+            try:
+                await self.store.delete_afk(key)
+            except StorageUnavailable as e:
+                print(f"⚠️ AFK entry for {key} not removed from storage: {e}")
+        return entry
+
+    def _maybe_prune(self):
+        now = time.time()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + AFK_PRUNE_INTERVAL
+        cutoff = now - self.ttl
+        for key in [k for k, (since, _) in self.entries.items() if since < cutoff]:
+            del self.entries[key]
@@ -0,0 +1,361 @@
+# ─── SYNTHETIC LOAD BENCHMARK ───────────────────────────────
+# Feeds fake messages and interactions straight into the bot's handlers,
+# with no Discord connection, and reports throughput, handler latency
+# percentiles and storage operations per event.
+#
+#     python bench.py [--backend memory|sqlite|mongo] [--events N] [--users N]
+#                     [--concurrency N] [--compare bench_results/<old>.json]
+#
+# The memory backend is an in-process stand-in for MongoDB; use
+# --backend mongo with MONGO_URL pointing at a local mongod for real
+# round trips. Every run is saved as JSON under bench_results/.
+import argparse
+import asyncio
+import functools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import config
+
+
+# ─── FAKE DISCORD OBJECTS ───────────────────────────────────
+class FakeAvatar:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class FakePermissions:
+    administrator = True
+    moderate_members = True
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.members = {}
+        self.roles = []
+        self.member_count = 0
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    def get_role(self, role_id):
+        return None
+
+
+class FakeMember:
+    def __init__(self, user_id, guild):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+        self.guild = guild
+        self.roles = []
+        self.display_avatar = FakeAvatar()
+        self.guild_permissions = FakePermissions()
+        self.dms = []
+
+    async def send(self, content=None, embed=None, **kwargs):
+        self.dms.append(embed)
+
+    async def add_roles(self, *roles, **kwargs):
+        self.roles.extend(roles)
+
+
+class FakeMessage:
+    def __init__(self, author, channel, state, content="gm vault"):
+        self.author = author
+        self.channel = channel
+        self.guild = author.guild
+        self.content = content
+        self.mentions = []
+        self.created_at = datetime.now(timezone.utc)
+        self._state = state
+
+
+class FakeResponse:
+    def __init__(self):
+        self.done = False
+
+    async def send_message(self, content=None, **kwargs):
+        self.done = True
+
+    async def defer(self, **kwargs):
+        self.done = True
+
+    def is_done(self):
+        return self.done
+
+
+class FakeFollowup:
+    async def send(self, content=None, **kwargs):
+        pass
+
+
+class FakeInteraction:
+    client = None  # Set to the bot by load_vault
+
+    def __init__(self, user, channel):
+        self.user = user
+        self.guild = user.guild
+        self.guild_id = user.guild.id
+        self.channel = channel
+        self.channel_id = channel.id
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+        self.extras = {}
+
+
+# ─── STORAGE OP COUNTING ────────────────────────────────────
+class CountingStorage:
+    # Wraps a storage backend and counts every awaited call by method name
+    def __init__(self, inner):
+        self._inner = inner
+        self.ops = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def counted(*args, **kwargs):
+            self.ops[name] += 1
+            return await attr(*args, **kwargs)
+        return counted
+
+
+# ─── HARNESS ────────────────────────────────────────────────
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def command(vault, name):
+    # Slash command callback by its tree name; cog commands get their cog bound
+    cmd = vault.bot.tree.get_command(name)
+    if cmd.binding is None:
+        return cmd.callback
+    return functools.partial(cmd.callback, cmd.binding)
+
+
+class Bench:
+    def __init__(self, vault, args):
+        self.vault = vault
+        self.args = args
+        self.store = vault.store
+        self.guild = FakeGuild(config.HOME_GUILD_ID)
+        self.channel = FakeChannel(4242)
+        self.members = []
+        for i in range(args.users):
+            member = FakeMember(10_000 + i, self.guild)
+            self.guild.members[member.id] = member
+            self.members.append(member)
+        staff_id = next(iter(config.CORE_TEAM))
+        self.staff = FakeMember(staff_id, self.guild)
+        self.guild.members[staff_id] = self.staff
+        self.guild.member_count = len(self.guild.members)
+
+    async def run_scenario(self, name, make_event):
+        # make_event(i) returns a coroutine for the i-th event
+        latencies = []
+        ops_before = sum(self.store.ops.values())
+        by_op_before = Counter(self.store.ops)
+        limiter = asyncio.Semaphore(self.args.concurrency)
+
+        async def timed(i):
+            async with limiter:
+                start = time.perf_counter()
+                await make_event(i)
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(timed(i) for i in range(self.args.events)))
+        await self.vault.bot.xp_buffer.flush()
+        await self.vault.bot.outbox.drain()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        events = len(latencies)
+        ops = sum(self.store.ops.values()) - ops_before
+        by_op = {k: v for k, v in (self.store.ops - by_op_before).items()}
+        return {
+            "scenario": name,
+            "events": events,
+            "seconds": round(elapsed, 4),
+            "events_per_sec": round(events / elapsed, 1) if elapsed else None,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "db_ops_per_event": round(ops / events, 3) if events else 0,
+            "db_ops": by_op,
+        }
+
+    def random_member(self):
+        return random.choice(self.members)
+
+    async def dispatch_message(self, member):
+        # What discord.py's dispatch does: every cog listener, then prefix commands
+        bot = self.vault.bot
+        message = FakeMessage(member, self.channel, bot._connection)
+        for listener in bot.extra_events.get("on_message", []):
+            await listener(message)
+        await bot.process_commands(message)
+
+    # --- SCENARIOS ---
+    async def on_message(self, i):
+        await self.dispatch_message(self.random_member())
+
+    async def spam(self, i):
+        # A few members posting back to back with the XP throttle on, so
+        # nearly every message takes the suppressed path
+        await self.dispatch_message(self.members[i % SPAM_MEMBERS])
+
+    async def vouch(self, i):
+        giver, target = random.sample(self.members, 2)
+        await command(self.vault, "vouch")(FakeInteraction(giver, self.channel), target, "smooth trade")
+
+    async def level(self, i):
+        await command(self.vault, "level")(FakeInteraction(self.random_member(), self.channel))
+
+    async def levelsboard(self, i):
+        await command(self.vault, "levelsboard")(FakeInteraction(self.random_member(), self.channel))
+
+    async def stats(self, i):
+        await command(self.vault, "stats")(FakeInteraction(self.random_member(), self.channel))
+
+    async def service_cycle(self, i):
+        # create → start → complete for one customer, OTPs read from the DM
+        customer = self.members[i % len(self.members)]
+        staff_interaction = lambda: FakeInteraction(self.staff, self.channel)
+        await command(self.vault, "create-service")(staff_interaction(), customer, f"Job {i}")
+        otps = {f.name: f.value.strip("`|") for f in customer.dms[-1].fields}
+        await command(self.vault, "start-service")(staff_interaction(), customer, otps["🔑 START OTP"])
+        await command(self.vault, "complete-service")(staff_interaction(), customer, otps["🔒 END OTP"])
+
+    async def boards(self, i):
+        name, period = random.choice(["xp-board", "vouch-board", "service-board"]), random.choice(["day", "week", "month"])
+        await command(self.vault, name)(FakeInteraction(self.random_member(), self.channel), period)
+
+    async def my_service(self, i):
+        await command(self.vault, "my-service")(FakeInteraction(self.random_member(), self.channel))
+
+
+SPAM_MEMBERS = 10
+THROTTLED = {"spam"}  # Scenarios run with the XP throttle; elsewhere it's off so every message is scored
+SCENARIOS = ["on_message", "spam", "vouch", "level", "levelsboard", "boards", "stats", "service_cycle", "my_service"]
+
+
+def load_vault(backend):
+    os.environ["STORAGE_BACKEND"] = backend
+    if backend == "sqlite":
+        os.environ.setdefault("SQLITE_PATH", "bench.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(os.environ["SQLITE_PATH"] + suffix):
+                os.remove(os.environ["SQLITE_PATH"] + suffix)
+    import AtomicVault as vault
+
+    # process_commands compares authors against bot.user, which is only set on login
+    vault.bot._connection.user = FakeMember(1, None)
+    vault.bot._connection.user.bot = True
+    FakeInteraction.client = vault.bot
+
+    # Route every storage call through the op counter
+    counting = CountingStorage(vault.store)
+    vault.store = counting
+    vault.bot.store = counting
+    vault.bot.xp_buffer.store = counting
+    vault.bot.profiles.store = counting
+    vault.bot.afk.store = counting
+    vault.bot.settings.store = counting
+    return vault
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = {r["scenario"]: r for r in json.load(f)["results"]}
+    print(f"\n📊 Compared with {previous_path}:")
+    for result in current:
+        old = previous.get(result["scenario"])
+        if not old:
+            continue
+        deltas = []
+        for key in ("events_per_sec", "p95_ms", "db_ops_per_event"):
+            if old.get(key):
+                deltas.append(f"{key} {(result[key] - old[key]) / old[key] * 100:+.1f}%")
+        print(f"  {result['scenario']:<14} " + "  ".join(deltas))
+
+
+async def run(args):
+    vault = load_vault(args.backend)
+    await vault.store.ensure_indexes()
+    await vault.bot.load_vault_extensions()
+    from leveling import XPThrottle
+
+    bench = Bench(vault, args)
+    results = []
+    for name in args.scenarios:
+        vault.bot.xp_throttle = XPThrottle() if name in THROTTLED else XPThrottle(cooldown=0)
+        results.append(await bench.run_scenario(name, getattr(bench, name)))
+    for name in list(vault.bot.extensions):
+        await vault.bot.unload_extension(name)
+    for pulse in vault.bot.pulses.values():
+        pulse.cancel()
+    await vault.store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atomic Vault synthetic load benchmark")
+    parser.add_argument("--backend", default="memory", choices=["memory", "sqlite", "mongo"])
+    parser.add_argument("--events", type=int, default=2000, help="Events per scenario")
+    parser.add_argument("--users", type=int, default=200, help="Distinct simulated members")
+    parser.add_argument("--concurrency", type=int, default=50, help="Events in flight at once")
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="bench_results", help="Directory for the JSON report")
+    parser.add_argument("--compare", help="Previous JSON report to diff against")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    results = asyncio.run(run(args))
+
+    print(f"{'scenario':<14} {'events/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/event':>10}")
+    for r in results:
+        print(f"{r['scenario']:<14} {r['events_per_sec']:>10} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['db_ops_per_event']:>10}")
+
+    os.makedirs(args.out, exist_ok=True)
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "backend": args.backend,
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "results": results,
+    }
+    path = os.path.join(args.out, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Saved {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
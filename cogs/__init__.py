@@ -0,0 +1 @@
+# Reloadable extensions: logic only, state lives on the bot (see AtomicVault.EXTENSIONS)
@@ -0,0 +1,68 @@
+# ─── AFK ────────────────────────────────────────────────────
+# !afk, welcome-back notices and AFK mention notices. Entries live in
+# bot.afk (see afk.py).
+import time
+
+from discord.ext import commands
+
+import metrics
+from storage import member_key
+
+
+def afk_time_ago(seconds):
+    mins = seconds // 60
+    if mins < 60: return f"{mins}m"
+    hrs = mins // 60
+    if hrs < 24: return f"{hrs}h"
+    return f"{hrs // 24}d"
+
+
+class AFK(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener("on_message")
+    async def check_afk(self, message):
+        # Ignore bots and DMs
+        if message.author.bot or not message.guild:
+            return
+        with metrics.MESSAGE_LATENCY.labels("afk").time():
+            await self.handle_message(message)
+
+    async def handle_message(self, message):
+        bot = self.bot
+        await bot.afk.load()
+        now = int(time.time())
+
+        key = member_key(message.guild.id, message.author.id)
+        entry = bot.afk.get(key)
+        # Listeners and commands run side by side: an entry newer than the
+        # message was set by this very !afk, so it isn't a return
+        if entry and entry[0] < int(message.created_at.timestamp()):
+            since, _ = await bot.afk.pop(key)
+            bot.outbox.send(
+                message.channel,
+                content=f"👋 Welcome back **{message.author.display_name}**\n⏱️ AFK for: {afk_time_ago(now - since)}",
+                delete_after=6
+            )
+
+        # One combined notice no matter how many AFK members were mentioned
+        notices = []
+        for user in message.mentions:
+            entry = bot.afk.get(member_key(message.guild.id, user.id))
+            if entry:
+                since, reason = entry
+                notices.append(f"💤 **{user.display_name} is AFK**\n📌 Reason: {reason}\n⏱️ {afk_time_ago(now - since)}")
+        if notices:
+            bot.outbox.send(message.channel, content="\n\n".join(notices)[:2000], delete_after=8)
+
+    @commands.command()
+    async def afk(self, ctx, *, reason="AFK"):
+        if not ctx.guild:
+            return
+        await self.bot.afk.set(member_key(ctx.guild.id, ctx.author.id), reason)
+        await ctx.send(f"💤 **AFK set:** {reason}", delete_after=6)
+
+
+async def setup(bot):
+    await bot.add_cog(AFK(bot))
@@ -0,0 +1,79 @@
+# ─── LEADERBOARDS ───────────────────────────────────────────
+# /levelsboard from the cached all-time board, and the windowed boards read
+# from per-day counter buckets (see storage.py): a board is the sum of at
+# most 30 bucket documents, never a scan of raw activity.
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from config import EMBED_COLOR
+from leveling import LEADERBOARD_SIZE
+
+BOARD_WINDOWS = {"day": (1, "Today"), "week": (7, "This Week"), "month": (30, "This Month")}
+BOARD_WINDOW_CHOICES = [app_commands.Choice(name=label, value=w) for w, (_, label) in BOARD_WINDOWS.items()]
+
+
+class Leaderboards(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="levelsboard", description="Top members by level")
+    async def levelsboard(self, interaction: discord.Interaction):
+        # Cached until an XP write reaches the board (see TopNCache)
+        guild_id = str(interaction.guild_id)
+        board = self.bot.xp_buffer.top(guild_id)
+        top_users = board.rows
+        if top_users is None:
+            stored = await self.bot.store.top_xp(guild_id, LEADERBOARD_SIZE)
+            top_users = board.rows = self.bot.xp_buffer.overlay_top(guild_id, stored, LEADERBOARD_SIZE)
+
+        if not top_users:
+            return await interaction.response.send_message("No levels yet 😔", ephemeral=True)
+
+        # One batched lookup at most for members missing from the gateway cache
+        names = await self.bot.members.names_for(interaction.guild, [data["user_id"] for data in top_users])
+        embed = discord.Embed(title="🏆 Level Leaderboard", color=0x00f7ff)
+        for i, data in enumerate(top_users, 1):
+            xp = data["xp"]
+            lvl = xp // 100
+            embed.add_field(name=f"#{i} {names[int(data['user_id'])]}", value=f"Lvl {lvl} | XP: {xp}", inline=False)
+
+        await interaction.response.send_message(embed=embed)
+
+    async def send_window_board(self, interaction, kind, window, title, unit):
+        days, label = BOARD_WINDOWS[window]
+        # Buffered XP reaches the buckets with the next flush (at most
+        # XP_FLUSH_INTERVAL later); a read never forces one
+        rows = await self.bot.store.top_window(str(interaction.guild_id), kind, days, LEADERBOARD_SIZE)
+        if not rows:
+            return await interaction.response.send_message(f"No {unit} recorded {label.lower()} yet 😔", ephemeral=True)
+
+        names = await self.bot.members.names_for(interaction.guild, [row["user_id"] for row in rows])
+        embed = discord.Embed(title=f"{title} · {label}", color=EMBED_COLOR)
+        embed.description = "\n".join(
+            f"**#{i}** {names[int(row['user_id'])]} — `{row['count']}` {unit}" for i, row in enumerate(rows, 1)
+        )
+        embed.set_footer(text="Days roll over at 00:00 UTC")
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="xp-board", description="Top XP earners today, this week or this month")
+    @app_commands.describe(period="Time window (default: this week)")
+    @app_commands.choices(period=BOARD_WINDOW_CHOICES)
+    async def xp_board(self, interaction: discord.Interaction, period: str = "week"):
+        await self.send_window_board(interaction, "xp", period, "🏆 XP Leaderboard", "XP")
+
+    @app_commands.command(name="vouch-board", description="Most vouched members today, this week or this month")
+    @app_commands.describe(period="Time window (default: this week)")
+    @app_commands.choices(period=BOARD_WINDOW_CHOICES)
+    async def vouch_board(self, interaction: discord.Interaction, period: str = "week"):
+        await self.send_window_board(interaction, "vouches", period, "🌟 Vouch Leaderboard", "vouches")
+
+    @app_commands.command(name="service-board", description="Staff with the most completed jobs today, this week or this month")
+    @app_commands.describe(period="Time window (default: this week)")
+    @app_commands.choices(period=BOARD_WINDOW_CHOICES)
+    async def service_board(self, interaction: discord.Interaction, period: str = "week"):
+        await self.send_window_board(interaction, "services", period, "🛠️ Service Leaderboard", "jobs")
+
+
+async def setup(bot):
+    await bot.add_cog(Leaderboards(bot))
@@ -0,0 +1,58 @@
+# ─── MODERATION ─────────────────────────────────────────────
+import re
+from datetime import timedelta
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+
+def parse_duration(duration: str):
+    match = re.fullmatch(r"(\d+)([smhd])", duration.lower())
+    if not match: return None
+    amount, unit = match.groups()
+    return {"s": timedelta(seconds=int(amount)), "m": timedelta(minutes=int(amount)),
+            "h": timedelta(hours=int(amount)), "d": timedelta(days=int(amount))}.get(unit)
+
+
+class Moderation(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="ban", description="Ban a member")
+    @app_commands.checks.has_permissions(ban_members=True)
+    async def ban(self, interaction: discord.Interaction, member: discord.Member, reason: str = "No reason"):
+        if member.id == interaction.user.id: return await interaction.response.send_message("❌ Cannot ban self.", ephemeral=True)
+        await member.ban(reason=reason)
+        await interaction.response.send_message(f"🔨 Banned {member}")
+
+    @app_commands.command(name="kick", description="Kick a member")
+    @app_commands.checks.has_permissions(kick_members=True)
+    async def kick(self, interaction: discord.Interaction, member: discord.Member, reason: str = "No reason"):
+        await member.kick(reason=reason)
+        await interaction.response.send_message(f"👢 Kicked {member}")
+
+    @app_commands.command(name="unban", description="Unban a user by ID")
+    @app_commands.checks.has_permissions(ban_members=True)
+    async def unban(self, interaction: discord.Interaction, user_id: str, reason: str = "No reason"):
+        user = await self.bot.fetch_user(int(user_id))
+        await interaction.guild.unban(user, reason=reason)
+        await interaction.response.send_message(f"✅ Unbanned {user.name}")
+
+    @app_commands.command(name="mute", description="Mute a member")
+    @app_commands.checks.has_permissions(moderate_members=True)
+    async def mute(self, interaction: discord.Interaction, member: discord.Member, duration: str, reason: str = "No reason"):
+        delta = parse_duration(duration)
+        if not delta: return await interaction.response.send_message("❌ Use 10s / 5m / 2h / 1d", ephemeral=True)
+        await member.timeout(delta, reason=reason)
+        await interaction.response.send_message(f"🔇 Muted {member} for {duration}")
+
+    @app_commands.command(name="unmute", description="Unmute a member")
+    @app_commands.checks.has_permissions(moderate_members=True)
+    async def unmute(self, interaction: discord.Interaction, member: discord.Member):
+        await member.timeout(None)
+        await interaction.response.send_message(f"🔊 Unmuted {member}")
+
+
+async def setup(bot):
+    await bot.add_cog(Moderation(bot))
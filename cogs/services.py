@@ -0,0 +1,273 @@
+# ─── SERVICE SYSTEM ─────────────────────────────────────────
+# PENDING → IN_PROGRESS → COMPLETED / CANCELLED. Every transition is one
+# conditional storage write that checks the current status and the OTP hash,
+# so two staff members can never both complete the same job.
+import hashlib
+import hmac
+import random
+import string
+import time
+from datetime import datetime, timezone
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from config import EMBED_COLOR, OTP_SECRET
+from guilds import is_core
+from storage import member_key
+
+SERVICE_PENDING = "PENDING"
+SERVICE_IN_PROGRESS = "IN_PROGRESS"
+SERVICE_COMPLETED = "COMPLETED"
+SERVICE_CANCELLED = "CANCELLED"
+SERVICES_PAGE_SIZE = 10     # Jobs per /view-active page (embeds cap at 25 fields)
+SERVICES_VIEW_TIMEOUT = 180  # Seconds before the page buttons stop responding
+
+
+def generate_otp():
+    return ''.join(random.choices(string.digits, k=6))
+
+
+def hash_otp(customer_id, field, otp):
+    # Only hashes are stored; the plain codes exist in the customer's DM only
+    message = f"{customer_id}:{field}:{otp.strip()}".encode()
+    return hmac.new(OTP_SECRET, message, hashlib.sha256).hexdigest()
+
+
+def service_log_channel(interaction):
+    channel_id = interaction.client.settings.get(interaction.guild_id).service_log_channel_id
+    return interaction.client.get_channel(channel_id) if channel_id else None
+
+
+class ActiveServicesView(discord.ui.View):
+    # Keyset pagination: each page is fetched after the last job of the
+    # previous one, and the page start cursors are kept for "Previous".
+    def __init__(self, bot, guild, owner_id, status=None, staff_id=None):
+        super().__init__(timeout=SERVICES_VIEW_TIMEOUT)
+        self.bot = bot
+        self.guild = guild
+        self.owner_id = owner_id
+        self.status = status
+        self.staff_id = staff_id
+        self.starts = [None]  # Cursor each visited page started after
+        self.has_next = False
+        self.interaction = None
+
+    async def load(self):
+        # One extra row tells us whether a next page exists
+        jobs = await self.bot.store.list_services(
+            str(self.guild.id), SERVICES_PAGE_SIZE + 1, status=self.status, staff_id=self.staff_id, after=self.starts[-1]
+        )
+        self.has_next = len(jobs) > SERVICES_PAGE_SIZE
+        jobs = jobs[:SERVICES_PAGE_SIZE]
+        self.previous_page.disabled = len(self.starts) == 1
+        self.next_page.disabled = not self.has_next
+        self.next_cursor = (jobs[-1]["created_at"], jobs[-1]["_id"]) if jobs else None
+        names = await self.bot.members.names_for(self.guild, [job["user_id"] for job in jobs])
+        return self.render(jobs, names)
+
+    def render(self, jobs, names):
+        filters = []
+        if self.status:
+            filters.append(f"status `{self.status}`")
+        if self.staff_id is not None:
+            filters.append(f"staff <@{self.staff_id}>")
+        embed = discord.Embed(
+            title="🛰️ CURRENT ACTIVE SERVICES",
+            description="Filtered by " + ", ".join(filters) if filters else None,
+            color=EMBED_COLOR
+        )
+        for job in jobs:
+            created = job.get("created_at")
+            opened = f"\n**Opened:** {discord.utils.format_dt(created.replace(tzinfo=created.tzinfo or timezone.utc), 'R')}" if created else ""
+            embed.add_field(
+                name=f"🛠️ {job['name']}",
+                value=f"**Customer:** {names[int(job['user_id'])]}\n**Staff:** {job['staff']}\n**Status:** `{job['status']}`{opened}",
+                inline=False
+            )
+        if not jobs:
+            embed.description = "🛰️ No active services."
+        embed.set_footer(text=f"Page {len(self.starts)}")
+        return embed
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ This browser belongs to someone else.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.starts.pop()
+        await interaction.response.edit_message(embed=await self.load(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.starts.append(self.next_cursor)
+        await interaction.response.edit_message(embed=await self.load(), view=self)
+
+    async def on_timeout(self):
+        if self.interaction:
+            try:
+                await self.interaction.edit_original_response(view=None)
+            except discord.HTTPException:
+                pass
+
+
+class Services(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="create-service", description="Staff: Create a service")
+    async def create_service(self, interaction: discord.Interaction, customer: discord.Member, service_name: str):
+        if not is_core(interaction):
+            return await interaction.response.send_message("❌ Unauthorized", ephemeral=True)
+
+        s_otp, e_otp, c_otp = generate_otp(), generate_otp(), generate_otp()
+
+        # Save to storage (OTPs hashed)
+        customer_id = member_key(interaction.guild_id, customer.id)
+        await self.bot.store.create_service(customer_id, {
+            "name": service_name,
+            "staff": interaction.user.name,
+            "staff_id": interaction.user.id,
+            "s_otp": hash_otp(customer_id, "s_otp", s_otp),
+            "e_otp": hash_otp(customer_id, "e_otp", e_otp),
+            "c_otp": hash_otp(customer_id, "c_otp", c_otp),
+            "status": SERVICE_PENDING,
+            "created_at": datetime.now(timezone.utc)
+        })
+        log_chan = service_log_channel(interaction)
+        if log_chan: self.bot.outbox.send(log_chan, embed=discord.Embed(title="📝 SERVICE CREATED", description=f"**{service_name}** for {customer.mention}", color=0xffa500))
+
+        try:
+            dm = discord.Embed(title="💠 VAULT SERVICE CODES", color=EMBED_COLOR)
+            dm.add_field(name="🔑 START OTP", value=f"`{s_otp}`", inline=True)
+            dm.add_field(name="🔒 END OTP", value=f"`{e_otp}`", inline=True)
+            dm.add_field(name="🚫 CANCEL OTP", value=f"`{c_otp}`", inline=True)
+            await customer.send(embed=dm)
+            await interaction.response.send_message(f"✅ Service created for {customer.name}.", ephemeral=True)
+        except: await interaction.response.send_message("⚠️ Failed to DM customer.", ephemeral=True)
+
+    @app_commands.command(name="start-service", description="Staff: Verify Start OTP")
+    async def start_service(self, interaction: discord.Interaction, customer: discord.Member, otp: str):
+        if not is_core(interaction):
+            return await interaction.response.send_message("❌ Unauthorized", ephemeral=True)
+
+        customer_id = member_key(interaction.guild_id, customer.id)
+        job = await self.bot.store.advance_service(
+            customer_id, [SERVICE_PENDING], "s_otp", hash_otp(customer_id, "s_otp", otp), SERVICE_IN_PROGRESS
+        )
+        if not job: return await interaction.response.send_message("❌ Invalid OTP, or the service was already started.", ephemeral=True)
+        await interaction.response.send_message(f"⚙️ Service started for {customer.mention}")
+
+    @app_commands.command(name="complete-service", description="Staff: Verify End OTP and generate receipt")
+    async def complete_service(self, interaction: discord.Interaction, customer: discord.Member, otp: str):
+        if not is_core(interaction):
+            return await interaction.response.send_message("❌ Unauthorized", ephemeral=True)
+
+        # Close the job (status + OTP checked atomically, copied to history)
+        customer_id = member_key(interaction.guild_id, customer.id)
+        job = await self.bot.store.finish_service(
+            customer_id, [SERVICE_IN_PROGRESS], "e_otp", hash_otp(customer_id, "e_otp", otp),
+            SERVICE_COMPLETED, {"closed_by": interaction.user.id}
+        )
+
+        if not job:
+            return await interaction.response.send_message("❌ Invalid OTP, or the service hasn't been started. Verification failed.", ephemeral=True)
+
+        # Increment Staff Stats (the job is already closed: a failure here still gets a receipt)
+        staff_key = member_key(interaction.guild_id, interaction.user.id)
+        try:
+            total_jobs = await self.bot.store.add_completed(staff_key)
+            self.bot.profiles.update(staff_key, completed=total_jobs)
+        except Exception as e:
+            print(f"❌ Could not count completed job for {staff_key}: {e}")
+            total_jobs = "unavailable"
+
+        # --- GENERATE RECEIPT ---
+        receipt = discord.Embed(title="📄 SERVICE COMPLETION RECEIPT", color=0x2bff88)
+        receipt.set_author(name="Atomic Vault Ledger", icon_url=interaction.user.display_avatar.url)
+
+        receipt.add_field(name="🛠️ Service Type", value=f"`{job['name']}`", inline=False)
+        receipt.add_field(name="👤 Customer", value=f"{customer.display_name} ({customer.mention})", inline=True)
+        receipt.add_field(name="👑 Staff", value=f"{interaction.user.display_name} ({interaction.user.mention})", inline=True)
+        receipt.add_field(name="🌟 Staff Total Jobs", value=f"`{total_jobs}`", inline=True)
+        receipt.set_footer(text=f"ID: {generate_otp()} • {time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+        await interaction.response.send_message(content="🏁 **Service Finalized.** Receipt generated.", embed=receipt)
+
+        # Log to Channel (queued)
+        log_chan = service_log_channel(interaction)
+        if log_chan:
+            self.bot.outbox.send(log_chan, embed=receipt)
+
+    @app_commands.command(name="cancel-service", description="Staff: Verify Cancel OTP")
+    async def cancel_service(self, interaction: discord.Interaction, customer: discord.Member, otp: str, reason: str):
+        if not is_core(interaction):
+            return await interaction.response.send_message("❌ Unauthorized", ephemeral=True)
+
+        # 1. Void the job if it is still open and the Cancel OTP matches (one atomic write)
+        customer_id = member_key(interaction.guild_id, customer.id)
+        job = await self.bot.store.finish_service(
+            customer_id, [SERVICE_PENDING, SERVICE_IN_PROGRESS], "c_otp", hash_otp(customer_id, "c_otp", otp),
+            SERVICE_CANCELLED, {"closed_by": interaction.user.id, "reason": reason}
+        )
+
+        # 2. No match means no open job or a wrong OTP
+        if not job:
+            return await interaction.response.send_message("❌ Invalid Cancel OTP or no active service for this user. Verification failed.", ephemeral=True)
+
+        # 3. Create a Cancel Log Embed
+        cancel_embed = discord.Embed(title="🚫 SERVICE VOIDED", color=0xff4444)
+        cancel_embed.add_field(name="🛠️ Service", value=f"`{job['name']}`", inline=True)
+        cancel_embed.add_field(name="👤 Customer", value=f"{customer.display_name} ({customer.mention})", inline=True)
+        cancel_embed.add_field(name="👑 Cancelled By", value=f"{interaction.user.display_name} ({interaction.user.mention})", inline=True)
+        cancel_embed.add_field(name="📝 Reason", value=f"```fix\n{reason}```", inline=False)
+        cancel_embed.set_footer(text=f"Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+        await interaction.response.send_message(f"✅ Service for {customer.mention} has been successfully voided.")
+
+        # Send log to channel (queued)
+        log_chan = service_log_channel(interaction)
+        if log_chan:
+            self.bot.outbox.send(log_chan, embed=cancel_embed)
+
+    @app_commands.command(name="view-active", description="Staff: Browse active services")
+    @app_commands.describe(staff="Only jobs handled by this staff member", status="Only jobs with this status")
+    @app_commands.choices(status=[
+        app_commands.Choice(name="Pending", value=SERVICE_PENDING),
+        app_commands.Choice(name="In Progress", value=SERVICE_IN_PROGRESS)
+    ])
+    async def view_active(self, interaction: discord.Interaction, staff: discord.Member = None, status: str = None):
+        if not is_core(interaction):
+            return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+
+        view = ActiveServicesView(self.bot, interaction.guild, interaction.user.id, status=status, staff_id=staff.id if staff else None)
+        embed = await view.load()
+        # Keep the interaction so the buttons can be removed on timeout
+        view.interaction = interaction
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+    @app_commands.command(name="my-service", description="Customer: View your active service details")
+    async def my_service(self, interaction: discord.Interaction):
+        job = await self.bot.store.get_service(member_key(interaction.guild_id, interaction.user.id))
+
+        if not job:
+            return await interaction.response.send_message("🛰️ **No active services found** linked to your ID.", ephemeral=True)
+
+        embed = discord.Embed(title="💠 YOUR ACTIVE SERVICE", color=EMBED_COLOR)
+        embed.add_field(name="🛠️ Operation", value=f"`{job['name']}`", inline=False)
+        embed.add_field(name="👤 Assigned Staff", value=f"`{job['staff']}`", inline=True)
+        embed.add_field(name="🛰️ Status", value=f"`{job['status']}`", inline=True)
+
+        # Only OTP hashes are stored, so the codes can't be shown again
+        embed.add_field(name="🔑 OTPs", value="Your START / END / CANCEL codes were sent to your DMs when the service was created.", inline=False)
+
+        embed.set_footer(text="Keep these codes confidential.")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Services(bot))
@@ -0,0 +1,120 @@
+# ─── VOUCHES ────────────────────────────────────────────────
+# /vouch and /stats. Every vouch is a ledger event (giver, reason, time);
+# counts and the pulse stats document are kept by the storage layer, this
+# cog only posts and marks the pulse.
+import time
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from config import EMBED_COLOR
+from storage import VOUCH_DEDUPE_WINDOW, DuplicateVouch, StorageUnavailable, guild_config, member_key
+
+
+class Vouches(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="vouch", description="Give a member a Vault Vouch")
+    async def vouch(self, interaction: discord.Interaction, target: discord.Member, reason: str):
+        bot = self.bot
+        if target.id == interaction.user.id:
+            return await interaction.response.send_message("❌ You cannot vouch for yourself.", ephemeral=True)
+
+        # 1. Record the vouch in the ledger (duplicate check included) and get the new count
+        settings = bot.settings.get(interaction.guild_id)
+        target_key = member_key(interaction.guild_id, target.id)
+        try:
+            total = await bot.store.add_vouch(target_key, interaction.user.id, reason)
+        except DuplicateVouch:
+            # Windows are fixed (epoch-aligned), not counted from the last vouch
+            period = "day (UTC)" if VOUCH_DEDUPE_WINDOW == 86400 else f"{VOUCH_DEDUPE_WINDOW // 3600}h window"
+            next_window = (int(time.time()) // VOUCH_DEDUPE_WINDOW + 1) * VOUCH_DEDUPE_WINDOW
+            return await interaction.response.send_message(
+                f"❌ You can only vouch for {target.mention} once per {period}. Next window <t:{next_window}:R>.",
+                ephemeral=True
+            )
+        if total is None:
+            bot.profiles.invalidate(target_key)
+        else:
+            bot.profiles.update(target_key, vouches=total)
+
+        # 2. Clearance Logic
+        if settings.is_core(target.id):
+            clearance = f"⭐ {settings.core_team[target.id]}"
+        elif total is None:
+            # Journaled during a database outage; the count isn't known yet
+            clearance = "🛰️ SYNCING"
+        elif total >= 25:
+            clearance = "💎 ELITE"
+        elif total >= 10:
+            clearance = "✅ TRUSTED"
+        else:
+            clearance = "👤 MEMBER"
+
+        # 3. Create Embed
+        public_embed = discord.Embed(title="💠 NEW VAULT VOUCH", color=0x00ff00)
+        public_embed.set_thumbnail(url=target.display_avatar.url)
+        public_embed.add_field(name="👤 Recipient", value=target.mention, inline=True)
+        public_embed.add_field(name="👤 From", value=interaction.user.mention, inline=True)
+        public_embed.add_field(name="🌟 Total Vouches", value=f"`{total if total is not None else 'syncing…'}`", inline=True)
+        public_embed.add_field(name="📝 Reason", value=f"```fix\n{reason}```", inline=False)
+        public_embed.add_field(name="🛰️ Clearance", value=f"`{clearance}`", inline=True)
+        public_embed.set_footer(text="Atomic Vault Security System")
+
+        # 4. Acknowledge first, then queue the public post
+        v_chan = bot.get_channel(settings.vouch_channel_id) if settings.vouch_channel_id else None
+        if v_chan:
+            await interaction.response.send_message(f"✅ Vouch posted in {v_chan.mention}", ephemeral=True)
+            bot.outbox.send(v_chan, embed=public_embed)
+        else:
+            await interaction.response.send_message(embed=public_embed)
+
+        # 5. Update Recent Activity (cosmetic: the vouch is already recorded and answered)
+        try:
+            await bot.store.set_config(guild_config(interaction.guild_id, "pulse"), {"recent_action": f"⭐ {interaction.user.name} vouched {target.name}"})
+        except StorageUnavailable as e:
+            print(f"⚠️ Pulse recent activity not updated: {e}")
+
+        # Refresh the pulse dashboard (coalesced with other pending refreshes)
+        if interaction.guild_id in bot.pulses:
+            bot.pulses[interaction.guild_id].mark_dirty()
+
+    @app_commands.command(name="stats", description="Check profile stats")
+    async def stats(self, interaction: discord.Interaction, member: discord.Member = None):
+        target = member or interaction.user
+        target_key = member_key(interaction.guild_id, target.id)
+        settings = self.bot.settings.get(interaction.guild_id)
+
+        # XP, vouches and jobs come from one cached profile read
+        profile = await self.bot.profiles.get(target_key)
+        vouches, services = profile["vouches"], profile["completed"]
+
+        color = 0x00ffff if settings.is_core(target.id) else EMBED_COLOR
+        embed = discord.Embed(title="📊 Vault Profile", color=color)
+        embed.set_author(name=target.display_name, icon_url=target.display_avatar.url)
+
+        # Clearance Logic
+        if settings.is_core(target.id): clearance = f"⭐ {settings.core_team[target.id]}"
+        elif vouches >= 25: clearance = "💎 ELITE"
+        elif vouches >= 10: clearance = "✅ TRUSTED"
+        else: clearance = "👤 MEMBER"
+
+        embed.add_field(name="🛰️ Clearance", value=f"`{clearance}`", inline=True)
+        embed.add_field(name="🌟 Total Vouches", value=f"`{vouches}`", inline=True)
+
+        if settings.is_core(target.id):
+            embed.add_field(name="🛠️ Jobs Completed", value=f"`{services}`", inline=True)
+
+        # Visual Progress Bar
+        bar_length = 10
+        progress = min(int(vouches / 25 * bar_length), bar_length)
+        bar = "🟦" * progress + "⬛" * (bar_length - progress)
+        embed.add_field(name="📈 Trust Progress (to Elite)", value=f"{bar}", inline=False)
+
+        await interaction.response.send_message(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Vouches(bot))
@@ -0,0 +1,167 @@
+# ─── XP + LEVELING ──────────────────────────────────────────
+# Message XP, level-ups and /level. Buffered XP and the level role index
+# live on the bot (see leveling.py), so a reload loses nothing.
+import asyncio
+import random
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import metrics
+from leveling import ROLE_SYNC_CONCURRENCY
+from storage import member_key
+
+LEVEL_DIGEST_WINDOW = 5  # Seconds of level-ups merged into one log message
+LEVEL_DIGEST_MAX = 20    # Level-ups per digest embed
+
+
+def render_level_ups(entries):
+    # Outbox batch renderer: entries are (mention, embed, line)
+    if len(entries) == 1:
+        mention, embed, _ = entries[0]
+        return [{"content": f"Congrats {mention}!", "embed": embed}]
+    messages = []
+    for i in range(0, len(entries), LEVEL_DIGEST_MAX):
+        chunk = entries[i:i + LEVEL_DIGEST_MAX]
+        embed = discord.Embed(
+            title=f"🎉 {len(chunk)} LEVEL UPS!",
+            description="\n".join(line for _, _, line in chunk),
+            color=0x00ff88
+        )
+        embed.set_footer(text="Keep chatting to level up! 🍍")
+        mentions = " ".join(dict.fromkeys(mention for mention, _, _ in chunk))
+        messages.append({"content": f"Congrats {mentions}!", "embed": embed})
+    return messages
+
+
+class XP(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener("on_message")
+    async def award_xp(self, message):
+        # Ignore bots and DMs
+        if message.author.bot or not message.guild:
+            return
+        with metrics.MESSAGE_LATENCY.labels("xp").time():
+            await self.handle_message(message)
+
+    async def handle_message(self, message):
+        bot = self.bot
+        # Inside the member's XP cooldown: no XP, no database, no level-up
+        if not bot.xp_throttle.allow(message.guild.id, message.author.id):
+            metrics.XP_SUPPRESSED.inc()
+            return
+        settings = bot.settings.get(message.guild.id)
+
+        # XP calculation
+        if settings.is_core(message.author.id):
+            added_xp = random.randint(50, 150)
+            boost_text = " (10× Staff Boost! 🔥)"
+        else:
+            added_xp = random.randint(5, 15)
+            boost_text = ""
+
+        # Buffered: the database only sees one bulk $inc per user per flush
+        current_xp, new_xp = await bot.xp_buffer.add(member_key(message.guild.id, message.author.id), added_xp)
+
+        # Level calculation (unknown while the database is unreachable: no level-up)
+        old_level = current_xp // 100 if current_xp is not None else None
+        new_level = new_xp // 100 if new_xp is not None else None
+
+        # Level-up handling
+        if old_level is not None and new_level > old_level:
+            title = settings.level_title(new_level)
+
+            # ─── ROLE CHECK (No Creation) ───
+            # This will ONLY give the role if it already exists in your server
+            role = bot.level_roles.get(message.guild, new_level)
+
+            if role:
+                try:
+                    await message.author.add_roles(role)
+                except discord.Forbidden:
+                    print(f"❌ Cannot add role {role.name}: Check bot role hierarchy.")
+
+            # Level-up announcement
+            embed = discord.Embed(
+                title="🎉 LEVEL UP!",
+                description=f"{message.author.mention} has reached **Level {new_level}**!{boost_text}",
+                color=0xffaa00 if settings.is_core(message.author.id) else 0x00ff88
+            )
+            embed.add_field(name="New Rank", value=title, inline=False)
+            embed.set_thumbnail(url=message.author.display_avatar.url)
+            embed.set_footer(text="Keep chatting to level up! 🍍")
+
+            # ─── LOGGING ───
+            # Queued: bursts within LEVEL_DIGEST_WINDOW go out as one digest
+            log_channel = bot.get_channel(settings.level_log_channel_id) if settings.level_log_channel_id else None
+            if log_channel:
+                line = f"{message.author.mention} → **Level {new_level}** · {title}{boost_text}"
+                bot.outbox.batch(log_channel, "level_up", (message.author.mention, embed, line), render_level_ups, LEVEL_DIGEST_WINDOW)
+            else:
+                # Fallback to current channel if log channel is missing
+                bot.outbox.send(message.channel, embed=embed, delete_after=10)
+
+    # --- LEVEL ROLE SYNC ---
+    async def resync_level_roles(self, guild):
+        # Gives every member all level roles up to their current level
+        await self.bot.xp_buffer.flush()
+        limiter = asyncio.Semaphore(ROLE_SYNC_CONCURRENCY)
+        updated = 0
+
+        async def apply(member, roles):
+            nonlocal updated
+            async with limiter:
+                try:
+                    await member.add_roles(*roles, reason="Level role resync")
+                    updated += 1
+                except discord.HTTPException as e:
+                    print(f"❌ Cannot add level roles to {member}: {e}")
+
+        jobs = []
+        for doc in await self.bot.store.xp_at_least(str(guild.id), 100):
+            member = guild.get_member(int(doc["user_id"]))
+            if not member:
+                continue
+            missing = [r for r in self.bot.level_roles.up_to(guild, doc["xp"] // 100) if r not in member.roles]
+            if missing:
+                jobs.append(apply(member, missing))
+        await asyncio.gather(*jobs)
+        return updated
+
+    @app_commands.command(name="level", description="Check your level and XP progress")
+    async def level(self, interaction: discord.Interaction, member: discord.Member = None):
+        target = member or interaction.user
+
+        # Served from the XP buffer (includes XP not yet flushed to storage)
+        xp = await self.bot.xp_buffer.get(member_key(interaction.guild_id, target.id))
+
+        # Server rank = members of this guild with more XP + 1 (a count on the guild_xp index).
+        # Other members' buffered XP counts once flushed (at most XP_FLUSH_INTERVAL later).
+        rank = await self.bot.store.xp_rank(str(interaction.guild_id), xp)
+
+        level = xp // 100
+        progress = xp % 100
+        bar = "🟦" * (progress // 10) + "⬛" * (10 - (progress // 10))
+
+        embed = discord.Embed(title=f"{target.display_name}'s Level", color=0x00f7ff)
+        embed.set_thumbnail(url=target.display_avatar.url)
+        embed.add_field(name="Level", value=f"**{level}**", inline=True)
+        embed.add_field(name="Total XP", value=f"{xp}", inline=True)
+        embed.add_field(name="Rank", value=f"#{rank}", inline=True)
+        embed.add_field(name="Progress", value=f"{bar} ({progress}/100)", inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="resync-roles", description="Admin: Give every member their missing level roles")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def resync_roles(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        updated = await self.resync_level_roles(interaction.guild)
+        await interaction.followup.send(f"🎖️ Level roles synced. Updated **{updated}** members.", ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(XP(bot))
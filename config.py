@@ -0,0 +1,56 @@
+# ─── CONFIGURATION ──────────────────────────────────────────
+# Deployment settings shared by the core bot and every cog. Read once at
+# import; a /reload of a cog does not re-read the environment.
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+TOKEN = os.getenv("DISCORD_TOKEN")
+# Key for hashing service OTPs. Set it explicitly: falling back to the bot
+# token means rotating the token invalidates OTPs of open jobs.
+OTP_SECRET = (os.getenv("OTP_SECRET") or TOKEN or "").encode()
+
+HOME_GUILD_ID = 1380731003655557192
+# Guilds the bot may stay in: comma-separated ids, or * for any guild
+ALLOWED_GUILD_IDS = os.getenv("ALLOWED_GUILD_IDS", str(HOME_GUILD_ID))
+ALLOWED_GUILDS = None if ALLOWED_GUILD_IDS.strip() == "*" else {
+    int(g) for g in ALLOWED_GUILD_IDS.split(",") if g.strip()
+}
+# Slash commands are only pushed to Discord when the tree changed (see
+# VaultBot.sync_commands); set FORCE_COMMAND_SYNC=1 to push anyway
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC") == "1"
+COMMAND_TREE_CONFIG = "command_tree"
+# Sharding: SHARD_COUNT shards in total, SHARD_IDS the ones this process runs
+# (unset = discord.py picks the count and runs them all here)
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(s) for s in os.getenv("SHARD_IDS", "").split(",") if s.strip()] or None
+if SHARD_IDS and not SHARD_COUNT:
+    raise RuntimeError("SHARD_IDS needs SHARD_COUNT")
+# Keep-alive / health check server. Shard processes on one host each need
+# their own port: without PORT, it is 8080 + this process's first shard id
+PORT = int(os.getenv("PORT") or 8080 + (SHARD_IDS[0] if SHARD_IDS else 0))
+# Home guild defaults below; other guilds are set up with /configure
+VOUCH_CHANNEL_ID = 1470447530725609533
+SERVICE_LOG_CHANNEL_ID = 1470490292166721687
+EMBED_COLOR = 0x00f7ff
+# Add this with your other IDs
+LEVEL_LOG_CHANNEL_ID = 1471099337537749032  # Replace with your actual channel ID
+CORE_TEAM = {
+    1380723814115315803: "The Atomic Vault",
+    1203199020189753354: "Sir Haruto",
+    1351156564739751956: "Ifad_plays",
+    1414709841112600579: "marloww",
+    1155023196907647006: "Crazy Captain"
+}
+GUILD_DEFAULTS = {
+    HOME_GUILD_ID: {
+        "vouch_channel_id": VOUCH_CHANNEL_ID,
+        "service_log_channel_id": SERVICE_LOG_CHANNEL_ID,
+        "level_log_channel_id": LEVEL_LOG_CHANNEL_ID,
+        "core_team": CORE_TEAM,
+    }
+}
+# --- STORAGE SETUP ---
+# Fetching the URL from Render's Environment Variables
+MONGO_URL = os.getenv("MONGO_URL")
@@ -0,0 +1,223 @@
+# ─── MONGO COMMAND MONITOR ──────────────────────────────────
+# Opt-in (MONGO_COMMAND_MONITORING=1) pymongo command listener. Records the
+# server round trip of every command per collection and operation, logs the
+# ones over MONGO_SLOW_MS to MONGO_SLOW_LOG (JSON lines) and, for slow find
+# and aggregate commands, runs one queryPlanner explain per query shape so
+# collection scans and missing indexes show up in /db-report.
+# pymongo calls the listener from motor's worker threads: state is behind a
+# lock and explains are handed to the event loop.
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from pymongo import monitoring
+
+import metrics
+
+MONGO_COMMAND_MONITORING = os.getenv("MONGO_COMMAND_MONITORING") == "1"
+SLOW_QUERY_MS = float(os.getenv("MONGO_SLOW_MS", "100"))
+SLOW_QUERY_LOG = os.getenv("MONGO_SLOW_LOG", "slow_queries.log")
+REPORT_WINDOW = 3600   # Seconds per stats window; the report covers the last two
+RECENT_SLOW = 50       # Slow commands kept for the report
+MAX_PLANS = 500        # Query shapes explained per window
+
+# Command fields kept for the explain (session, read preference etc. are dropped)
+EXPLAIN_FIELDS = {
+    "find": ("find", "filter", "sort", "projection", "hint", "skip", "limit", "collation"),
+    "aggregate": ("aggregate", "pipeline", "cursor", "hint", "collation", "allowDiskUse"),
+}
+
+
+def command_collection(name, command):
+    # Most commands name their collection in the first field; getMore doesn't
+    target = command.get("collection") if name == "getMore" else command.get(name)
+    return target if isinstance(target, str) else "(db)"
+
+
+def query_shape(value):
+    # Literal values become "?" so the same query with other ids shares a
+    # shape; field paths ("$xp") and operators are kept
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [query_shape(v) for v in value]
+        return items if any(isinstance(v, (dict, list)) for v in items) else ["?"]
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def plan_summary(explain):
+    # "FETCH ← IXSCAN(guild_xp)" for the first winning plan in the explain output
+    plan = _find(explain, "winningPlan")
+    if not isinstance(plan, dict):
+        return "no plan"
+    plan = plan.get("queryPlan", plan)  # Slot-based engine nests the plan
+    stages = []
+    while isinstance(plan, dict):
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage += f"({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " ← ".join(stages)
+
+
+def _find(doc, key):
+    if isinstance(doc, dict):
+        if key in doc:
+            return doc[key]
+        doc = list(doc.values())
+    if isinstance(doc, list):
+        for item in doc:
+            found = _find(item, key)
+            if found is not None:
+                return found
+    return None
+
+
+class OpStats:
+    __slots__ = ("count", "total_ms", "max_ms", "slow", "failed")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow = 0
+        self.failed = 0
+
+    def merge(self, other):
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.slow += other.slow
+        self.failed += other.failed
+
+
+class QueryMonitor(monitoring.CommandListener):
+    def __init__(self, slow_ms=SLOW_QUERY_MS, log_path=SLOW_QUERY_LOG, window=REPORT_WINDOW):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.window = window
+        self.stats = {}       # (collection, op) -> OpStats, current window
+        self.previous = {}    # Same for the window before
+        self.window_start = time.monotonic()
+        self.recent = deque(maxlen=RECENT_SLOW)
+        self.plans = {}       # shape key -> plan summary (None while explaining)
+        self._inflight = {}   # (connection, request id) -> (collection, op, explainable command)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._explain = None
+        self._explaining = set()
+
+    def bind(self, loop, explain):
+        # `explain(collection, command)` is a coroutine run on `loop`
+        self._loop = loop
+        self._explain = explain
+
+    # --- pymongo listener callbacks (any thread) ---
+    def started(self, event):
+        if event.command_name == "explain":
+            return  # Our own explains
+        name = event.command_name
+        fields = EXPLAIN_FIELDS.get(name)
+        command = {k: event.command[k] for k in fields if k in event.command} if fields else None
+        with self._lock:
+            self._inflight[(event.connection_id, event.request_id)] = (
+                command_collection(name, event.command), name, command
+            )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed):
+        with self._lock:
+            started = self._inflight.pop((event.connection_id, event.request_id), None)
+            if started is None:
+                return
+            collection, op, command = started
+            ms = event.duration_micros / 1000
+            self._roll()
+            stats = self.stats.get((collection, op))
+            if stats is None:
+                stats = self.stats[(collection, op)] = OpStats()
+            stats.count += 1
+            stats.total_ms += ms
+            stats.max_ms = max(stats.max_ms, ms)
+            stats.failed += failed
+            if ms < self.slow_ms:
+                return
+            stats.slow += 1
+            shape = dict(query_shape(command), **{op: collection}) if command else None
+            shape_key = json.dumps(shape, default=str) if shape else None
+            entry = {
+                "at": time.strftime("%Y-%m-%dT%H:%M:%S"), "collection": collection, "op": op,
+                "ms": round(ms, 1), "failed": failed, "shape": shape, "shape_key": shape_key
+            }
+            self.recent.append(entry)
+            explain = shape_key is not None and shape_key not in self.plans and len(self.plans) < MAX_PLANS
+            if explain:
+                self.plans[shape_key] = None
+        metrics.DB_SLOW_QUERIES.labels(collection, op).inc()
+        self._log({k: v for k, v in entry.items() if k != "shape_key"})
+        if explain and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._start_explain, shape_key, collection, op, command)
+
+    def _roll(self):
+        # Caller holds the lock. Plans are re-captured each window in case
+        # indexes changed.
+        elapsed = time.monotonic() - self.window_start
+        if elapsed < self.window:
+            return
+        self.previous = self.stats if elapsed < 2 * self.window else {}
+        self.stats = {}
+        self.plans = {}
+        self.window_start = time.monotonic()
+
+    # --- explain capture (event loop) ---
+    def _start_explain(self, shape_key, collection, op, command):
+        task = asyncio.ensure_future(self._capture(shape_key, collection, op, command))
+        self._explaining.add(task)
+        task.add_done_callback(self._explaining.discard)
+
+    async def _capture(self, shape_key, collection, op, command):
+        try:
+            summary = plan_summary(await self._explain(collection, command))
+        except Exception as e:
+            summary = f"explain failed: {e}"
+        with self._lock:
+            if shape_key in self.plans:
+                self.plans[shape_key] = summary
+        self._log({"at": time.strftime("%Y-%m-%dT%H:%M:%S"), "collection": collection,
+                   "op": op, "plan": summary, "shape": dict(query_shape(command), **{op: collection})})
+
+    def _log(self, record):
+        if not self.log_path:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write slow query log: {e}")
+
+    # --- report ---
+    def report(self, top=10):
+        # Hottest operations by total time over the last two windows, plus
+        # the most recent slow commands with their plans
+        with self._lock:
+            self._roll()
+            merged = {}
+            for source in (self.previous, self.stats):
+                for key, stats in source.items():
+                    merged.setdefault(key, OpStats()).merge(stats)
+            recent = list(self.recent)[-top:]
+            plans = dict(self.plans)
+        hot = sorted(merged.items(), key=lambda item: item[1].total_ms, reverse=True)[:top]
+        slow = [dict(entry, plan=plans.get(entry["shape_key"])) for entry in reversed(recent)]
+        return {"slow_ms": self.slow_ms, "window": self.window, "hot": hot, "slow": slow}
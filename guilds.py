@@ -0,0 +1,102 @@
+# ─── PER-GUILD SETTINGS ─────────────────────────────────────
+# Channels, core team and level titles for each community the bot serves.
+# Stored as a "<guild id>:settings" config document; guilds without one
+# fall back to DEFAULT_SETTINGS (the original Atomic Vault values for the
+# home guild, empty everywhere else).
+from storage import StorageUnavailable, guild_config
+
+DEFAULT_LEVEL_TITLES = {
+    1:  "Newbie Adventurer",
+    5:  "Sea Explorer",
+    10: "Fruit Hunter",
+    15: "Raid Participant",
+    20: "Awakened Grinder",
+    25: "Bounty Chaser",
+    30: "Sea Beast Slayer",
+    40: "Mirage Hunter",
+    50: "Legendary Pirate",
+    60: "God of the Seas",
+}
+
+
+class GuildSettings:
+    FIELDS = ("vouch_channel_id", "service_log_channel_id", "level_log_channel_id", "core_team", "level_titles")
+
+    def __init__(self, guild_id, vouch_channel_id=None, service_log_channel_id=None,
+                 level_log_channel_id=None, core_team=None, level_titles=None):
+        self.guild_id = guild_id
+        self.vouch_channel_id = vouch_channel_id
+        self.service_log_channel_id = service_log_channel_id
+        self.level_log_channel_id = level_log_channel_id
+        # JSON documents only have string keys
+        self.core_team = {int(k): v for k, v in (core_team or {}).items()}
+        self.level_titles = {int(k): v for k, v in (level_titles or DEFAULT_LEVEL_TITLES).items()}
+
+    @classmethod
+    def from_doc(cls, guild_id, doc, defaults=None):
+        fields = dict(defaults or {})
+        fields.update({k: doc[k] for k in cls.FIELDS if doc.get(k) is not None})
+        return cls(guild_id, **fields)
+
+    def to_doc(self):
+        return {
+            "vouch_channel_id": self.vouch_channel_id,
+            "service_log_channel_id": self.service_log_channel_id,
+            "level_log_channel_id": self.level_log_channel_id,
+            "core_team": {str(k): v for k, v in self.core_team.items()},
+            "level_titles": {str(k): v for k, v in self.level_titles.items()},
+        }
+
+    def is_core(self, user_id):
+        return user_id in self.core_team
+
+    def level_title(self, level):
+        return self.level_titles.get(level, "Adventurer")
+
+    def level_role_name(self, level):
+        return f"Level {level} - {self.level_title(level)}"
+
+
+class GuildSettingsCache:
+    # Settings are read on every message, so they are loaded once per guild
+    # (on_ready / on_guild_join) and served from memory afterwards.
+    def __init__(self, store, defaults):
+        self.store = store
+        self.defaults = defaults  # guild id -> default field dict
+        self.guilds = {}
+        self.unloaded = set()  # Guilds whose load hit an outage, on defaults meanwhile
+
+    def get(self, guild_id):
+        settings = self.guilds.get(guild_id)
+        if settings is None:
+            settings = self.guilds[guild_id] = GuildSettings(guild_id, **self.defaults.get(guild_id, {}))
+        return settings
+
+    async def load(self, guild_ids):
+        # One round trip for every guild this process serves
+        keys = {guild_config(g, "settings"): g for g in guild_ids}
+        try:
+            docs = await self.store.get_configs(list(keys)) if keys else {}
+        except StorageUnavailable:
+            self.unloaded.update(guild_ids)
+            raise
+        self.unloaded.difference_update(guild_ids)
+        for key, guild_id in keys.items():
+            self.guilds[guild_id] = GuildSettings.from_doc(
+                guild_id, docs.get(key, {}), self.defaults.get(guild_id)
+            )
+
+    async def update(self, guild_id, **fields):
+        if guild_id in self.unloaded:
+            # Saving the defaults would overwrite the stored settings
+            await self.load([guild_id])
+        settings = self.get(guild_id)
+        for name, value in fields.items():
+            setattr(settings, name, value)
+        await self.store.set_config(guild_config(guild_id, "settings"), settings.to_doc())
+        return settings
+
+
+def is_core(interaction):
+    # Core team check for slash commands, against the interaction's guild
+    return interaction.client.settings.get(interaction.guild_id).is_core(interaction.user.id)
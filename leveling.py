@@ -0,0 +1,263 @@
+# ─── LEVELING STATE ─────────────────────────────────────────
+# Write-behind XP buffer, leaderboard cache and level role index. These
+# live on the bot (bot.xp_buffer, bot.level_roles), outside the reloadable
+# cogs, so unsaved XP and caches survive a /reload.
+import asyncio
+import os
+import re
+import time
+from array import array
+
+from storage import StorageUnavailable, split_key
+
+XP_FLUSH_INTERVAL = 10     # Seconds between background flushes
+XP_FLUSH_THRESHOLD = 100   # Flush early once this many users have unsaved XP
+LEADERBOARD_SIZE = 10
+
+# Message XP rate limit per member: up to XP_BURST awards back to back, then
+# one per XP_COOLDOWN seconds. XP_COOLDOWN_SECONDS=0 turns it off.
+XP_COOLDOWN = float(os.getenv("XP_COOLDOWN_SECONDS", "30"))
+XP_BURST = int(os.getenv("XP_BURST", "2"))
+XP_PRUNE_INTERVAL = 60     # Seconds between sweeps for refilled buckets
+
+
+class TopNCache:
+    # Holds the last top-N leaderboard query. A write only invalidates it when
+    # the new score would land on the board (at or above the current Nth score).
+    def __init__(self, size, field):
+        self.size = size
+        self.field = field
+        self.rows = None
+
+    def observe(self, score):
+        if self.rows is None:
+            return
+        if len(self.rows) < self.size or score >= self.rows[-1][self.field]:
+            self.rows = None
+
+
+class XPThrottle:
+    # Token bucket per (guild id, user id). Buckets are slots in two parallel
+    # arrays (tokens, last refill); a slot whose bucket has refilled is no
+    # different from a member never seen, so prune() frees it for reuse and
+    # trims the arrays. A suppressed message costs one dict lookup.
+    def __init__(self, cooldown=XP_COOLDOWN, burst=XP_BURST, prune_interval=XP_PRUNE_INTERVAL):
+        self.cooldown = cooldown
+        self.burst = burst
+        self.prune_interval = prune_interval
+        self.slots = {}         # (guild id, user id) -> slot
+        self.owners = []        # slot -> (guild id, user id), None when free
+        self.tokens = array("d")
+        self.stamps = array("d")
+        self.free = []          # Free slots, lowest last
+        self._next_prune = time.monotonic() + prune_interval
+
+    def __len__(self):
+        return len(self.slots)
+
+    def allow(self, guild_id, user_id, now=None):
+        if self.cooldown <= 0:
+            return True
+        now = time.monotonic() if now is None else now
+        if now >= self._next_prune:
+            self.prune(now)
+        slot = self.slots.get((guild_id, user_id))
+        if slot is None:
+            slot = self._claim((guild_id, user_id))
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, self.tokens[slot] + (now - self.stamps[slot]) / self.cooldown)
+        self.stamps[slot] = now
+        if tokens < 1:
+            self.tokens[slot] = tokens
+            return False
+        self.tokens[slot] = tokens - 1
+        return True
+
+    def _claim(self, key):
+        if self.free:
+            slot = self.free.pop()
+            self.owners[slot] = key
+        else:
+            slot = len(self.owners)
+            self.owners.append(key)
+            self.tokens.append(0.0)
+            self.stamps.append(0.0)
+        self.slots[key] = slot
+        return slot
+
+    def prune(self, now=None):
+        now = time.monotonic() if now is None else now
+        tokens, stamps, owners = self.tokens, self.stamps, self.owners
+        pruned = 0
+        for slot, key in enumerate(owners):
+            if key is not None and tokens[slot] + (now - stamps[slot]) / self.cooldown >= self.burst:
+                del self.slots[key]
+                owners[slot] = None
+                pruned += 1
+        # Drop free slots at the end so the arrays shrink after a burst of members
+        size = len(owners)
+        while size and owners[size - 1] is None:
+            size -= 1
+        del owners[size:], tokens[size:], stamps[size:]
+        self.free = [slot for slot in range(size - 1, -1, -1) if owners[slot] is None]
+        self._next_prune = now + self.prune_interval
+        return pruned
+
+
+class XPBuffer:
+    # Collects XP per member (member_key) in memory and writes it to storage as one bulk $inc.
+    # `totals` is the cached XP (database value + unsaved XP), so level-ups are
+    # detected instantly without reading the database on every message. It
+    # only holds members with XP in flight: once a flush lands, the rest go
+    # back to the profile cache.
+    def __init__(self, store, profiles, flush_threshold=XP_FLUSH_THRESHOLD):
+        self.store = store
+        self.profiles = profiles
+        self.flush_threshold = flush_threshold
+        self.totals = {}
+        self.pending = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None  # Early flush started by add()
+        self.tops = {}  # guild id -> TopNCache
+
+    def top(self, guild_id):
+        cache = self.tops.get(guild_id)
+        if cache is None:
+            cache = self.tops[guild_id] = TopNCache(LEADERBOARD_SIZE, "xp")
+        return cache
+
+    def overlay_top(self, guild_id, rows, limit):
+        # Stored top rows with the buffered XP laid over them: members with
+        # pending XP are ranked by their buffered total, so a board is exact
+        # without flushing first
+        board = {row["user_id"]: row for row in rows}
+        for key in self.pending:
+            key_guild, user_id = split_key(key)
+            if key_guild == guild_id and key in self.totals:
+                board[user_id] = {"_id": key, "user_id": user_id, "xp": self.totals[key]}
+        return sorted(board.values(), key=lambda row: row["xp"], reverse=True)[:limit]
+
+    async def get(self, key):
+        if key in self.totals:
+            return self.totals[key]
+        # First lookup goes through the profile cache (one read, shared with
+        # /stats; concurrent messages share it too)
+        xp = (await self.profiles.get(key))["xp"]
+        # Only add() caches totals (a /level lookup would never be evicted);
+        # one it made during the read wins. XP gained while the database was
+        # unreachable is still pending.
+        return self.totals.get(key, xp + self.pending.get(key, 0))
+
+    async def add(self, key, amount):
+        try:
+            old_xp = await self.get(key)
+        except StorageUnavailable:
+            # Database down and no cached total: keep the XP, skip level checks
+            self.pending[key] = self.pending.get(key, 0) + amount
+            return None, None
+        new_xp = old_xp + amount
+        self.totals[key] = new_xp
+        self.profiles.update(key, xp=new_xp)
+        self.pending[key] = self.pending.get(key, 0) + amount
+        self.top(split_key(key)[0]).observe(new_xp)
+
+        if len(self.pending) >= self.flush_threshold and not self._flush_lock.locked():
+            self._flush_task = asyncio.ensure_future(self.flush())
+            self._flush_task.add_done_callback(self._flush_done)
+        return old_xp, new_xp
+
+    @staticmethod
+    def _flush_done(task):
+        # flush() handles storage errors itself; anything else is a bug
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Early XP flush crashed: {task.exception()!r}")
+
+    async def close(self):
+        # Lets an early flush finish, then writes whatever is left
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        return await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+            batch, self.pending = self.pending, {}
+            try:
+                failed = await self.store.add_xp(batch)
+            except Exception as e:
+                self._requeue(batch.items())
+                print(f"⚠️ XP flush failed, retrying next flush: {e}")
+                return 0
+            if failed:
+                self._requeue((key, batch[key]) for key in failed)
+                print(f"⚠️ XP flush: {len(failed)}/{len(batch)} writes failed, retrying next flush.")
+            self._evict(batch)
+            return len(batch) - len(failed)
+
+    def _evict(self, keys):
+        # Saved members with no new XP since the batch was taken; the write
+        # through also drops a profile read that may predate the flush.
+        # XP buffered during an outage has no total, so its profile is reread.
+        for key in keys:
+            if key in self.pending:
+                continue
+            if key in self.totals:
+                self.profiles.update(key, xp=self.totals.pop(key))
+            else:
+                self.profiles.invalidate(key)
+
+    def _requeue(self, items):
+        for key, inc in items:
+            self.pending[key] = self.pending.get(key, 0) + inc
+
+
+# Level titles are per guild (GuildSettings.level_titles)
+LEVEL_ROLE_PATTERN = re.compile(r"Level (\d+) - .+")
+ROLE_SYNC_CONCURRENCY = 5  # Parallel add_roles calls during /resync-roles
+
+
+class LevelRoleIndex:
+    # guild id -> {level: role id}. Built from guild.roles once in on_ready and
+    # kept current by the role create/update/delete events, so level-ups
+    # never scan the guild's role list.
+    def __init__(self, settings):
+        self.settings = settings
+        self.guilds = {}
+
+    def build(self, guild):
+        self.guilds[guild.id] = {}
+        for role in guild.roles:
+            level = self._level_of(role)
+            if level is not None:
+                self.guilds[guild.id].setdefault(level, role.id)
+
+    def observe(self, role):
+        self.forget(role)
+        level = self._level_of(role)
+        if level is not None:
+            self.guilds.setdefault(role.guild.id, {})[level] = role.id
+
+    def forget(self, role):
+        levels = self.guilds.get(role.guild.id, {})
+        for level, role_id in list(levels.items()):
+            if role_id == role.id:
+                del levels[level]
+
+    def get(self, guild, level):
+        role_id = self.guilds.get(guild.id, {}).get(level)
+        return guild.get_role(role_id) if role_id else None
+
+    def up_to(self, guild, level):
+        levels = self.guilds.get(guild.id, {})
+        roles = (guild.get_role(rid) for lvl, rid in levels.items() if lvl <= level)
+        return [r for r in roles if r]
+
+    def _level_of(self, role):
+        # Only exact "Level N - <title for N>" names count as level roles
+        match = LEVEL_ROLE_PATTERN.fullmatch(role.name)
+        if match and role.name == self.settings.get(role.guild.id).level_role_name(int(match.group(1))):
+            return int(match.group(1))
+        return None
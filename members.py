@@ -0,0 +1,71 @@
+# ─── MEMBER NAME RESOLVER ───────────────────────────────────
+# Turns stored user ids into display names for leaderboards, the pulse and
+# service pages. Lookups go gateway member cache → local LRU → one batched
+# query_members request for whatever is still missing (100 ids per request,
+# so a leaderboard render costs at most one extra call). Names are cached
+# per guild because nicknames are per guild.
+import asyncio
+import time
+from collections import OrderedDict
+
+import discord
+
+import metrics
+
+NAME_CACHE_SIZE = 5000   # (guild, user) names kept
+NAME_CACHE_TTL = 600     # Seconds before a cached name is looked up again
+QUERY_CHUNK = 100        # Gateway limit for user_ids per query_members request
+
+
+class MemberResolver:
+    def __init__(self, bot, max_size=NAME_CACHE_SIZE, ttl=NAME_CACHE_TTL):
+        self.bot = bot
+        self.max_size = max_size
+        self.ttl = ttl
+        self.names = OrderedDict()  # (guild id, user id) -> (name, expires at)
+
+    async def names_for(self, guild, user_ids):
+        # {user id: display name} for every id given (ints or strings)
+        ids = [int(uid) for uid in user_ids]
+        found, missing = {}, []
+        now = time.monotonic()
+        for uid in ids:
+            member = guild.get_member(uid)
+            if member is not None:
+                found[uid] = member.display_name
+                metrics.MEMBER_LOOKUPS.labels("gateway").inc()
+                continue
+            cached = self.names.get((guild.id, uid))
+            if cached and cached[1] > now:
+                self.names.move_to_end((guild.id, uid))
+                found[uid] = cached[0]
+                metrics.MEMBER_LOOKUPS.labels("cache").inc()
+            else:
+                missing.append(uid)
+
+        for i in range(0, len(missing), QUERY_CHUNK):
+            found.update(await self._query(guild, missing[i:i + QUERY_CHUNK]))
+        return found
+
+    async def _query(self, guild, user_ids):
+        try:
+            members = await guild.query_members(user_ids=user_ids, cache=False)
+        except (asyncio.TimeoutError, discord.ClientException) as e:
+            print(f"⚠️ Member lookup failed in {guild.name}: {e}")
+            members = []
+        names = {m.id: m.display_name for m in members}
+        metrics.MEMBER_LOOKUPS.labels("fetched").inc(len(names))
+        for uid in user_ids:
+            if uid not in names:
+                # Left the server: fall back to the cached user, if any
+                user = self.bot.get_user(uid)
+                names[uid] = user.display_name if user else f"User {uid}"
+                metrics.MEMBER_LOOKUPS.labels("missing").inc()
+            self._remember(guild.id, uid, names[uid])
+        return names
+
+    def _remember(self, guild_id, user_id, name):
+        self.names[(guild_id, user_id)] = (name, time.monotonic() + self.ttl)
+        self.names.move_to_end((guild_id, user_id))
+        while len(self.names) > self.max_size:
+            self.names.popitem(last=False)
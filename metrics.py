@@ -0,0 +1,239 @@
+# ─── METRICS ────────────────────────────────────────────────
+# Minimal Prometheus-style instrumentation. Recording is a dict lookup plus
+# an add (a bisect for histograms), so it is cheap enough for on_message.
+# render() produces the text exposition format served on /metrics.
+import threading
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self.metrics.append(metric)
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics):
+            lines.append(f"# HELP {metric.name} {metric.doc}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, doc, labels=(), registry=REGISTRY):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+        self._children = {}
+        if not self.label_names:
+            self._children[()] = self._new_child()
+        registry.register(self)
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            labels = list(zip(self.label_names, key))
+            yield from child.samples(labels)
+
+    # Unlabelled metrics proxy straight to their only child
+    def __getattr__(self, name):
+        if name.startswith("_") or self.label_names:
+            raise AttributeError(name)
+        return getattr(self._children[()], name)
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self, labels):
+        yield "_total", labels, self.value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+
+class _GaugeValue:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        # Read lazily at scrape time (e.g. the gateway latency)
+        self.function = function
+
+    def samples(self, labels):
+        value = self.value
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception:
+                return
+        yield "", labels, value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeValue()
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+    def samples(self, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            yield "_bucket", labels + [("le", _format_value(float(bound)))], cumulative
+        yield "_sum", labels, self.sum
+        yield "_count", labels, self.count
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, labels=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(buckets)
+        super().__init__(name, doc, labels, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+def render():
+    return REGISTRY.render()
+
+
+# ─── BOT METRICS ────────────────────────────────────────────
+COMMAND_LATENCY = Histogram(
+    "vault_command_seconds", "Slash command handling time.", ["command", "status"]
+)
+MESSAGE_LATENCY = Histogram(
+    "vault_on_message_seconds", "on_message handling time by listener (xp, afk).", ["listener"]
+)
+DB_OPS = Counter(
+    "vault_db_operations", "Database operations by collection and operation.", ["collection", "op", "status"]
+)
+DB_LATENCY = Histogram(
+    "vault_db_operation_seconds", "Database operation latency by collection and operation.", ["collection", "op"]
+)
+GATEWAY_LATENCY = Gauge(
+    "vault_gateway_latency_seconds", "Discord gateway heartbeat latency."
+)
+LOOP_LAG = Histogram(
+    "vault_event_loop_lag_seconds", "How late the event loop woke a sleeping probe task.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+PULSE_REFRESH = Histogram(
+    "vault_pulse_refresh_seconds", "Pulse dashboard render + edit time.", ["status"]
+)
+OUTBOX_MESSAGES = Counter(
+    "vault_outbox_messages", "Outbox deliveries by result (sent, retried, failed, dropped).", ["status"]
+)
+OUTBOX_QUEUED = Gauge(
+    "vault_outbox_queued", "Messages waiting in the outbox."
+)
+DB_CIRCUIT_OPEN = Gauge(
+    "vault_db_circuit_open", "1 while the database circuit breaker is open or probing."
+)
+JOURNAL_PENDING = Gauge(
+    "vault_db_journal_pending", "Writes journaled during a database outage, not yet replayed."
+)
+MEMBER_LOOKUPS = Counter(
+    "vault_member_lookups", "Member name lookups by source (gateway, cache, fetched, missing).", ["source"]
+)
+STARTUP_PHASE = Gauge(
+    "vault_startup_phase_seconds", "Duration of each phase of the last startup.", ["phase"]
+)
+PROFILE_LOOKUPS = Counter(
+    "vault_profile_lookups", "Profile cache lookups by result (hit, miss).", ["result"]
+)
+DB_SLOW_QUERIES = Counter(
+    "vault_db_slow_queries", "Mongo commands over MONGO_SLOW_MS (command monitoring only).", ["collection", "op"]
+)
+XP_SUPPRESSED = Counter(
+    "vault_xp_suppressed", "Messages that earned no XP because of the per-member XP cooldown."
+)
+XP_THROTTLE_TRACKED = Gauge(
+    "vault_xp_throttle_members", "Members with a partly drained XP token bucket."
+)
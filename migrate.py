@@ -0,0 +1,187 @@
+# ─── JSON → DATABASE MIGRATION ──────────────────────────────
+# Imports the legacy xp.json / vouches.json / service_stats.json files into
+# the configured storage backend. Run it once per deploy instead of on boot:
+#
+#     python migrate.py --guild ID [--dir PATH] [--batch-size N] [--rekey]
+#
+# The legacy files (and databases written before per-guild partitioning)
+# belong to a single guild, given by --guild or LEGACY_GUILD_ID. --rekey moves
+# documents still keyed by bare user ids into that guild's partition.
+#
+# Files are streamed and written in batched bulk upserts, all three at once.
+# Progress is checkpointed in the bot_config collection after every batch,
+# so a crashed run resumes where it stopped instead of starting over.
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from storage import open_storage
+
+FILES_TO_MIGRATE = {
+    "xp.json": "xp",
+    "vouches.json": "vouches",
+    "service_stats.json": "service_stats"
+}
+BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+NUMBER_CHARS = frozenset("0123456789+-.eE")  # Characters that can extend a JSON number
+
+
+def iter_json_object(path, chunk_size=CHUNK_SIZE):
+    # Yields (key, value) pairs of a top-level JSON object without loading
+    # the whole file. Values are decoded one at a time with raw_decode.
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def read_more():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf, pos = buf[pos:] + chunk, 0
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos].isspace():
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                read_more()
+
+        def expect(chars):
+            nonlocal pos
+            skip_ws()
+            if pos >= len(buf) or buf[pos] not in chars:
+                raise ValueError(f"{path}: expected one of {chars!r} at offset {pos}")
+            pos += 1
+            return buf[pos - 1]
+
+        def decode():
+            nonlocal pos
+            skip_ws()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # A number may continue in the next chunk ("1." + "5e3"): only
+                    # accept it once a character that can't extend it follows
+                    number = type(value) in (int, float)
+                    if eof or not number or (end < len(buf) and buf[end] not in NUMBER_CHARS):
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                read_more()
+
+        expect("{")
+        skip_ws()
+        if pos < len(buf) and buf[pos] == "}":
+            return
+        while True:
+            key = decode()
+            expect(":")
+            yield key, decode()
+            if expect(",}") == "}":
+                return
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def archive(path):
+    # Renamed files are no longer picked up by the bot's startup check
+    os.rename(path, os.path.join(os.path.dirname(path), f"migrated_{os.path.basename(path)}"))
+
+
+async def migrate_file(store, path, kind, batch_size, guild_id):
+    filename = os.path.basename(path)
+    checkpoint_key = f"migration:{kind}"
+    digest = file_digest(path)
+
+    # Resume from the checkpoint only if it belongs to this exact file
+    checkpoint = await store.get_config(checkpoint_key) or {}
+    if checkpoint.get("sha256") != digest:
+        checkpoint = {"sha256": digest, "done": 0, "complete": False}
+    if checkpoint.get("complete"):
+        # A crash between the final checkpoint and the rename leaves the file behind
+        archive(path)
+        print(f"⏭️ {filename} already migrated, skipping.")
+        return 0
+
+    skip = checkpoint["done"]
+    if skip:
+        print(f"↩️ Resuming {filename} after {skip} entries.")
+
+    done, batch = 0, []
+    for item in iter_json_object(path):
+        done += 1
+        if done <= skip:
+            continue
+        batch.append(item)
+        if len(batch) >= batch_size:
+            await store.import_counts(kind, guild_id, batch)
+            batch = []
+            await store.set_config(checkpoint_key, {"sha256": digest, "done": done, "complete": False})
+    if batch:
+        await store.import_counts(kind, guild_id, batch)
+    await store.set_config(checkpoint_key, {"sha256": digest, "done": done, "complete": True})
+
+    if kind == "vouches":
+        await store.rebuild_vouch_stats(guild_id)
+    archive(path)
+    print(f"✅ SUCCESS: {filename} migrated ({done - skip} entries).")
+    return done - skip
+
+
+async def migrate(directory=".", batch_size=BATCH_SIZE, store=None, guild_id=None, rekey=False):
+    own_store = store is None
+    store = store or open_storage()
+    if rekey:
+        moved = await store.rekey_legacy(guild_id)
+        print(f"🔑 Re-keyed {moved} legacy documents into guild {guild_id}.")
+    jobs = {
+        filename: migrate_file(store, os.path.join(directory, filename), kind, batch_size, guild_id)
+        for filename, kind in FILES_TO_MIGRATE.items()
+        if os.path.exists(os.path.join(directory, filename))
+    }
+    if not jobs:
+        print("📦 Nothing to migrate.")
+    results = await asyncio.gather(*jobs.values(), return_exceptions=True)
+    failed = False
+    for filename, result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            failed = True
+            print(f"❌ Error migrating {filename}: {result}")
+    if own_store:
+        await store.close()
+    return not failed
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Migrate legacy Atomic Vault JSON files into storage.")
+    parser.add_argument("--dir", default=".", help="Directory containing the JSON files")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Upserts per bulk write")
+    parser.add_argument("--guild", default=os.getenv("LEGACY_GUILD_ID"), help="Guild the legacy data belongs to")
+    parser.add_argument("--rekey", action="store_true", help="Move pre-partitioning documents into --guild first")
+    args = parser.parse_args()
+    if not args.guild:
+        parser.error("--guild (or LEGACY_GUILD_ID) is required")
+    ok = asyncio.run(migrate(args.dir, args.batch_size, guild_id=args.guild, rekey=args.rekey))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
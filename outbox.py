@@ -0,0 +1,107 @@
+# ─── OUTBOX ─────────────────────────────────────────────────
+# Background delivery for log channel posts and announcements, so handlers
+# answer the interaction first and never wait on a channel send.
+#
+# Every channel has its own FIFO queue drained by one worker task, so a
+# slow or rate-limited channel never holds up the others. With a single
+# send in flight per channel the channel's own rate-limit bucket is never
+# raced; discord.py waits out any 429 it still gets. 5xx and network errors
+# are retried with exponential backoff. batch() merges bursts (e.g.
+# several level-ups) into one message per time window.
+import asyncio
+from collections import deque
+
+import aiohttp
+import discord
+
+import metrics
+
+OUTBOX_MAX_QUEUE = 200     # Per channel; the oldest message is dropped beyond this
+OUTBOX_RETRIES = 3
+OUTBOX_BACKOFF = 1.0       # Seconds before the first retry, doubled each time
+OUTBOX_DRAIN_TIMEOUT = 5.0 # How long close() waits for queued messages
+
+
+class Outbox:
+    def __init__(self, max_queue=OUTBOX_MAX_QUEUE, retries=OUTBOX_RETRIES, backoff=OUTBOX_BACKOFF):
+        self.max_queue = max_queue
+        self.retries = retries
+        self.backoff = backoff
+        self.queues = {}   # channel id -> deque of (channel, send kwargs)
+        self.workers = {}  # channel id -> worker task
+        self.batches = {}  # (channel id, kind) -> (channel, entries, render, timer)
+
+    def queued(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def send(self, channel, **kwargs):
+        # Never blocks: the message is queued and the worker is started if idle
+        queue = self.queues.setdefault(channel.id, deque())
+        if len(queue) >= self.max_queue:
+            queue.popleft()
+            metrics.OUTBOX_MESSAGES.labels("dropped").inc()
+        queue.append((channel, kwargs))
+        if channel.id not in self.workers:
+            self.workers[channel.id] = asyncio.ensure_future(self._drain_channel(channel.id))
+
+    def batch(self, channel, kind, entry, render, window):
+        # Collects entries for `window` seconds, then queues render(entries),
+        # a list of send kwargs
+        key = (channel.id, kind)
+        pending = self.batches.get(key)
+        if pending is None:
+            timer = asyncio.get_running_loop().call_later(window, self._flush_batch, key)
+            pending = self.batches[key] = (channel, [], render, timer)
+        pending[1].append(entry)
+
+    def _flush_batch(self, key):
+        pending = self.batches.pop(key, None)
+        if pending is None:
+            return
+        channel, entries, render, timer = pending
+        timer.cancel()
+        for kwargs in render(entries):
+            self.send(channel, **kwargs)
+
+    async def _drain_channel(self, channel_id):
+        queue = self.queues[channel_id]
+        try:
+            while queue:
+                channel, kwargs = queue.popleft()
+                await self._deliver(channel, kwargs)
+        finally:
+            # No await between the empty check and here, so nothing can be
+            # queued without a worker
+            self.workers.pop(channel_id, None)
+            if not queue:
+                self.queues.pop(channel_id, None)
+
+    async def _deliver(self, channel, kwargs):
+        for attempt in range(self.retries + 1):
+            try:
+                await channel.send(**kwargs)
+                metrics.OUTBOX_MESSAGES.labels("sent").inc()
+                return
+            except discord.HTTPException as e:
+                # 4xx (missing access, deleted channel, bad payload) won't succeed on retry
+                if e.status < 500 or attempt == self.retries:
+                    return self._failed(channel, e)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    return self._failed(channel, e)
+            metrics.OUTBOX_MESSAGES.labels("retried").inc()
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    def _failed(self, channel, error):
+        metrics.OUTBOX_MESSAGES.labels("failed").inc()
+        print(f"❌ Outbox: could not post in #{getattr(channel, 'name', channel.id)}: {error}")
+
+    async def drain(self, timeout=OUTBOX_DRAIN_TIMEOUT):
+        # Sends open batches right away and waits for the queues to empty
+        for key in list(self.batches):
+            self._flush_batch(key)
+        workers = list(self.workers.values())
+        if workers:
+            _, pending = await asyncio.wait(workers, timeout=timeout)
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,191 @@
+# ─── SAMPLING PROFILER ──────────────────────────────────────
+# /profile runs this for a few seconds. A background thread wakes every
+# PROFILE_INTERVAL_MS and records, as collapsed stacks (flamegraph format):
+# - the event loop thread's stack, attributed to the task running on it
+#   ("[cpu]"), or "[idle]" while the loop waits in the selector
+# - every suspended task's coroutine chain down to what it awaits ("[await]"),
+#   so time spent waiting on Mongo, Discord HTTP or role edits shows up
+#   under the handler that awaited it
+# Nothing is installed while no profile is running.
+import asyncio
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+SUMMARY_ROWS = 8
+
+
+def coroutine_frames(coro):
+    # Outermost first; stops at the first awaitable that isn't a coroutine
+    # (a Future, usually)
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+def thread_frames(frame):
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+@functools.lru_cache(maxsize=1024)
+def project_label(label):
+    # Labels carry paths relative to the project for its own files
+    path = label.rsplit(" (", 1)[-1].rsplit(":", 1)[0]
+    return os.path.isfile(os.path.join(PROJECT_DIR, path))
+
+
+class SamplingProfiler:
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS, out_dir=PROFILE_DIR):
+        self.interval = interval_ms / 1000
+        self.out_dir = out_dir
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._claimed = False
+
+    @property
+    def running(self):
+        return self._claimed or self._thread is not None
+
+    @contextmanager
+    def claim(self):
+        # Entered by the caller before its first await, so a second caller
+        # that checked `running` in the meantime can't start one too
+        if self.running:
+            raise RuntimeError("A profile is already running")
+        self._claimed = True
+        try:
+            yield
+        finally:
+            self._claimed = False
+
+    async def run(self, seconds):
+        # Samples the calling loop for `seconds`; returns (path, summary)
+        loop = asyncio.get_running_loop()
+        stacks = Counter()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample_loop, args=(loop, threading.get_ident(), stacks),
+            name="vault-profiler", daemon=True
+        )
+        started = time.perf_counter()
+        self._thread.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self._stop.set()
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+            self._labels.clear()
+        elapsed = time.perf_counter() - started
+        return await asyncio.to_thread(self._write, stacks), self.summarize(stacks, elapsed)
+
+    # --- sampler thread ---
+    def _sample_loop(self, loop, loop_thread, stacks):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample(loop, loop_thread, stacks)
+            except Exception as e:
+                # Tasks and frames change under us; a torn sample is skipped
+                stacks[f"[profiler];{type(e).__name__}"] += 1
+
+    def _sample(self, loop, loop_thread, stacks):
+        running = None
+        for task in asyncio.all_tasks(loop):
+            coro = task.get_coro()
+            if getattr(coro, "cr_running", False):
+                running = task
+                continue
+            frames = coroutine_frames(coro)
+            if frames:
+                stacks[self._collapse(task, frames, "[await]")] += 1
+
+        frames = thread_frames(sys._current_frames().get(loop_thread))
+        if running is not None and running.get_coro().cr_frame in frames:
+            root = frames.index(running.get_coro().cr_frame)
+            stacks[self._collapse(running, frames[root:], "[cpu]")] += 1
+        elif frames and frames[-1].f_code.co_filename.endswith("selectors.py"):
+            stacks["[idle]"] += 1
+        else:
+            # Plain callbacks (protocol data, call_soon): frames after Handle._run
+            runs = [i for i, f in enumerate(frames) if f.f_code.co_name == "_run" and f.f_code.co_filename.endswith("events.py")]
+            if runs:
+                stacks[self._collapse(None, frames[runs[-1] + 1:], "[cpu]")] += 1
+            else:
+                stacks["[loop]"] += 1  # Scheduler bookkeeping between callbacks
+
+    def _collapse(self, task, frames, state):
+        root = task.get_name() if task is not None else "[callback]"
+        if root.startswith("Task-"):
+            root = "Task"  # Unnamed tasks: the stack says what they are
+        return ";".join([root, *(self._label(f) for f in frames), state])
+
+    def _label(self, frame):
+        key = (frame.f_code, frame.f_lineno)
+        label = self._labels.get(key)
+        if label is None:
+            code = frame.f_code
+            path = code.co_filename
+            if path.startswith(PROJECT_DIR):
+                path = os.path.relpath(path, PROJECT_DIR)
+            else:
+                path = "/".join(path.split(os.sep)[-2:])
+            # ";" separates frames in the collapsed format
+            label = self._labels[key] = f"{code.co_qualname} ({path}:{frame.f_lineno})".replace(";", ",")
+        return label
+
+    # --- output ---
+    def _write(self, stacks):
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}.collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    @staticmethod
+    def summarize(stacks, elapsed):
+        # The loop thread is sampled once per tick, so ticks give seconds per
+        # sample. Per handler (outermost frame from this project, else the
+        # task name): seconds on the CPU and seconds spent awaiting (summed
+        # over its tasks); plus the hottest CPU frames.
+        ticks = sum(n for stack, n in stacks.items() if not stack.endswith("[await]")) or 1
+        per_sample = elapsed / ticks
+        handlers, cpu_leaves = {}, Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(";")
+            state = frames[-1]
+            if state not in ("[cpu]", "[await]"):
+                continue
+            ours = [f for f in frames[1:-1] if project_label(f)]
+            handler = ours[0].split(" (")[0] if ours else frames[0]
+            handlers.setdefault(handler, Counter())[state] += count
+            if state == "[cpu]" and len(frames) > 2:
+                cpu_leaves[frames[-2]] += count
+        rows = sorted(handlers.items(), key=lambda item: (item[1]["[cpu]"], item[1]["[await]"]), reverse=True)
+        return {
+            "seconds": elapsed,
+            "ticks": ticks,
+            "idle": stacks.get("[idle]", 0) / ticks,
+            "handlers": [
+                (name, row["[cpu]"] * per_sample, row["[await]"] * per_sample) for name, row in rows[:SUMMARY_ROWS]
+            ],
+            "cpu": [(frame, count / ticks) for frame, count in cpu_leaves.most_common(SUMMARY_ROWS)],
+        }
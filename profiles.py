@@ -0,0 +1,68 @@
+# ─── PROFILE CACHE ──────────────────────────────────────────
+# XP, vouch count and completed jobs per member, loaded with one
+# store.get_profile read and kept in a bounded LRU with a TTL. /stats,
+# /level and the first XP lookup on_message does for a member share it.
+# The bot's own writes update cached entries in place (XP from the buffer,
+# vouch and job counts from the write's return value), so a cached profile
+# is never staler than the TTL.
+import asyncio
+import time
+from collections import OrderedDict
+
+import metrics
+
+PROFILE_CACHE_SIZE = 5000  # Members kept
+PROFILE_CACHE_TTL = 300    # Seconds before a cached profile is read again
+
+
+class ProfileCache:
+    def __init__(self, store, max_size=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL):
+        self.store = store
+        self.max_size = max_size
+        self.ttl = ttl
+        self.profiles = OrderedDict()  # member key -> (profile, expires at)
+        self._loading = {}
+
+    async def get(self, key):
+        cached = self.profiles.get(key)
+        if cached and cached[1] > time.monotonic():
+            self.profiles.move_to_end(key)
+            metrics.PROFILE_LOOKUPS.labels("hit").inc()
+            return dict(cached[0])
+        metrics.PROFILE_LOOKUPS.labels("miss").inc()
+        # Lookups racing in for the same member share one read
+        task = self._loading.get(key)
+        if task is None:
+            task = self._loading[key] = asyncio.ensure_future(self._load(key))
+        return dict(await task)
+
+    async def _load(self, key):
+        task = asyncio.current_task()
+        try:
+            profile = await self.store.get_profile(key)
+        finally:
+            # A write while the read was in flight drops the task: the value
+            # read may predate it, so it isn't cached
+            fresh = self._loading.get(key) is task
+            if fresh:
+                del self._loading[key]
+        if fresh:
+            self._remember(key, profile)
+        return profile
+
+    def update(self, key, **fields):
+        # Write-through from the bot's write paths; members not cached are left alone
+        self._loading.pop(key, None)
+        cached = self.profiles.get(key)
+        if cached:
+            cached[0].update(fields)
+
+    def invalidate(self, key):
+        self._loading.pop(key, None)
+        self.profiles.pop(key, None)
+
+    def _remember(self, key, profile):
+        self.profiles[key] = (dict(profile), time.monotonic() + self.ttl)
+        self.profiles.move_to_end(key)
+        while len(self.profiles) > self.max_size:
+            self.profiles.popitem(last=False)
@@ -0,0 +1,53 @@
+# ─── PULSE SCHEDULER ────────────────────────────────────────
+# One scheduler per guild dashboard, kept on the bot (bot.pulses). The
+# rendering itself lives in the pulse cog.
+import asyncio
+import os
+import time
+
+import metrics
+
+PULSE_MIN_EDIT_INTERVAL = float(os.getenv("PULSE_MIN_EDIT_INTERVAL", "15"))  # Seconds between dashboard edits
+
+
+class PulseScheduler:
+    # Coalesces pulse refreshes. Callers only mark the dashboard dirty; a single
+    # worker renders at most once per `min_interval`, so a burst of vouches
+    # becomes one edit instead of many racing fetch/edit/send calls.
+    def __init__(self, render, min_interval):
+        self.render = render
+        self.min_interval = min_interval
+        self.message = None  # Cached pulse Message (skips fetch_message)
+        self.last_success = None
+        self.dirty = False
+        self._worker = None
+        self._last_render = 0.0
+
+    def mark_dirty(self):
+        self.dirty = True
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+
+    def reset(self):
+        # Forget the cached message (e.g. after /set-pulse moves the dashboard)
+        self.message = None
+
+    def cancel(self):
+        if self._worker:
+            self._worker.cancel()
+
+    async def _run(self):
+        while self.dirty:
+            wait = self._last_render + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.dirty = False
+            self._last_render = time.monotonic()
+            start = time.perf_counter()
+            try:
+                await self.render()
+                self.last_success = time.time()
+                metrics.PULSE_REFRESH.labels("ok").observe(time.perf_counter() - start)
+            except Exception as e:
+                metrics.PULSE_REFRESH.labels("error").observe(time.perf_counter() - start)
+                print(f"⚠️ Pulse refresh failed: {e}")
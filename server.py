@@ -1,15 +1,78 @@
-from flask import Flask
-from threading import Thread
+# ─── KEEP-ALIVE / HEALTH SERVER ─────────────────────────────
+# aiohttp server running on the bot's own event loop (aiohttp already ships
+# with discord.py). It starts in setup_hook and stops in close(), and reads
+# live bot state directly: no extra thread, no locks.
+import time
 
-app = Flask("")
+from aiohttp import web
 
-@app.route("/")
-def home():
-    return "Atomic Vault is alive"
+import metrics
 
-def run():
-    app.run(host="0.0.0.0", port=5000)
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
+class KeepAliveServer:
+    def __init__(self, bot, host="0.0.0.0", port=8080):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/", self.home),
+            web.get("/metrics", self.metrics),
+            web.get("/healthz", self.healthz),
+        ])
+        self._runner = None
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"🌐 Keep-Alive listening on port {self.port}")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def home(self, request):
+        return web.Response(text="Vault Status: OPERATIONAL")
+
+    async def metrics(self, request):
+        return web.Response(
+            text=metrics.render(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    async def healthz(self, request):
+        bot = self.bot
+        closed = bot.is_closed()
+        ready = bot.is_ready()
+        last_pulse = bot.last_pulse()
+        body = {
+            "status": "closed" if closed else ("ok" if ready else "starting"),
+            "gateway_latency_ms": round(bot.latency * 1000) if ready else None,
+            "shards": self.shard_status(),
+            "guilds": len(bot.guilds),
+            "last_pulse_age_seconds": round(time.time() - last_pulse) if last_pulse else None,
+            "pending_xp_users": len(bot.xp_buffer.pending),
+            "outbox_queued": bot.outbox.queued(),
+            "uptime_seconds": round(time.time() - bot.started_at),
+            "startup_seconds": {name: round(secs, 3) for name, secs in bot.startup.phases.items()},
+        }
+        return web.json_response(body, status=503 if closed else 200)
+
+    def shard_status(self):
+        bot = self.bot
+        shards = getattr(bot, "shards", None)
+        if shards:
+            # AutoShardedBot: one ShardInfo per shard
+            return [
+                {"id": s.id, "closed": s.is_closed(), "latency_ms": _ms(s.latency)}
+                for s in shards.values()
+            ]
+        ready = bot.is_ready()
+        return [{"id": bot.shard_id or 0, "closed": bot.is_closed(), "latency_ms": _ms(bot.latency) if ready else None}]
+
+
+def _ms(seconds):
+    # latency is nan/inf until the first heartbeat ack
+    return round(seconds * 1000) if seconds == seconds and seconds != float("inf") else None
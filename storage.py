@@ -0,0 +1,1717 @@
+# ─── STORAGE LAYER ──────────────────────────────────────────
+# One async repository API for XP, vouches, services, AFK and config.
+# MongoStorage is the production backend; MemoryStorage and SQLiteStorage
+# let small deployments and offline test/benchmark runs skip MongoDB.
+#
+# Windowed leaderboards read per-day counter buckets (one per guild, board
+# and UTC day) that are bumped next to every XP / vouch / service write and
+# expire after BUCKET_RETENTION_DAYS.
+#
+# Vouches are also appended to a ledger (vouch_events) with the giver,
+# reason and time; the per-member counts are snapshots folded from it.
+#
+# Data is partitioned per guild: member documents are keyed by
+# member_key(guild_id, user_id) ("guild:user") and carry guild_id / user_id
+# fields, per-guild queries take the guild id, and per-guild config
+# documents are keyed by guild_config(guild_id, name).
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, OperationFailure
+
+import metrics
+from dbmonitor import MONGO_COMMAND_MONITORING, QueryMonitor
+
+# Fields written by the JSON importer (see import_counts)
+COUNT_FIELDS = {"xp": "xp", "vouches": "count", "service_stats": "completed"}
+
+EMPTY_VOUCH_STATS = {"total": 0, "top_id": None, "top_count": 0}
+
+OTP_FIELDS = ("s_otp", "e_otp", "c_otp")
+SERVICE_CLOSING = "CLOSING"  # Claimed by MongoStorage.finish_service until it is deleted
+
+# Mongo client pool and failure handling. Timeouts are kept well under
+# Discord's 3 second interaction deadline.
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.getenv("MONGO_MAX_POOL", "20")),
+    "minPoolSize": int(os.getenv("MONGO_MIN_POOL", "2")),
+    "maxIdleTimeMS": 60_000,
+    "serverSelectionTimeoutMS": 2000,
+    "connectTimeoutMS": 2000,
+    "socketTimeoutMS": 10_000,
+    "retryWrites": True,
+    "retryReads": True,
+}
+MONGO_OP_TIMEOUT = float(os.getenv("MONGO_OP_TIMEOUT", "2.5"))  # Seconds per operation
+BREAKER_THRESHOLD = 3   # Consecutive outage errors that open the circuit
+BREAKER_COOLDOWN = 15   # Seconds before a probe call is let through
+# One journal per process: shard processes on one host must not share the
+# file or its .pos offsets, so SHARD_IDS goes into the name
+JOURNAL_PATH = os.getenv("JOURNAL_PATH", "vault.journal")
+if os.getenv("SHARD_IDS", "").strip():
+    JOURNAL_PATH = "{}.shards-{}{}".format(
+        os.path.splitext(JOURNAL_PATH)[0],
+        "-".join(s.strip() for s in os.environ["SHARD_IDS"].split(",") if s.strip()),
+        os.path.splitext(JOURNAL_PATH)[1]
+    )
+REKEY_BATCH = 1000      # Legacy documents moved per bulk write
+
+# Days of leaderboard buckets kept (longest board window + slack)
+BUCKET_RETENTION_DAYS = int(os.getenv("BUCKET_RETENTION_DAYS", "35"))
+
+# A giver can vouch for the same member once per window. Windows are fixed
+# (aligned to the epoch) so the window number can be part of the event id.
+VOUCH_DEDUPE_WINDOW = int(os.getenv("VOUCH_DEDUPE_HOURS", "24")) * 3600
+VOUCH_FOLD_BATCH = 1000  # Ledger events folded per compactor step (Mongo)
+
+# Jobs nobody started within this window are dropped (TTL index on Mongo,
+# expire_services sweep elsewhere). Changing it on an existing Mongo
+# deployment needs a collMod on the pending_ttl index.
+PENDING_SERVICE_TTL = int(os.getenv("PENDING_SERVICE_TTL_HOURS", "72")) * 3600
+
+
+class StorageUnavailable(Exception):
+    # The database timed out, is unreachable, or the circuit breaker is open
+    pass
+
+
+class DuplicateVouch(Exception):
+    # Same giver → recipient again within VOUCH_DEDUPE_WINDOW
+    pass
+
+
+def member_key(guild_id, user_id):
+    return f"{guild_id}:{user_id}"
+
+
+def split_key(key):
+    guild_id, user_id = key.split(":", 1)
+    return guild_id, user_id
+
+
+def guild_config(guild_id, name):
+    return f"{guild_id}:{name}"
+
+
+def vouch_event_id(key, giver_id, at):
+    # The duplicate check is the ledger's primary key: a second vouch from the
+    # same giver in the same window collides on insert, no lookup needed
+    return f"{key}:{giver_id}:{int(at) // VOUCH_DEDUPE_WINDOW}"
+
+
+def bucket_day(days_ago=0):
+    # UTC day as YYYY-MM-DD, which sorts in date order
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+
+
+class Storage:
+    # Interface shared by every backend. Ids are always strings; `key` is a
+    # member_key.
+
+    # Mongo command monitor (dbmonitor.QueryMonitor) when enabled
+    monitor = None
+
+    async def ensure_indexes(self): ...
+    async def close(self): ...
+
+    # --- XP ---
+    async def get_xp(self, key): ...
+    async def add_xp(self, increments):
+        # Applies {key: xp} increments; returns the keys that failed
+        ...
+    async def top_xp(self, guild_id, limit): ...
+    async def xp_rank(self, guild_id, xp): ...
+    async def xp_at_least(self, guild_id, min_xp): ...
+
+    # --- VOUCHES ---
+    async def get_vouches(self, key): ...
+    async def add_vouch(self, key, giver_id, reason):
+        # Appends a vouch event to the ledger and returns the recipient's new
+        # count (None if it was only journaled). Raises DuplicateVouch if the
+        # giver already vouched for this member in the current window.
+        ...
+    async def rebuild_vouch_stats(self, guild_id): ...
+
+    async def compact_vouches(self):
+        # Folds ledger events not yet in the snapshot counts and vouch_stats;
+        # returns {guild id: events folded}. Backends that fold inside the
+        # write transaction have nothing to do.
+        return {}
+
+    # --- WINDOWED LEADERBOARDS ---
+    async def top_window(self, guild_id, kind, days, limit):
+        # Top members of one board over the last `days` UTC days (today
+        # included), as {"user_id", "count"} rows, highest first
+        ...
+
+    async def expire_buckets(self):
+        # Drops buckets older than BUCKET_RETENTION_DAYS; returns how many
+        return 0
+
+    # --- SERVICES ---
+    async def get_completed(self, key): ...
+    async def add_completed(self, key): ...
+    async def get_service(self, key): ...
+    async def create_service(self, key, job): ...
+    async def advance_service(self, key, from_statuses, otp_field, otp_hash, to_status):
+        # Moves the job to `to_status` only if its status is in `from_statuses`
+        # and the OTP hash matches, in one atomic step. Returns the updated
+        # job, or None if nothing matched.
+        ...
+    async def finish_service(self, key, from_statuses, otp_field, otp_hash, final_status, details):
+        # Same check as advance_service, but removes the job from the active
+        # set and writes it to the service history. Returns the job or None.
+        ...
+    async def list_services(self, guild_id, limit, status=None, staff_id=None, after=None):
+        # Newest first. `after` is the (created_at, _id) of the previous
+        # page's last job, so each page is a single index range scan.
+        ...
+    async def expire_services(self):
+        # Removes PENDING jobs older than PENDING_SERVICE_TTL; returns how many
+        ...
+
+    # --- PROFILES ---
+    async def get_profile(self, key):
+        # {"xp", "vouches", "completed"} for one member in a single read
+        ...
+
+    # --- AFK ---
+    async def load_afk(self, since): ...
+    async def set_afk(self, key, reason, since, expires_at): ...
+    async def delete_afk(self, key): ...
+
+    # --- CONFIG ---
+    async def get_configs(self, keys): ...
+    async def set_config(self, key, fields): ...
+
+    async def get_config(self, key):
+        return (await self.get_configs([key])).get(key)
+
+    # --- MIGRATION ---
+    async def import_counts(self, kind, guild_id, items):
+        # Writes legacy {user_id: value} pairs into the given guild
+        ...
+    async def rekey_legacy(self, guild_id):
+        # Moves data stored before guild partitioning (bare user ids) into
+        # the given guild; returns the number of records moved
+        ...
+
+    # --- OUTAGE JOURNAL ---
+    async def sync_journal(self):
+        # Replays writes journaled during an outage; returns how many
+        return 0
+
+
+# ─── MONGODB ────────────────────────────────────────────────
+class TimedCollection:
+    # Wraps a motor collection so every operation is counted and timed per
+    # collection in metrics.DB_OPS / metrics.DB_LATENCY, and goes through the
+    # storage's timeout and circuit breaker. The collection is resolved on
+    # first use, so no client exists until the first query.
+    CURSOR_OPS = ("find", "aggregate")
+
+    def __init__(self, storage, name):
+        self._storage = storage
+        self._name = name
+        self._wrapped = {}
+
+    def __getattr__(self, op):
+        wrapped = self._wrapped.get(op)
+        if wrapped is None:
+            method = getattr(self._storage.db[self._name], op)
+            if op in self.CURSOR_OPS:
+                def wrapped(*args, **kwargs):
+                    return TimedCursor(method(*args, **kwargs), self._storage, self._name, op)
+            else:
+                async def wrapped(*args, **kwargs):
+                    return await timed_call(self._storage, self._name, op, lambda: method(*args, **kwargs))
+            self._wrapped[op] = wrapped
+        return wrapped
+
+
+class TimedCursor:
+    # Chained cursor calls (sort/limit/...) pass through; to_list is timed
+    def __init__(self, cursor, storage, name, op):
+        self._cursor = cursor
+        self._storage = storage
+        self._name = name
+        self._op = op
+
+    def __getattr__(self, attr):
+        method = getattr(self._cursor, attr)
+
+        def chained(*args, **kwargs):
+            result = method(*args, **kwargs)
+            return self if result is self._cursor else result
+        return chained
+
+    async def to_list(self, length=None):
+        return await timed_call(self._storage, self._name, self._op, lambda: self._cursor.to_list(length=length))
+
+
+async def timed_call(storage, collection, op, call):
+    # `call` starts the operation, so an open circuit fails before anything is sent
+    breaker = storage.breaker
+    breaker.before_call()
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        result = await asyncio.wait_for(call(), storage.op_timeout)
+    except (asyncio.TimeoutError, ConnectionFailure) as e:
+        status = "error"
+        breaker.record_failure()
+        raise StorageUnavailable(f"{collection}.{op}: {e!r}") from e
+    except Exception:
+        # The server answered (duplicate key, bad query...): it is reachable
+        status = "error"
+        breaker.record_success()
+        raise
+    finally:
+        metrics.DB_OPS.labels(collection, op, status).inc()
+        metrics.DB_LATENCY.labels(collection, op).observe(time.perf_counter() - start)
+    breaker.record_success()
+    return result
+
+
+class CircuitBreaker:
+    # closed → open after `threshold` consecutive outage errors. While open,
+    # calls fail instantly; after `cooldown` seconds a single probe call is
+    # let through (half-open) and its result closes or re-opens the circuit.
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        metrics.DB_CIRCUIT_OPEN.set_function(lambda: int(self.state != self.CLOSED))
+
+    @property
+    def closed(self):
+        return self.state == self.CLOSED
+
+    def before_call(self):
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                raise StorageUnavailable("circuit open")
+            self.state = self.HALF_OPEN  # This call is the probe
+        elif self.state == self.HALF_OPEN:
+            raise StorageUnavailable("circuit half-open, probe in flight")
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            print("✅ Database reachable again, circuit closed.")
+        self.failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self.state == self.CLOSED:
+                print("⚠️ Database unreachable, circuit open: journaling writes locally.")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class WriteJournal:
+    # Append-only JSON-lines file of XP and vouch writes made while Mongo was
+    # unreachable, replayed in order once it is back. Replay progress is kept
+    # in a .pos file so a crash mid-replay repeats at most one record.
+    # `xp` / `vouches` hold the not-yet-replayed deltas per user, so reads
+    # can add them on top of the database value.
+    def __init__(self, path):
+        self.path = path
+        self.pos_path = path + ".pos"
+        self.entries = deque()  # (end offset, record)
+        self.xp = Counter()
+        self.vouches = Counter()
+        self._file = None
+        self._lock = asyncio.Lock()
+        self._load()
+        metrics.JOURNAL_PENDING.set_function(lambda: len(self.entries))
+
+    @property
+    def pending(self):
+        return len(self.entries)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        start = 0
+        if os.path.exists(self.pos_path):
+            with open(self.pos_path) as f:
+                start = int(f.read() or 0)
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn write from a crash; never acknowledged
+                offset += len(line)
+                self._track(offset, json.loads(line))
+        if self.entries:
+            print(f"📓 {len(self.entries)} journaled write(s) waiting to be replayed.")
+
+    def _track(self, offset, record):
+        self.entries.append((offset, record))
+        self._count(record, 1)
+
+    def _count(self, record, sign):
+        if record["op"] == "xp":
+            for uid, inc in record["inc"].items():
+                self.xp[uid] += sign * inc
+        elif record["op"] == "vouch":
+            self.vouches[record["key"]] += sign
+
+    def append(self, record):
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        self._file.write(json.dumps(record).encode() + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._track(self._file.tell(), record)
+
+    async def replay(self, apply):
+        # Applies records oldest first; stops at the first failure
+        async with self._lock:
+            done = 0
+            while self.entries:
+                offset, record = self.entries[0]
+                await apply(record)
+                self.entries.popleft()
+                self._count(record, -1)
+                done += 1
+                with open(self.pos_path, "w") as f:
+                    f.write(str(offset))
+            self._reset()
+            return done
+
+    def _reset(self):
+        # Fully replayed: start the next outage with an empty file
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for path in (self.path, self.pos_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.xp.clear()
+        self.vouches.clear()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class MongoStorage(Storage):
+    # Indexes replaced by the guild-scoped ones in ensure_indexes
+    LEGACY_INDEXES = {
+        "levels": ["xp_desc"],
+        "vouches": ["count_desc"],
+        "service_stats": ["completed_desc"],
+        "active_services": ["status", "staff_id", "created", "status_created", "staff_created"],
+        "service_history": ["staff_finished"],
+    }
+
+    def __init__(self, url, db_name="AtomicVault", journal_path=JOURNAL_PATH, op_timeout=MONGO_OP_TIMEOUT):
+        self.url = url
+        self.db_name = db_name
+        self.op_timeout = op_timeout
+        self.breaker = CircuitBreaker()
+        self.journal = WriteJournal(journal_path)
+        self._db = None
+        self.xp = TimedCollection(self, "levels")
+        self.vouches = TimedCollection(self, "vouches")
+        self.vouch_events = TimedCollection(self, "vouch_events")
+        self.service_stats = TimedCollection(self, "service_stats")
+        self.active_services = TimedCollection(self, "active_services")
+        self.service_history = TimedCollection(self, "service_history")
+        self.config = TimedCollection(self, "bot_config")  # Stores Pulse & Global Settings
+        self.afk = TimedCollection(self, "afk")
+        self.buckets = TimedCollection(self, "leaderboard_buckets")
+        self.monitor = QueryMonitor() if MONGO_COMMAND_MONITORING else None
+
+    @property
+    def db(self):
+        # Created on first use, inside the running event loop
+        if self._db is None:
+            import motor.motor_asyncio
+            # Adding tlsAllowInvalidCertificates helps avoid connection issues on some hosts
+            listeners = []
+            if self.monitor is not None:
+                self.monitor.bind(asyncio.get_running_loop(), self._explain)
+                listeners.append(self.monitor)
+            client = motor.motor_asyncio.AsyncIOMotorClient(
+                self.url, tlsAllowInvalidCertificates=True, event_listeners=listeners, **MONGO_CLIENT_OPTIONS
+            )
+            self._db = client[self.db_name]
+        return self._db
+
+    async def _explain(self, collection, command):
+        # Plan only (queryPlanner): the slow query isn't run a second time
+        return await timed_call(
+            self, collection, "explain",
+            lambda: self.db.command({"explain": command, "verbosity": "queryPlanner"})
+        )
+
+    async def ensure_indexes(self):
+        # create_index is a no-op when the index already exists.
+        # bot_config and afk are only ever read by _id (or swept by TTL).
+        await asyncio.gather(
+            self.xp.create_index([("guild_id", 1), ("xp", -1)], name="guild_xp"),
+            self.vouches.create_index([("guild_id", 1), ("count", -1)], name="guild_count"),
+            self.vouch_events.create_index([("guild_id", 1), ("recipient_id", 1), ("at", -1)], name="guild_recipient_at"),
+            self.vouch_events.create_index([("guild_id", 1), ("giver_id", 1), ("at", -1)], name="guild_giver_at"),
+            self.vouch_events.create_index([("guild_id", 1), ("at", -1)], name="guild_at"),
+            # Only events not folded into the counts yet: stays small
+            self.vouch_events.create_index(
+                [("guild_id", 1), ("recipient_id", 1), ("batch", 1)], name="unfolded",
+                partialFilterExpression={"folded": False}
+            ),
+            self.service_stats.create_index([("guild_id", 1), ("completed", -1)], name="guild_completed"),
+            self.active_services.create_index(
+                [("guild_id", 1), ("created_at", -1), ("_id", -1)], name="guild_created"
+            ),
+            self.active_services.create_index(
+                [("guild_id", 1), ("status", 1), ("created_at", -1), ("_id", -1)], name="guild_status_created"
+            ),
+            self.active_services.create_index(
+                [("guild_id", 1), ("staff_id", 1), ("created_at", -1), ("_id", -1)], name="guild_staff_created"
+            ),
+            # Partial TTL: once a job is started it leaves the index and never expires
+            self.active_services.create_index(
+                [("created_at", 1)], name="pending_ttl",
+                expireAfterSeconds=PENDING_SERVICE_TTL,
+                partialFilterExpression={"status": "PENDING"}
+            ),
+            self.service_history.create_index([("customer_id", 1), ("finished_at", -1)], name="customer_finished"),
+            self.service_history.create_index(
+                [("guild_id", 1), ("staff_id", 1), ("finished_at", -1)], name="guild_staff_finished"
+            ),
+            self.afk.create_index([("expires_at", 1)], name="afk_ttl", expireAfterSeconds=0),
+            self.buckets.create_index([("guild_id", 1), ("kind", 1), ("day", 1)], name="guild_kind_day"),
+            self.buckets.create_index([("expires_at", 1)], name="bucket_ttl", expireAfterSeconds=0),
+        )
+        for name, indexes in self.LEGACY_INDEXES.items():
+            for index in indexes:
+                try:
+                    await self.db[name].drop_index(index)
+                except OperationFailure:
+                    pass
+
+    async def close(self):
+        self.journal.close()
+        if self._db is not None:
+            self._db.client.close()
+
+    def _journaling(self):
+        # Writes go to the journal while the circuit isn't closed, and also
+        # while older journaled writes are still waiting, to keep them in order
+        return self.journal.pending or not self.breaker.closed
+
+    # --- XP ---
+    async def get_xp(self, key):
+        doc = await self.xp.find_one({"_id": key})
+        return (doc["xp"] if doc else 0) + self.journal.xp.get(key, 0)
+
+    async def add_xp(self, increments):
+        # Each flush gets a batch id so a replay can't apply it twice, and
+        # keeps its day so a late replay still lands in the right bucket
+        record = {"op": "xp", "inc": increments, "batch": str(ObjectId()), "day": bucket_day()}
+        if self._journaling():
+            self.journal.append(record)
+            return []
+        try:
+            failed = await self._write_xp(increments, record["batch"])
+        except StorageUnavailable:
+            # A timeout doesn't mean the write wasn't applied; the batch guard
+            # makes the replay skip members it already reached
+            self.journal.append(record)
+            return []
+        applied = {key: inc for key, inc in increments.items() if key not in failed}
+        await self._bump_buckets_after("xp", applied, record["day"], record["batch"])
+        return failed
+
+    async def _write_xp(self, increments, batch):
+        # xp_batch holds the last batch applied to the member. Later writes
+        # are journaled behind an uncertain one, so when it is replayed it is
+        # either the last batch on the document or wasn't applied at all.
+        items = list(increments.items())
+        ops = [
+            UpdateOne(
+                {"_id": key, "xp_batch": {"$ne": batch}},
+                {"$inc": {"xp": inc}, "$set": {"xp_batch": batch}, "$setOnInsert": _owner(key)},
+                upsert=True
+            )
+            for key, inc in items
+        ]
+        failed = []
+        try:
+            await self.xp.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: everything except the failed ops was applied. A
+            # duplicate key is the guarded upsert finding the batch already applied.
+            failed = [
+                items[err["index"]][0] for err in e.details.get("writeErrors", []) if err.get("code") != 11000
+            ]
+        return failed
+
+    async def _bump_buckets(self, kind, increments, day=None, batch=None):
+        # One $inc per guild into the day's bucket: counts.<user id> += inc.
+        # With a batch id the $inc is guarded like _write_xp's, so a replayed
+        # batch is only counted once.
+        day = day or bucket_day()
+        expires_at = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=BUCKET_RETENTION_DAYS)
+        ops = []
+        for guild_id, counts in _by_guild(increments).items():
+            query = {"_id": f"{guild_id}:{kind}:{day}"}
+            update = {"$inc": {f"counts.{uid}": inc for uid, inc in counts.items()},
+                      "$setOnInsert": {"guild_id": guild_id, "kind": kind, "day": day, "expires_at": expires_at}}
+            if batch:
+                query["last_batch"] = {"$ne": batch}
+                update["$set"] = {"last_batch": batch}
+            ops.append(UpdateOne(query, update, upsert=True))
+        if not ops:
+            return
+        try:
+            await self.buckets.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # A duplicate key on a guarded upsert: that bucket already has the batch
+            if not batch or any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+    async def _bump_buckets_after(self, kind, increments, day=None, batch=None, replaying=False):
+        # Buckets for a write that is already applied: a failure here must
+        # never fail or repeat that write. An outage journals the bump as its
+        # own guarded record (also while older records wait, to keep their
+        # guards in order, unless this is one of them being replayed).
+        record = {"op": "buckets", "kind": kind, "inc": increments,
+                  "batch": batch or str(ObjectId()), "day": day or bucket_day()}
+        if self._journaling() and not replaying:
+            return self.journal.append(record)
+        try:
+            await self._bump_buckets(kind, increments, record["day"], record["batch"])
+        except StorageUnavailable:
+            self.journal.append(record)
+        except Exception as e:
+            print(f"❌ {kind} leaderboard buckets not updated for {len(increments)} member(s): {e!r}")
+
+    async def top_xp(self, guild_id, limit):
+        cursor = self.xp.find({"guild_id": guild_id}).sort("xp", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def xp_rank(self, guild_id, xp):
+        return await self.xp.count_documents({"guild_id": guild_id, "xp": {"$gt": xp}}) + 1
+
+    async def xp_at_least(self, guild_id, min_xp):
+        query = {"guild_id": guild_id, "xp": {"$gte": min_xp}}
+        return await self.xp.find(query, {"xp": 1, "user_id": 1}).to_list(length=None)
+
+    # --- VOUCHES ---
+    # No multi-document transactions here, so the write path only appends
+    # to the ledger and vouch_compactor folds events into the counts. Reads
+    # add the recipient's unfolded events (a count on the small partial
+    # index) to the snapshot.
+    def _unfolded(self, key):
+        guild_id, user_id = split_key(key)
+        return self.vouch_events.count_documents({"guild_id": guild_id, "recipient_id": user_id, "folded": False})
+
+    async def get_vouches(self, key):
+        doc, unfolded = await asyncio.gather(self.vouches.find_one({"_id": key}), self._unfolded(key))
+        return (doc.get("count", 0) if doc else 0) + unfolded + self.journal.vouches.get(key, 0)
+
+    async def add_vouch(self, key, giver_id, reason):
+        record = {"op": "vouch", "key": key, "giver": str(giver_id), "reason": reason, "at": time.time()}
+        if self._journaling():
+            # Duplicates can't be checked offline; replay drops them
+            self.journal.append(record)
+            return None
+        try:
+            return await self._write_vouch(key, record["giver"], reason, record["at"])
+        except StorageUnavailable:
+            self.journal.append(record)
+            return None
+
+    async def _write_vouch(self, key, giver_id, reason, at, replaying=False):
+        guild_id, user_id = split_key(key)
+        try:
+            await self.vouch_events.insert_one({
+                "_id": vouch_event_id(key, giver_id, at),
+                "guild_id": guild_id,
+                "recipient_id": user_id,
+                "giver_id": giver_id,
+                "reason": reason,
+                "at": datetime.fromtimestamp(at, timezone.utc),
+                "folded": False,
+                "batch": None,
+            })
+        except DuplicateKeyError as e:
+            raise DuplicateVouch(key) from e
+        # The event is recorded: a replay of this vouch would be dropped as a
+        # duplicate, so the bucket is journaled on its own if it fails
+        day = datetime.fromtimestamp(at, timezone.utc).strftime("%Y-%m-%d")
+        doc, unfolded, _ = await asyncio.gather(
+            self.vouches.find_one({"_id": key}), self._unfolded(key),
+            self._bump_buckets_after("vouches", {key: 1}, day, replaying=replaying)
+        )
+        return (doc.get("count", 0) if doc else 0) + unfolded
+
+    async def compact_vouches(self):
+        # Events are claimed in batches (batch id), folded into the counts
+        # once per member (guarded by last_batch) and then marked folded, so
+        # a batch left half-done by a crash is finished without double counting
+        folded = Counter()
+        unfinished = await self.vouch_events.distinct("batch", {"folded": False, "batch": {"$ne": None}})
+        for batch in unfinished:
+            folded.update(await self._fold_batch(batch))
+        while True:
+            docs = await self.vouch_events.find(
+                {"folded": False, "batch": None}, {"_id": 1}
+            ).limit(VOUCH_FOLD_BATCH).to_list(length=VOUCH_FOLD_BATCH)
+            if not docs:
+                break
+            batch = ObjectId()
+            await self.vouch_events.update_many(
+                {"_id": {"$in": [d["_id"] for d in docs]}, "folded": False, "batch": None}, {"$set": {"batch": batch}}
+            )
+            folded.update(await self._fold_batch(batch))
+        return dict(folded)
+
+    async def _fold_batch(self, batch):
+        rows = await self.vouch_events.aggregate([
+            {"$match": {"folded": False, "batch": batch}},
+            {"$group": {"_id": {"guild_id": "$guild_id", "user_id": "$recipient_id"}, "n": {"$sum": 1}}}
+        ]).to_list(length=None)
+        ops = [
+            UpdateOne(
+                {"_id": member_key(r["_id"]["guild_id"], r["_id"]["user_id"]), "last_batch": {"$ne": batch}},
+                {"$inc": {"count": r["n"]}, "$set": {"last_batch": batch},
+                 "$setOnInsert": {"guild_id": r["_id"]["guild_id"], "user_id": r["_id"]["user_id"]}},
+                upsert=True
+            )
+            for r in rows
+        ]
+        if ops:
+            try:
+                await self.vouches.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                # Duplicate key = that member already has this batch (filter missed, upsert collided)
+                if any(err["code"] != 11000 for err in e.details.get("writeErrors", [])):
+                    raise
+        per_guild = Counter()
+        for r in rows:
+            per_guild[r["_id"]["guild_id"]] += r["n"]
+        await asyncio.gather(*(self._refresh_vouch_stats(g, n, batch) for g, n in per_guild.items()))
+        await self.vouch_events.update_many({"folded": False, "batch": batch}, {"$set": {"folded": True}})
+        return per_guild
+
+    async def _refresh_vouch_stats(self, guild_id, added, batch):
+        # Total moves by what the batch folded, guarded by last_batch like the
+        # counts so a rerun batch moves it once; the top member is one
+        # guild_count index read and is set either way
+        top = await self.vouches.find({"guild_id": guild_id}, {"user_id": 1, "count": 1}).sort("count", -1).limit(1).to_list(length=1)
+        stats_id = guild_config(guild_id, "vouch_stats")
+        top_fields = {"top_id": top[0]["user_id"], "top_count": top[0]["count"]} if top else {}
+        try:
+            await self.config.update_one(
+                {"_id": stats_id, "last_batch": {"$ne": batch}},
+                {"$inc": {"total": added}, "$set": dict(top_fields, last_batch=batch)},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # This batch is already in the total
+            if top_fields:
+                await self.config.update_one({"_id": stats_id}, {"$set": top_fields})
+
+    async def rebuild_vouch_stats(self, guild_id):
+        result = await self.vouches.aggregate([
+            {"$match": {"guild_id": guild_id}},
+            {"$sort": {"count": -1}},
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": "$count"},
+                "top_id": {"$first": "$user_id"},
+                "top_count": {"$first": "$count"}
+            }}
+        ]).to_list(length=1)
+        stats = result[0] if result else dict(EMPTY_VOUCH_STATS)
+        stats.pop("_id", None)
+        await self.config.update_one({"_id": guild_config(guild_id, "vouch_stats")}, {"$set": stats}, upsert=True)
+        return stats
+
+    # --- WINDOWED LEADERBOARDS ---
+    async def top_window(self, guild_id, kind, days, limit):
+        # At most `days` bucket documents via guild_kind_day, summed server-side
+        rows = await self.buckets.aggregate([
+            {"$match": {"guild_id": guild_id, "kind": kind, "day": {"$gte": bucket_day(days - 1)}}},
+            {"$project": {"counts": {"$objectToArray": "$counts"}}},
+            {"$unwind": "$counts"},
+            {"$group": {"_id": "$counts.k", "count": {"$sum": "$counts.v"}}},
+            {"$sort": {"count": -1, "_id": 1}},
+            {"$limit": limit}
+        ]).to_list(length=limit)
+        return [{"user_id": r["_id"], "count": r["count"]} for r in rows]
+
+    async def expire_buckets(self):
+        # Handled server-side by the bucket_ttl index
+        return 0
+
+    # --- SERVICES ---
+    async def get_completed(self, key):
+        doc = await self.service_stats.find_one({"_id": key})
+        return doc.get("completed", 0) if doc else 0
+
+    # --- PROFILES ---
+    async def get_profile(self, key):
+        # One aggregation instead of three finds: the member's document from
+        # each counter collection plus their unfolded vouch events, summed
+        guild_id, user_id = split_key(key)
+        by_key = {"$match": {"_id": key}}
+        rows = await self.xp.aggregate([
+            by_key,
+            {"$project": {"xp": 1}},
+            {"$unionWith": {"coll": "vouches", "pipeline": [by_key, {"$project": {"count": 1}}]}},
+            {"$unionWith": {"coll": "service_stats", "pipeline": [by_key, {"$project": {"completed": 1}}]}},
+            {"$unionWith": {"coll": "vouch_events", "pipeline": [
+                {"$match": {"guild_id": guild_id, "recipient_id": user_id, "folded": False}},
+                {"$count": "unfolded"}
+            ]}},
+            {"$group": {
+                "_id": None,
+                "xp": {"$sum": "$xp"},
+                "count": {"$sum": "$count"},
+                "unfolded": {"$sum": "$unfolded"},
+                "completed": {"$sum": "$completed"}
+            }}
+        ]).to_list(length=1)
+        row = rows[0] if rows else {}
+        return {
+            "xp": row.get("xp", 0) + self.journal.xp.get(key, 0),
+            "vouches": row.get("count", 0) + row.get("unfolded", 0) + self.journal.vouches.get(key, 0),
+            "completed": row.get("completed", 0),
+        }
+
+    async def add_completed(self, key):
+        # The counter first: a bucket failure can't fail the job's count
+        result = await self.service_stats.find_one_and_update(
+            {"_id": key},
+            {"$inc": {"completed": 1}, "$setOnInsert": _owner(key)},
+            upsert=True,
+            return_document=True
+        )
+        await self._bump_buckets_after("services", {key: 1})
+        return result.get("completed", 1)
+
+    async def get_service(self, key):
+        return await self.active_services.find_one({"_id": key})
+
+    async def create_service(self, key, job):
+        await self.active_services.replace_one({"_id": key}, dict(job, **_owner(key)), upsert=True)
+
+    async def advance_service(self, key, from_statuses, otp_field, otp_hash, to_status):
+        return await self.active_services.find_one_and_update(
+            {"_id": key, "status": {"$in": list(from_statuses)}, otp_field: otp_hash},
+            {"$set": {"status": to_status}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def finish_service(self, key, from_statuses, otp_field, otp_hash, final_status, details):
+        # No transactions: the job is claimed in one atomic update (CLOSING and
+        # a claim id), the history record is upserted under the claim id, then
+        # the claimed job is deleted. A retry after a timeout or crash finds
+        # the job still CLOSING and redoes the same upsert, so history is
+        # written exactly once; only the caller that deletes the job wins.
+        job = await self.active_services.find_one_and_update(
+            {"_id": key, "status": {"$in": list(from_statuses)}, otp_field: otp_hash},
+            {"$set": {"status": SERVICE_CLOSING, "claim": ObjectId(), "closing_via": otp_field}},
+            return_document=ReturnDocument.AFTER
+        ) or await self.active_services.find_one(
+            {"_id": key, "status": SERVICE_CLOSING, "closing_via": otp_field, otp_field: otp_hash}
+        )
+        if job is None:
+            return None
+        claim = job.pop("claim")
+        job.pop("closing_via")
+        record = _history_record(job, final_status, details)
+        await self.service_history.update_one({"_id": claim}, {"$setOnInsert": record}, upsert=True)
+        won = await self.active_services.find_one_and_delete({"_id": key, "claim": claim})
+        return job if won else None
+
+    async def list_services(self, guild_id, limit, status=None, staff_id=None, after=None):
+        query = {"guild_id": guild_id}
+        if status:
+            query["status"] = status
+        if staff_id is not None:
+            query["staff_id"] = staff_id
+        if after:
+            created_at, last_id = after
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": last_id}}
+            ]
+        cursor = self.active_services.find(query).sort([("created_at", -1), ("_id", -1)]).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def expire_services(self):
+        # Handled server-side by the pending_ttl index
+        return 0
+
+    # --- AFK ---
+    async def load_afk(self, since):
+        return await self.afk.find({"time": {"$gt": since}}).to_list(length=None)
+
+    async def set_afk(self, key, reason, since, expires_at):
+        await self.afk.update_one(
+            {"_id": key},
+            {"$set": {"reason": reason, "time": since, "expires_at": expires_at, **_owner(key)}},
+            upsert=True
+        )
+
+    async def delete_afk(self, key):
+        await self.afk.delete_one({"_id": key})
+
+    # --- CONFIG ---
+    async def get_configs(self, keys):
+        docs = await self.config.find({"_id": {"$in": list(keys)}}).to_list(length=len(keys))
+        return {d["_id"]: d for d in docs}
+
+    async def set_config(self, key, fields):
+        await self.config.update_one({"_id": key}, {"$set": fields}, upsert=True)
+
+    # --- MIGRATION ---
+    async def import_counts(self, kind, guild_id, items):
+        col = {"xp": self.xp, "vouches": self.vouches, "service_stats": self.service_stats}[kind]
+        field = COUNT_FIELDS[kind]
+        ops = [
+            UpdateOne(
+                {"_id": member_key(guild_id, uid)},
+                {"$set": {field: val, "guild_id": guild_id, "user_id": str(uid)}},
+                upsert=True
+            )
+            for uid, val in items
+        ]
+        if ops:
+            await col.bulk_write(ops, ordered=False)
+
+    async def rekey_legacy(self, guild_id):
+        # Legacy documents are the ones without a guild_id field. Counters
+        # are merged with $inc in case the member already has new data.
+        moved = 0
+        legacy = {"guild_id": {"$exists": False}}
+        for col, field in ((self.xp, "xp"), (self.vouches, "count"), (self.service_stats, "completed")):
+            while True:
+                docs = await col.find(legacy).limit(REKEY_BATCH).to_list(length=REKEY_BATCH)
+                if not docs:
+                    break
+                ops = [
+                    UpdateOne(
+                        {"_id": member_key(guild_id, doc["_id"])},
+                        {"$inc": {field: doc.get(field, 0)},
+                         "$setOnInsert": {"guild_id": guild_id, "user_id": doc["_id"]}},
+                        upsert=True
+                    )
+                    for doc in docs
+                ]
+                await col.bulk_write(ops, ordered=False)
+                await col.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+                moved += len(docs)
+        # Open jobs and AFK entries are few: moved one by one
+        for col in (self.active_services, self.afk):
+            for doc in await col.find(legacy).to_list(length=None):
+                old_id = doc.pop("_id")
+                key = member_key(guild_id, old_id)
+                await col.replace_one({"_id": key}, dict(doc, **_owner(key)), upsert=True)
+                await col.delete_one({"_id": old_id})
+                moved += 1
+        result = await self.service_history.update_many(legacy, [{"$set": {
+            "guild_id": guild_id,
+            "customer_id": {"$concat": [f"{guild_id}:", "$customer_id"]}
+        }}])
+        moved += result.modified_count
+        # Guild-level config documents
+        for name in ("pulse",):
+            doc = await self.config.find_one({"_id": name})
+            if doc:
+                doc.pop("_id")
+                await self.config.update_one({"_id": guild_config(guild_id, name)}, {"$set": doc}, upsert=True)
+                await self.config.delete_one({"_id": name})
+                moved += 1
+        await self.config.delete_one({"_id": "vouch_stats"})
+        await self.rebuild_vouch_stats(guild_id)
+        return moved
+
+    # --- OUTAGE JOURNAL ---
+    async def sync_journal(self):
+        if not self.journal.pending:
+            return 0
+        try:
+            done = await self.journal.replay(self._replay)
+        except StorageUnavailable:
+            return 0
+        except Exception as e:
+            # Not an outage; keep the record and retry next flush rather than
+            # letting the error stop the flush loop
+            print(f"❌ Journal replay failed: {e!r}")
+            return 0
+        print(f"📓 Replayed {done} journaled write(s).")
+        return done
+
+    async def _replay(self, record):
+        record = self._rekey_legacy(record)
+        if record is None:
+            return
+        if record["op"] == "xp":
+            # Records journaled before batch ids existed can't be deduplicated
+            batch = record.get("batch") or str(ObjectId())
+            failed = await self._write_xp(record["inc"], batch)
+            if failed:
+                # Rejected by the server, not an outage: retrying won't help
+                print(f"❌ Journal replay: XP for {len(failed)} member(s) rejected.")
+            applied = {key: inc for key, inc in record["inc"].items() if key not in failed}
+            # Raises on an outage: the record is replayed again, both writes guarded
+            await self._bump_buckets("xp", applied, record.get("day"), batch)
+        elif record["op"] == "buckets":
+            await self._bump_buckets(record["kind"], record["inc"], record["day"], record["batch"])
+        elif record["op"] == "vouch" and "giver" not in record:
+            # Journaled before the ledger existed: count only
+            key = record["key"]
+            await self.vouches.update_one({"_id": key}, {"$inc": {"count": 1}, "$setOnInsert": _owner(key)}, upsert=True)
+        elif record["op"] == "vouch":
+            try:
+                await self._write_vouch(record["key"], record["giver"], record["reason"], record["at"], replaying=True)
+            except DuplicateVouch:
+                print(f"⚠️ Journal replay: duplicate vouch for {record['key']} dropped.")
+
+
+    @staticmethod
+    def _rekey_legacy(record):
+        # Journals written before per-guild partitioning use bare user ids.
+        # They belong to LEGACY_GUILD_ID (as in migrate.py); without it they
+        # are dropped with a log line instead of failing every replay.
+        keys = list(record["inc"]) if "inc" in record else [record.get("key", "")]
+        if all(":" in key for key in keys):
+            return record
+        guild_id = os.getenv("LEGACY_GUILD_ID")
+        if not guild_id:
+            print(f"⚠️ Journal replay: dropped pre-partitioning {record['op']} record (set LEGACY_GUILD_ID to keep it).")
+            return None
+
+        def rekey(key):
+            return key if ":" in key else member_key(guild_id, key)
+        if "inc" in record:
+            return dict(record, inc={rekey(key): inc for key, inc in record["inc"].items()})
+        return dict(record, key=rekey(record["key"]))
+
+
+# ─── IN-MEMORY ──────────────────────────────────────────────
+class MemoryStorage(Storage):
+    # Process-local dictionaries keyed by member key. Nothing survives a
+    # restart; meant for tests, benchmarks and throwaway local runs.
+    def __init__(self):
+        self.xp = {}
+        self.vouches = {}
+        self.vouch_events = {}  # event id -> event, counted as it is added
+        self.service_stats = {}
+        self.active_services = {}
+        self.service_history = []
+        self.config = {}
+        self.afk = {}
+        self.buckets = {}  # (guild id, kind, day) -> Counter of user id -> count
+
+    async def ensure_indexes(self): pass
+    async def close(self): pass
+
+    def _bump_buckets(self, kind, increments):
+        day = bucket_day()
+        for guild_id, counts in _by_guild(increments).items():
+            self.buckets.setdefault((guild_id, kind, day), Counter()).update(counts)
+
+    @staticmethod
+    def _in_guild(mapping, guild_id):
+        # (user id, value) pairs of one guild
+        prefix = f"{guild_id}:"
+        return [(key[len(prefix):], value) for key, value in mapping.items() if key.startswith(prefix)]
+
+    # --- XP ---
+    async def get_xp(self, key):
+        return self.xp.get(key, 0)
+
+    async def add_xp(self, increments):
+        for key, inc in increments.items():
+            self.xp[key] = self.xp.get(key, 0) + inc
+        self._bump_buckets("xp", increments)
+        return []
+
+    async def top_xp(self, guild_id, limit):
+        top = sorted(self._in_guild(self.xp, guild_id), key=lambda kv: kv[1], reverse=True)[:limit]
+        return [{"_id": member_key(guild_id, uid), "user_id": uid, "xp": xp} for uid, xp in top]
+
+    async def xp_rank(self, guild_id, xp):
+        return sum(1 for _, v in self._in_guild(self.xp, guild_id) if v > xp) + 1
+
+    async def xp_at_least(self, guild_id, min_xp):
+        return [
+            {"_id": member_key(guild_id, uid), "user_id": uid, "xp": xp}
+            for uid, xp in self._in_guild(self.xp, guild_id) if xp >= min_xp
+        ]
+
+    # --- VOUCHES ---
+    async def get_vouches(self, key):
+        return self.vouches.get(key, 0)
+
+    async def add_vouch(self, key, giver_id, reason):
+        guild_id, user_id = split_key(key)
+        at = time.time()
+        event_id = vouch_event_id(key, giver_id, at)
+        if event_id in self.vouch_events:
+            raise DuplicateVouch(key)
+        self.vouch_events[event_id] = {
+            "guild_id": guild_id, "recipient_id": user_id, "giver_id": str(giver_id), "reason": reason, "at": at
+        }
+        count = self.vouches[key] = self.vouches.get(key, 0) + 1
+        _bump_vouch_stats(self._config_doc(guild_config(guild_id, "vouch_stats")), user_id, count)
+        self._bump_buckets("vouches", {key: 1})
+        return count
+
+    async def rebuild_vouch_stats(self, guild_id):
+        stats = _vouch_stats_from(self._in_guild(self.vouches, guild_id))
+        self._config_doc(guild_config(guild_id, "vouch_stats")).update(stats)
+        return stats
+
+    # --- WINDOWED LEADERBOARDS ---
+    async def top_window(self, guild_id, kind, days, limit):
+        totals = Counter()
+        for day in {bucket_day(n) for n in range(days)}:
+            totals.update(self.buckets.get((guild_id, kind, day), {}))
+        top = sorted(totals.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+        return [{"user_id": uid, "count": count} for uid, count in top]
+
+    async def expire_buckets(self):
+        cutoff = bucket_day(BUCKET_RETENTION_DAYS)
+        old = [b for b in self.buckets if b[2] < cutoff]
+        for bucket in old:
+            del self.buckets[bucket]
+        return len(old)
+
+    # --- SERVICES ---
+    async def get_completed(self, key):
+        return self.service_stats.get(key, 0)
+
+    # --- PROFILES ---
+    async def get_profile(self, key):
+        return {
+            "xp": self.xp.get(key, 0),
+            "vouches": self.vouches.get(key, 0),
+            "completed": self.service_stats.get(key, 0),
+        }
+
+    async def add_completed(self, key):
+        count = self.service_stats[key] = self.service_stats.get(key, 0) + 1
+        self._bump_buckets("services", {key: 1})
+        return count
+
+    async def get_service(self, key):
+        job = self.active_services.get(key)
+        return dict(job) if job else None
+
+    async def create_service(self, key, job):
+        self.active_services[key] = dict(job, _id=key, **_owner(key))
+
+    def _matching_service(self, key, from_statuses, otp_field, otp_hash):
+        job = self.active_services.get(key)
+        if job and job["status"] in from_statuses and job.get(otp_field) == otp_hash:
+            return job
+        return None
+
+    async def advance_service(self, key, from_statuses, otp_field, otp_hash, to_status):
+        job = self._matching_service(key, from_statuses, otp_field, otp_hash)
+        if job is None:
+            return None
+        job["status"] = to_status
+        return dict(job)
+
+    async def finish_service(self, key, from_statuses, otp_field, otp_hash, final_status, details):
+        job = self._matching_service(key, from_statuses, otp_field, otp_hash)
+        if job is None:
+            return None
+        del self.active_services[key]
+        self.service_history.append(_history_record(job, final_status, details))
+        return dict(job)
+
+    async def list_services(self, guild_id, limit, status=None, staff_id=None, after=None):
+        jobs = [
+            job for job in self.active_services.values()
+            if job["guild_id"] == guild_id
+            and (not status or job["status"] == status)
+            and (staff_id is None or job.get("staff_id") == staff_id)
+            and (not after or _service_key(job) < after)
+        ]
+        jobs.sort(key=_service_key, reverse=True)
+        return [dict(job) for job in jobs[:limit]]
+
+    async def expire_services(self):
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=PENDING_SERVICE_TTL)
+        stale = [
+            key for key, job in self.active_services.items()
+            if job["status"] == "PENDING" and job["created_at"] < cutoff
+        ]
+        for key in stale:
+            del self.active_services[key]
+        return len(stale)
+
+    # --- AFK ---
+    async def load_afk(self, since):
+        return [dict(doc) for doc in self.afk.values() if doc["time"] > since]
+
+    async def set_afk(self, key, reason, since, expires_at):
+        self.afk[key] = {"_id": key, "reason": reason, "time": since, "expires_at": expires_at, **_owner(key)}
+
+    async def delete_afk(self, key):
+        self.afk.pop(key, None)
+
+    # --- CONFIG ---
+    def _config_doc(self, key):
+        return self.config.setdefault(key, {"_id": key})
+
+    async def get_configs(self, keys):
+        return {k: dict(self.config[k]) for k in keys if k in self.config}
+
+    async def set_config(self, key, fields):
+        self._config_doc(key).update(fields)
+
+    # --- MIGRATION ---
+    async def import_counts(self, kind, guild_id, items):
+        target = {"xp": self.xp, "vouches": self.vouches, "service_stats": self.service_stats}[kind]
+        for uid, val in items:
+            target[member_key(guild_id, uid)] = val
+
+    async def rekey_legacy(self, guild_id):
+        # Nothing persists across restarts, so there is never legacy data
+        return 0
+
+
+# ─── SQLITE ─────────────────────────────────────────────────
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS levels (
+    key TEXT PRIMARY KEY, guild_id TEXT NOT NULL, user_id TEXT NOT NULL, xp INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS vouches (
+    key TEXT PRIMARY KEY, guild_id TEXT NOT NULL, user_id TEXT NOT NULL, count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS vouch_events (
+    id TEXT PRIMARY KEY, guild_id TEXT NOT NULL, recipient_id TEXT NOT NULL, giver_id TEXT NOT NULL,
+    reason TEXT, at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS service_stats (
+    key TEXT PRIMARY KEY, guild_id TEXT NOT NULL, user_id TEXT NOT NULL, completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS active_services (key TEXT PRIMARY KEY, guild_id TEXT NOT NULL, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS service_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id TEXT, customer_id TEXT NOT NULL, staff_id TEXT,
+    status TEXT NOT NULL, finished_at REAL NOT NULL, data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bot_config (key TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS afk (
+    key TEXT PRIMARY KEY, guild_id TEXT NOT NULL, user_id TEXT NOT NULL, reason TEXT, time INTEGER, expires_at REAL
+);
+CREATE TABLE IF NOT EXISTS leaderboard_buckets (
+    guild_id TEXT NOT NULL, kind TEXT NOT NULL, day TEXT NOT NULL, user_id TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, kind, day, user_id)
+) WITHOUT ROWID;
+"""
+
+SQLITE_INDEXES = """
+CREATE INDEX IF NOT EXISTS guild_xp ON levels (guild_id, xp DESC);
+CREATE INDEX IF NOT EXISTS guild_count ON vouches (guild_id, count DESC);
+CREATE INDEX IF NOT EXISTS vouch_events_recipient ON vouch_events (guild_id, recipient_id, at DESC);
+CREATE INDEX IF NOT EXISTS vouch_events_giver ON vouch_events (guild_id, giver_id, at DESC);
+CREATE INDEX IF NOT EXISTS vouch_events_at ON vouch_events (guild_id, at DESC);
+CREATE INDEX IF NOT EXISTS guild_completed ON service_stats (guild_id, completed DESC);
+CREATE INDEX IF NOT EXISTS afk_since ON afk (time);
+CREATE INDEX IF NOT EXISTS buckets_day ON leaderboard_buckets (day);
+CREATE INDEX IF NOT EXISTS history_customer_finished ON service_history (customer_id, finished_at DESC);
+CREATE INDEX IF NOT EXISTS history_guild_staff ON service_history (guild_id, staff_id, finished_at DESC);
+CREATE INDEX IF NOT EXISTS guild_services_created ON active_services (
+    guild_id, json_extract(data, '$.created_at') DESC, key DESC
+);
+CREATE INDEX IF NOT EXISTS guild_services_status_created ON active_services (
+    guild_id, json_extract(data, '$.status'), json_extract(data, '$.created_at') DESC, key DESC
+);
+CREATE INDEX IF NOT EXISTS guild_services_staff_created ON active_services (
+    guild_id, json_extract(data, '$.staff_id'), json_extract(data, '$.created_at') DESC, key DESC
+);
+CREATE INDEX IF NOT EXISTS services_status_age ON active_services (
+    json_extract(data, '$.status'), json_extract(data, '$.created_at')
+);
+"""
+
+# Tables whose pre-partitioning layout is renamed to legacy_<name> on open
+# and folded back in by rekey_legacy
+SQLITE_PARTITIONED = ("levels", "vouches", "service_stats", "active_services", "service_history", "afk")
+
+COUNT_TABLES = {"xp": ("levels", "xp"), "vouches": ("vouches", "count"), "service_stats": ("service_stats", "completed")}
+
+
+class SQLiteStorage(Storage):
+    # Local single-file database in WAL mode. sqlite3 is blocking, so every
+    # call runs on one dedicated worker thread that owns the connection.
+    def __init__(self, path):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vault-sqlite")
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._set_aside_legacy(self._conn)
+            self._conn.executescript(SQLITE_SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def _set_aside_legacy(conn):
+        for table in SQLITE_PARTITIONED:
+            columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if columns and "guild_id" not in columns:
+                conn.execute(f"ALTER TABLE {table} RENAME TO legacy_{table}")
+                print(f"📦 Legacy {table} table kept as legacy_{table}. Run `python migrate.py --rekey`.")
+
+    async def _run(self, fn, *args):
+        def call():
+            conn = self._connect()
+            with conn:
+                return fn(conn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def ensure_indexes(self):
+        await self._run(lambda conn: conn.executescript(SQLITE_INDEXES))
+
+    async def close(self):
+        def shutdown():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        await asyncio.get_running_loop().run_in_executor(self._executor, shutdown)
+        self._executor.shutdown(wait=False)
+
+    @staticmethod
+    def _scalar(conn, sql, args, default=0):
+        row = conn.execute(sql, args).fetchone()
+        return row[0] if row else default
+
+    @staticmethod
+    def _bump_buckets(conn, kind, increments):
+        # Runs inside the caller's transaction, next to the counter write
+        day = bucket_day()
+        rows = []
+        for key, inc in increments.items():
+            guild_id, user_id = split_key(key)
+            rows.append((guild_id, kind, day, user_id, inc))
+        conn.executemany(
+            "INSERT INTO leaderboard_buckets (guild_id, kind, day, user_id, count) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT DO UPDATE SET count = count + excluded.count",
+            rows
+        )
+
+    # --- XP ---
+    async def get_xp(self, key):
+        return await self._run(self._scalar, "SELECT xp FROM levels WHERE key = ?", (key,))
+
+    async def add_xp(self, increments):
+        rows = [(key, *split_key(key), inc) for key, inc in increments.items()]
+
+        def write(conn):
+            conn.executemany(
+                "INSERT INTO levels (key, guild_id, user_id, xp) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET xp = xp + excluded.xp",
+                rows
+            )
+            self._bump_buckets(conn, "xp", increments)
+            return []
+        return await self._run(write)
+
+    async def top_xp(self, guild_id, limit):
+        def read(conn):
+            rows = conn.execute(
+                "SELECT key, user_id, xp FROM levels WHERE guild_id = ? ORDER BY xp DESC LIMIT ?", (guild_id, limit)
+            )
+            return [{"_id": r["key"], "user_id": r["user_id"], "xp": r["xp"]} for r in rows]
+        return await self._run(read)
+
+    async def xp_rank(self, guild_id, xp):
+        sql = "SELECT COUNT(*) FROM levels WHERE guild_id = ? AND xp > ?"
+        return await self._run(self._scalar, sql, (guild_id, xp)) + 1
+
+    async def xp_at_least(self, guild_id, min_xp):
+        def read(conn):
+            rows = conn.execute(
+                "SELECT key, user_id, xp FROM levels WHERE guild_id = ? AND xp >= ?", (guild_id, min_xp)
+            )
+            return [{"_id": r["key"], "user_id": r["user_id"], "xp": r["xp"]} for r in rows]
+        return await self._run(read)
+
+    # --- VOUCHES ---
+    async def get_vouches(self, key):
+        return await self._run(self._scalar, "SELECT count FROM vouches WHERE key = ?", (key,))
+
+    async def add_vouch(self, key, giver_id, reason):
+        guild_id, user_id = split_key(key)
+        stats_key = guild_config(guild_id, "vouch_stats")
+        at = time.time()
+
+        def write(conn):
+            # The event and the count change commit together, so there is
+            # nothing left for compact_vouches to fold
+            try:
+                conn.execute(
+                    "INSERT INTO vouch_events (id, guild_id, recipient_id, giver_id, reason, at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (vouch_event_id(key, giver_id, at), guild_id, user_id, str(giver_id), reason, at)
+                )
+            except sqlite3.IntegrityError as e:
+                raise DuplicateVouch(key) from e
+            count = conn.execute(
+                "INSERT INTO vouches (key, guild_id, user_id, count) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET count = count + 1 RETURNING count",
+                (key, guild_id, user_id)
+            ).fetchone()[0]
+            stats = self._read_config(conn, stats_key) or {}
+            _bump_vouch_stats(stats, user_id, count)
+            self._write_config(conn, stats_key, stats)
+            self._bump_buckets(conn, "vouches", {key: 1})
+            return count
+        return await self._run(write)
+
+    async def rebuild_vouch_stats(self, guild_id):
+        stats_key = guild_config(guild_id, "vouch_stats")
+
+        def write(conn):
+            rows = conn.execute("SELECT user_id, count FROM vouches WHERE guild_id = ?", (guild_id,))
+            stats = _vouch_stats_from((r["user_id"], r["count"]) for r in rows)
+            merged = self._read_config(conn, stats_key) or {}
+            merged.update(stats)
+            self._write_config(conn, stats_key, merged)
+            return stats
+        return await self._run(write)
+
+    # --- WINDOWED LEADERBOARDS ---
+    async def top_window(self, guild_id, kind, days, limit):
+        # A primary key range scan over the window's buckets
+        def read(conn):
+            rows = conn.execute(
+                "SELECT user_id, SUM(count) AS total FROM leaderboard_buckets "
+                "WHERE guild_id = ? AND kind = ? AND day >= ? "
+                "GROUP BY user_id ORDER BY total DESC, user_id LIMIT ?",
+                (guild_id, kind, bucket_day(days - 1), limit)
+            )
+            return [{"user_id": r["user_id"], "count": r["total"]} for r in rows]
+        return await self._run(read)
+
+    async def expire_buckets(self):
+        cutoff = bucket_day(BUCKET_RETENTION_DAYS)
+        return await self._run(lambda conn: conn.execute(
+            "DELETE FROM leaderboard_buckets WHERE day < ?", (cutoff,)
+        ).rowcount)
+
+    # --- SERVICES ---
+    async def get_completed(self, key):
+        return await self._run(self._scalar, "SELECT completed FROM service_stats WHERE key = ?", (key,))
+
+    # --- PROFILES ---
+    async def get_profile(self, key):
+        def read(conn):
+            row = conn.execute(
+                "SELECT (SELECT xp FROM levels WHERE key = ?), (SELECT count FROM vouches WHERE key = ?), "
+                "(SELECT completed FROM service_stats WHERE key = ?)",
+                (key, key, key)
+            ).fetchone()
+            return {"xp": row[0] or 0, "vouches": row[1] or 0, "completed": row[2] or 0}
+        return await self._run(read)
+
+    async def add_completed(self, key):
+        def write(conn):
+            completed = conn.execute(
+                "INSERT INTO service_stats (key, guild_id, user_id, completed) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET completed = completed + 1 RETURNING completed",
+                (key, *split_key(key))
+            ).fetchone()[0]
+            self._bump_buckets(conn, "services", {key: 1})
+            return completed
+        return await self._run(write)
+
+    @staticmethod
+    def _service(key, data):
+        # created_at is stored as a unix timestamp so it sorts and indexes numerically
+        job = dict(json.loads(data), _id=key)
+        if job.get("created_at") is not None:
+            job["created_at"] = datetime.fromtimestamp(job["created_at"], timezone.utc)
+        return job
+
+    async def get_service(self, key):
+        def read(conn):
+            row = conn.execute("SELECT data FROM active_services WHERE key = ?", (key,)).fetchone()
+            return self._service(key, row["data"]) if row else None
+        return await self._run(read)
+
+    async def create_service(self, key, job):
+        owner = _owner(key)
+        data = dict(job, created_at=job["created_at"].timestamp(), **owner)
+        await self._run(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO active_services (key, guild_id, data) VALUES (?, ?, ?)",
+            (key, owner["guild_id"], json.dumps(data))
+        ))
+
+    # json_extract keeps the status/OTP check and the write in one statement
+    SERVICE_MATCH = (
+        "key = ? AND json_extract(data, '$.status') IN ({statuses}) "
+        "AND json_extract(data, '$.' || ?) = ?"
+    )
+
+    def _service_match(self, key, from_statuses, otp_field, otp_hash):
+        where = self.SERVICE_MATCH.format(statuses=", ".join("?" * len(from_statuses)))
+        return where, (key, *from_statuses, otp_field, otp_hash)
+
+    async def advance_service(self, key, from_statuses, otp_field, otp_hash, to_status):
+        where, args = self._service_match(key, from_statuses, otp_field, otp_hash)
+
+        def write(conn):
+            row = conn.execute(
+                f"UPDATE active_services SET data = json_set(data, '$.status', ?) WHERE {where} RETURNING data",
+                (to_status, *args)
+            ).fetchone()
+            return self._service(key, row["data"]) if row else None
+        return await self._run(write)
+
+    async def finish_service(self, key, from_statuses, otp_field, otp_hash, final_status, details):
+        where, args = self._service_match(key, from_statuses, otp_field, otp_hash)
+
+        def write(conn):
+            row = conn.execute(f"DELETE FROM active_services WHERE {where} RETURNING data", args).fetchone()
+            if row is None:
+                return None
+            job = self._service(key, row["data"])
+            record = _history_record(job, final_status, details)
+            conn.execute(
+                "INSERT INTO service_history (guild_id, customer_id, staff_id, status, finished_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (record.get("guild_id"), key, record.get("staff_id"), final_status,
+                 record["finished_at"].timestamp(), json.dumps(record, default=str))
+            )
+            return job
+        return await self._run(write)
+
+    async def list_services(self, guild_id, limit, status=None, staff_id=None, after=None):
+        # Expressions match the guild_services_* indexes exactly so SQLite uses them
+        where, args = ["guild_id = ?"], [guild_id]
+        if status:
+            where.append("json_extract(data, '$.status') = ?")
+            args.append(status)
+        if staff_id is not None:
+            where.append("json_extract(data, '$.staff_id') = ?")
+            args.append(staff_id)
+        if after:
+            where.append("(json_extract(data, '$.created_at'), key) < (?, ?)")
+            args.extend((after[0].timestamp(), after[1]))
+        sql = (
+            "SELECT key, data FROM active_services WHERE " + " AND ".join(where)
+            + " ORDER BY json_extract(data, '$.created_at') DESC, key DESC LIMIT ?"
+        )
+
+        def read(conn):
+            rows = conn.execute(sql, (*args, limit))
+            return [self._service(r["key"], r["data"]) for r in rows]
+        return await self._run(read)
+
+    async def expire_services(self):
+        cutoff = time.time() - PENDING_SERVICE_TTL
+        return await self._run(lambda conn: conn.execute(
+            "DELETE FROM active_services "
+            "WHERE json_extract(data, '$.status') = 'PENDING' AND json_extract(data, '$.created_at') < ?",
+            (cutoff,)
+        ).rowcount)
+
+    # --- AFK ---
+    async def load_afk(self, since):
+        def read(conn):
+            conn.execute("DELETE FROM afk WHERE expires_at < ?", (time.time(),))
+            rows = conn.execute("SELECT key, guild_id, user_id, reason, time FROM afk WHERE time > ?", (since,))
+            return [
+                {"_id": r["key"], "guild_id": r["guild_id"], "user_id": r["user_id"],
+                 "reason": r["reason"], "time": r["time"]}
+                for r in rows
+            ]
+        return await self._run(read)
+
+    async def set_afk(self, key, reason, since, expires_at):
+        await self._run(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO afk (key, guild_id, user_id, reason, time, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, *split_key(key), reason, since, expires_at.timestamp())
+        ))
+
+    async def delete_afk(self, key):
+        await self._run(lambda conn: conn.execute("DELETE FROM afk WHERE key = ?", (key,)))
+
+    # --- CONFIG ---
+    @staticmethod
+    def _read_config(conn, key):
+        row = conn.execute("SELECT data FROM bot_config WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    @staticmethod
+    def _write_config(conn, key, doc):
+        doc.pop("_id", None)
+        conn.execute("INSERT OR REPLACE INTO bot_config (key, data) VALUES (?, ?)", (key, json.dumps(doc)))
+
+    async def get_configs(self, keys):
+        def read(conn):
+            found = {}
+            for key in keys:
+                doc = self._read_config(conn, key)
+                if doc is not None:
+                    found[key] = dict(doc, _id=key)
+            return found
+        return await self._run(read)
+
+    async def set_config(self, key, fields):
+        def write(conn):
+            doc = self._read_config(conn, key) or {}
+            doc.update(fields)
+            self._write_config(conn, key, doc)
+        await self._run(write)
+
+    # --- MIGRATION ---
+    async def import_counts(self, kind, guild_id, items):
+        table, field = COUNT_TABLES[kind]
+        rows = [(member_key(guild_id, uid), guild_id, str(uid), val) for uid, val in items]
+        await self._run(lambda conn: conn.executemany(
+            f"INSERT OR REPLACE INTO {table} (key, guild_id, user_id, {field}) VALUES (?, ?, ?, ?)", rows
+        ))
+
+    async def rekey_legacy(self, guild_id):
+        prefix = f"{guild_id}:"
+
+        def move(conn):
+            legacy = {
+                row["name"] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                if row["name"].startswith("legacy_")
+            }
+            moved = 0
+            for table, field in COUNT_TABLES.values():
+                if f"legacy_{table}" in legacy:
+                    # "WHERE true" keeps SQLite from reading ON CONFLICT as a join clause
+                    moved += conn.execute(
+                        f"INSERT INTO {table} (key, guild_id, user_id, {field}) "
+                        f"SELECT ? || user_id, ?, user_id, {field} FROM legacy_{table} WHERE true "
+                        f"ON CONFLICT(key) DO UPDATE SET {field} = {field} + excluded.{field}",
+                        (prefix, guild_id)
+                    ).rowcount
+            if "legacy_active_services" in legacy:
+                moved += conn.execute(
+                    "INSERT OR REPLACE INTO active_services (key, guild_id, data) "
+                    "SELECT ? || customer_id, ?, json_set(data, '$.guild_id', ?, '$.user_id', customer_id) "
+                    "FROM legacy_active_services",
+                    (prefix, guild_id, guild_id)
+                ).rowcount
+            if "legacy_afk" in legacy:
+                moved += conn.execute(
+                    "INSERT OR REPLACE INTO afk (key, guild_id, user_id, reason, time, expires_at) "
+                    "SELECT ? || user_id, ?, user_id, reason, time, expires_at FROM legacy_afk",
+                    (prefix, guild_id)
+                ).rowcount
+            if "legacy_service_history" in legacy:
+                moved += conn.execute(
+                    "INSERT INTO service_history (guild_id, customer_id, staff_id, status, finished_at, data) "
+                    "SELECT ?, ? || customer_id, staff_id, status, finished_at, "
+                    "json_set(data, '$.guild_id', ?, '$.customer_id', ? || customer_id) "
+                    "FROM legacy_service_history ORDER BY id",
+                    (guild_id, prefix, guild_id, prefix)
+                ).rowcount
+            for table in legacy:
+                conn.execute(f"DROP TABLE {table}")
+            # Guild-level config documents
+            moved += conn.execute(
+                "UPDATE OR REPLACE bot_config SET key = ? WHERE key = 'pulse'", (guild_config(guild_id, "pulse"),)
+            ).rowcount
+            conn.execute("DELETE FROM bot_config WHERE key = 'vouch_stats'")
+            return moved
+        moved = await self._run(move)
+        await self.rebuild_vouch_stats(guild_id)
+        return moved
+
+
+# ─── HELPERS ────────────────────────────────────────────────
+def _owner(key):
+    # guild_id / user_id fields stored alongside every member document
+    guild_id, user_id = split_key(key)
+    return {"guild_id": guild_id, "user_id": user_id}
+
+
+def _history_record(job, final_status, details):
+    # Finished jobs keep everything except the OTP hashes
+    record = {k: v for k, v in job.items() if k != "_id" and k not in OTP_FIELDS}
+    record.update(details)
+    record["customer_id"] = job["_id"]
+    record["status"] = final_status
+    record["finished_at"] = datetime.now(timezone.utc)
+    return record
+
+
+def _by_guild(increments):
+    # {member key: inc} -> {guild id: {user id: inc}}
+    grouped = {}
+    for key, inc in increments.items():
+        guild_id, user_id = split_key(key)
+        counts = grouped.setdefault(guild_id, {})
+        counts[user_id] = counts.get(user_id, 0) + inc
+    return grouped
+
+
+def _service_key(job):
+    # Sort/cursor key for active service pages
+    return (job["created_at"], job["_id"])
+
+
+def _bump_vouch_stats(stats, user_id, count):
+    # One vouch folded into the stats as it is written (SQLite / memory)
+    stats["total"] = stats.get("total", 0) + 1
+    if count >= stats.get("top_count", 0):
+        stats["top_id"] = user_id
+        stats["top_count"] = count
+
+
+def _vouch_stats_from(pairs):
+    stats = dict(EMPTY_VOUCH_STATS)
+    for uid, count in pairs:
+        stats["total"] += count
+        if stats["top_id"] is None or count > stats["top_count"]:
+            stats["top_id"], stats["top_count"] = uid, count
+    return stats
+
+
+def open_storage(backend=None, mongo_url=None):
+    # STORAGE_BACKEND picks the backend: mongo (default when MONGO_URL is set),
+    # sqlite (default otherwise, file at SQLITE_PATH) or memory.
+    mongo_url = mongo_url or os.getenv("MONGO_URL")
+    backend = (backend or os.getenv("STORAGE_BACKEND") or ("mongo" if mongo_url else "sqlite")).lower()
+
+    if backend == "mongo":
+        if not mongo_url:
+            raise RuntimeError("STORAGE_BACKEND=mongo requires MONGO_URL")
+        return MongoStorage(mongo_url)
+    if backend == "sqlite":
+        return SQLiteStorage(os.getenv("SQLITE_PATH", "vault.db"))
+    if backend == "memory":
+        return MemoryStorage()
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {backend}")
@@ -0,0 +1,324 @@
+# In-process stand-in for the motor collections MongoStorage uses, enough
+# to exercise its guarded upserts, claims and journal replay without a
+# mongod. Supports the query and update operators storage.py sends; an
+# upsert colliding on _id raises a duplicate key error, as on a real server.
+#
+# `fail_before[op]` / `fail_after[op]` make the next call to `op` raise
+# (after applying it, for fail_after), to simulate timeouts.
+import asyncio
+import copy
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from storage import MongoStorage
+
+MISSING = object()
+
+
+def get_path(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return MISSING
+        doc = doc[part]
+    return doc
+
+
+def set_path(doc, path, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def matches(doc, query):
+    for field, cond in query.items():
+        if field == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+            continue
+        value = get_path(doc, field)
+        if isinstance(cond, dict) and cond and all(op.startswith("$") for op in cond):
+            if not all(check(value, op, arg) for op, arg in cond.items()):
+                return False
+        elif not (value == cond or (cond is None and value is MISSING)):
+            return False
+    return True
+
+
+COMPARISONS = {
+    "$lt": lambda a, b: a < b, "$lte": lambda a, b: a <= b,
+    "$gt": lambda a, b: a > b, "$gte": lambda a, b: a >= b,
+}
+
+
+def check(value, op, arg):
+    present = value is not MISSING
+    if op == "$ne":
+        return value != arg and not (arg is None and not present)
+    if op == "$in":
+        return present and value in arg
+    if op == "$exists":
+        return present == bool(arg)
+    if op in COMPARISONS:
+        return present and COMPARISONS[op](value, arg)
+    raise NotImplementedError(f"mongo_stub: {op}")
+
+
+def apply_update(doc, update, inserting):
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, arg in fields.items():
+            if op in ("$set", "$setOnInsert"):
+                set_path(doc, path, copy.deepcopy(arg))
+            elif op == "$inc":
+                current = get_path(doc, path)
+                set_path(doc, path, (0 if current is MISSING else current) + arg)
+            elif op == "$unset":
+                parent = get_path(doc, path.rsplit(".", 1)[0]) if "." in path else doc
+                if isinstance(parent, dict):
+                    parent.pop(path.rsplit(".", 1)[-1], None)
+            else:
+                raise NotImplementedError(f"mongo_stub: {op}")
+
+
+def seed_from(query):
+    # Equality fields of an upsert's filter become the new document
+    return {k: copy.deepcopy(v) for k, v in query.items()
+            if not k.startswith("$") and not (isinstance(v, dict) and any(op.startswith("$") for op in v))}
+
+
+class Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction=1):
+        keys = [(key, direction)] if isinstance(key, str) else list(key)
+        for field, way in reversed(keys):
+            self.docs.sort(key=lambda d: get_path(d, field), reverse=way < 0)
+        return self
+
+    def limit(self, n):
+        if n:
+            self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length=None):
+        return copy.deepcopy(self.docs[:length] if length else self.docs)
+
+
+class Collection:
+    def __init__(self, name):
+        self.name = name
+        self.docs = {}  # _id -> document, in insertion order
+        self.fail_before = {}
+        self.fail_after = {}
+
+    # --- failure injection ---
+    def _before(self, op):
+        error = self.fail_before.pop(op, None)
+        if error is not None:
+            raise error
+
+    def _after(self, op):
+        error = self.fail_after.pop(op, None)
+        if error is not None:
+            raise error
+
+    def _find(self, query):
+        return [doc for doc in self.docs.values() if matches(doc, query)]
+
+    def _upsert_one(self, query, update, upsert):
+        found = self._find(query)
+        if found:
+            before = copy.deepcopy(found[0])
+            apply_update(found[0], update, inserting=False)
+            return before, found[0], None
+        if not upsert:
+            return None, None, None
+        doc = seed_from(query)
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("E11000 duplicate key error", 11000)
+        apply_update(doc, update, inserting=True)
+        self.docs[doc["_id"]] = doc
+        return None, doc, doc["_id"]
+
+    # --- reads ---
+    async def find_one(self, query=None, projection=None):
+        self._before("find_one")
+        found = self._find(query or {})
+        return copy.deepcopy(found[0]) if found else None
+
+    def find(self, query=None, projection=None):
+        self._before("find")
+        return Cursor([copy.deepcopy(doc) for doc in self._find(query or {})])
+
+    async def count_documents(self, query):
+        self._before("count_documents")
+        return len(self._find(query))
+
+    async def distinct(self, field, query=None):
+        values = []
+        for doc in self._find(query or {}):
+            value = get_path(doc, field)
+            if value is not MISSING and value not in values:
+                values.append(value)
+        return values
+
+    def aggregate(self, pipeline):
+        # $match, $group ($sum / $first), $sort, $limit and $count
+        self._before("aggregate")
+        docs = [copy.deepcopy(doc) for doc in self.docs.values()]
+        for stage in pipeline:
+            (name, arg), = stage.items()
+            if name == "$match":
+                docs = [doc for doc in docs if matches(doc, arg)]
+            elif name == "$group":
+                docs = self._group(docs, arg)
+            elif name == "$sort":
+                docs = Cursor(docs).sort(list(arg.items())).docs
+            elif name == "$limit":
+                docs = docs[:arg]
+            elif name == "$count":
+                docs = [{arg: len(docs)}] if docs else []
+            else:
+                raise NotImplementedError(f"mongo_stub: {name}")
+        return Cursor(docs)
+
+    @staticmethod
+    def _group(docs, spec):
+        def resolve(doc, expr):
+            if isinstance(expr, dict):
+                return {k: resolve(doc, v) for k, v in expr.items()}
+            if isinstance(expr, str) and expr.startswith("$"):
+                value = get_path(doc, expr[1:])
+                return None if value is MISSING else value
+            return expr
+        groups = {}
+        for doc in docs:
+            key = resolve(doc, spec["_id"])
+            group = groups.setdefault(repr(key), {"_id": key})
+            for field, acc in spec.items():
+                if field == "_id":
+                    continue
+                (op, expr), = acc.items()
+                value = resolve(doc, expr)
+                if op == "$sum":
+                    group[field] = group.get(field, 0) + (value if isinstance(value, (int, float)) else 0)
+                elif op == "$first":
+                    group.setdefault(field, value)
+                else:
+                    raise NotImplementedError(f"mongo_stub: {op}")
+        return list(groups.values())
+
+    # --- writes ---
+    async def insert_one(self, doc):
+        self._before("insert_one")
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("E11000 duplicate key error", 11000)
+        self.docs[doc["_id"]] = doc
+        self._after("insert_one")
+        return Result(inserted_id=doc["_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        self._before("update_one")
+        before, after, upserted = self._upsert_one(query, update, upsert)
+        self._after("update_one")
+        return Result(matched_count=int(before is not None), upserted_id=upserted)
+
+    async def update_many(self, query, update, upsert=False):
+        self._before("update_many")
+        found = self._find(query)
+        for doc in found:
+            apply_update(doc, update, inserting=False)
+        self._after("update_many")
+        return Result(matched_count=len(found), modified_count=len(found))
+
+    async def replace_one(self, query, doc, upsert=False):
+        self._before("replace_one")
+        found = self._find(query)
+        if found or upsert:
+            _id = found[0]["_id"] if found else query.get("_id", ObjectId())
+            self.docs[_id] = dict(copy.deepcopy(doc), _id=_id)
+        self._after("replace_one")
+        return Result(matched_count=len(found[:1]))
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=False, projection=None):
+        self._before("find_one_and_update")
+        before, after, _ = self._upsert_one(query, update, upsert)
+        self._after("find_one_and_update")
+        return copy.deepcopy(after if return_document else before)
+
+    async def find_one_and_delete(self, query):
+        self._before("find_one_and_delete")
+        found = self._find(query)
+        doc = self.docs.pop(found[0]["_id"]) if found else None
+        self._after("find_one_and_delete")
+        return doc
+
+    async def delete_one(self, query):
+        self._before("delete_one")
+        found = self._find(query)
+        if found:
+            del self.docs[found[0]["_id"]]
+        return Result(deleted_count=len(found[:1]))
+
+    async def delete_many(self, query):
+        found = self._find(query)
+        for doc in found:
+            del self.docs[doc["_id"]]
+        return Result(deleted_count=len(found))
+
+    async def bulk_write(self, ops, ordered=True):
+        # UpdateOne only; unordered, like every bulk write in storage.py
+        self._before("bulk_write")
+        errors = []
+        for index, op in enumerate(ops):
+            try:
+                self._upsert_one(op._filter, op._doc, op._upsert)
+            except DuplicateKeyError:
+                errors.append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key error"})
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": 0})
+        self._after("bulk_write")
+        return Result(matched_count=len(ops))
+
+    async def create_index(self, *args, **kwargs):
+        return kwargs.get("name")
+
+    async def drop_index(self, name):
+        pass
+
+
+class Database(dict):
+    def __missing__(self, name):
+        collection = self[name] = Collection(name)
+        return collection
+
+    @property
+    def client(self):
+        return self
+
+    def close(self):
+        pass
+
+
+def stub_storage(tmp_path):
+    # MongoStorage wired to a fresh stub database, journaling under tmp_path
+    store = MongoStorage("mongodb://stub", journal_path=str(tmp_path / "vault.journal"))
+    store._db = Database()
+    return store
+
+
+def timeout():
+    # What timed_call turns into StorageUnavailable
+    return asyncio.TimeoutError()
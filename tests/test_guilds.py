@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from guilds import GuildSettingsCache
+from storage import MemoryStorage, StorageUnavailable, guild_config
+
+
+class FlakyStorage(MemoryStorage):
+    # Config reads fail while `down` is set
+    down = False
+
+    async def get_configs(self, keys):
+        if self.down:
+            raise StorageUnavailable("down")
+        return await super().get_configs(keys)
+
+
+def test_settings_outage_keeps_stored_settings():
+    async def scenario():
+        store = FlakyStorage()
+        await store.set_config(guild_config(1, "settings"), {"vouch_channel_id": 10, "core_team": {"7": "Owner"}})
+        cache = GuildSettingsCache(store, {})
+        store.down = True
+        with pytest.raises(StorageUnavailable):
+            await cache.load([1])
+        assert cache.get(1).vouch_channel_id is None and cache.unloaded == {1}
+        with pytest.raises(StorageUnavailable):
+            await cache.update(1, level_log_channel_id=30)
+        # Back up: the stored settings are loaded before the update is saved
+        store.down = False
+        await cache.update(1, level_log_channel_id=30)
+        saved = await store.get_config(guild_config(1, "settings"))
+        assert saved["vouch_channel_id"] == 10 and saved["core_team"] == {"7": "Owner"}
+        assert saved["level_log_channel_id"] == 30 and not cache.unloaded
+    asyncio.run(scenario())
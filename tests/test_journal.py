@@ -0,0 +1,72 @@
+import asyncio
+import os
+
+import pytest
+
+from storage import WriteJournal
+
+XP = {"op": "xp", "inc": {"1:2": 5, "1:3": 1}}
+VOUCH = {"op": "vouch", "key": "1:3", "giver": "1:2", "reason": "legit", "at": 1700000000.0}
+MORE_XP = {"op": "xp", "inc": {"1:2": 2}}
+
+
+def reopen(journal):
+    # What a restart sees
+    journal.close()
+    return WriteJournal(journal.path)
+
+
+def test_pending_deltas(tmp_path):
+    journal = WriteJournal(str(tmp_path / "vault.journal"))
+    for record in (XP, VOUCH, MORE_XP):
+        journal.append(record)
+    assert journal.pending == 3
+    assert journal.xp == {"1:2": 7, "1:3": 1}
+    assert journal.vouches == {"1:3": 1}
+
+    journal = reopen(journal)
+    assert [record for _, record in journal.entries] == [XP, VOUCH, MORE_XP]
+    assert journal.xp == {"1:2": 7, "1:3": 1}
+    journal.close()
+
+
+def test_replay_resumes_after_failure(tmp_path):
+    journal = WriteJournal(str(tmp_path / "vault.journal"))
+    for record in (XP, VOUCH, MORE_XP):
+        journal.append(record)
+    applied = []
+
+    async def fail_on_vouch(record):
+        if record["op"] == "vouch":
+            raise RuntimeError("down")
+        applied.append(record)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(journal.replay(fail_on_vouch))
+    assert applied == [XP]
+    assert journal.pending == 2
+    assert journal.xp == {"1:2": 2, "1:3": 0}
+    assert os.path.exists(journal.pos_path)
+
+    # The .pos file makes a restart skip what was already replayed
+    journal = reopen(journal)
+    assert [record for _, record in journal.entries] == [VOUCH, MORE_XP]
+
+    async def apply(record):
+        applied.append(record)
+
+    assert asyncio.run(journal.replay(apply)) == 2
+    assert applied == [XP, VOUCH, MORE_XP]
+    assert journal.pending == 0 and not journal.xp and not journal.vouches
+    assert not os.path.exists(journal.path) and not os.path.exists(journal.pos_path)
+
+
+def test_torn_line_ignored(tmp_path):
+    journal = WriteJournal(str(tmp_path / "vault.journal"))
+    journal.append(XP)
+    journal.close()
+    with open(journal.path, "ab") as f:
+        f.write(b'{"op": "xp", "inc": {"1:2"')
+    journal = WriteJournal(journal.path)
+    assert [record for _, record in journal.entries] == [XP]
+    journal.close()
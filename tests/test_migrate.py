@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+import pytest
+
+from migrate import file_digest, iter_json_object, migrate_file
+from storage import MemoryStorage, member_key
+
+LEGACY = {
+    "111": 1500,
+    "222": -3,
+    "333": 1.5e3,
+    "444": 0.25,
+    "555": 12E-2,
+    "weird \"key\" {,}": {"nested": [1, 2.5, {"x": "}"}], "flag": True, "none": None},
+    "666": 98765432109876543210,
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 65536])
+def test_chunk_boundaries(tmp_path, chunk_size):
+    path = tmp_path / "xp.json"
+    path.write_text(json.dumps(LEGACY, indent=1))
+    assert list(iter_json_object(str(path), chunk_size)) == list(LEGACY.items())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_numbers_touching_the_end(tmp_path, chunk_size):
+    # No whitespace after a number: the next character decides where it ends
+    path = tmp_path / "xp.json"
+    path.write_text('{"1":12345,"2":6.75e2,"3":-0.5}')
+    assert list(iter_json_object(str(path), chunk_size)) == [("1", 12345), ("2", 675.0), ("3", -0.5)]
+
+
+def test_empty_object(tmp_path):
+    path = tmp_path / "xp.json"
+    path.write_text(" {\n} ")
+    assert list(iter_json_object(str(path), 1)) == []
+
+
+def test_not_an_object(tmp_path):
+    path = tmp_path / "xp.json"
+    path.write_text("[1, 2]")
+    with pytest.raises(ValueError):
+        list(iter_json_object(str(path), 4))
+
+
+def test_completed_file_is_archived(tmp_path):
+    # The checkpoint says done but the rename never happened (crash in between)
+    path = tmp_path / "xp.json"
+    path.write_text('{"1": 10}')
+    store = MemoryStorage()
+    checkpoint = {"sha256": file_digest(str(path)), "done": 1, "complete": True}
+    asyncio.run(store.set_config("migration:xp", checkpoint))
+    assert asyncio.run(migrate_file(store, str(path), "xp", 100, "100")) == 0
+    assert not path.exists() and (tmp_path / "migrated_xp.json").exists()
+    assert asyncio.run(store.get_xp(member_key("100", "1"))) == 0
@@ -0,0 +1,192 @@
+# MongoStorage's write paths against tests/mongo_stub.py: the guards that
+# keep retried and replayed writes from applying twice.
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from mongo_stub import stub_storage, timeout
+from storage import SERVICE_CLOSING, StorageUnavailable, guild_config, member_key
+
+GUILD = "100"
+ALICE, BOB = member_key(GUILD, "1"), member_key(GUILD, "2")
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = stub_storage(tmp_path)
+    yield store
+    store.journal.close()
+
+
+def collection(store, name):
+    return store.db[name]
+
+
+def job(status="IN_PROGRESS"):
+    return {"name": "Carry", "staff_id": 7, "s_otp": "s-hash", "e_otp": "e-hash", "c_otp": "c-hash",
+            "status": status, "created_at": datetime.now(timezone.utc)}
+
+
+def finish(store, otp="e-hash"):
+    return store.finish_service(ALICE, ["IN_PROGRESS"], "e_otp", otp, "COMPLETED", {"closed_by": 7})
+
+
+def test_finish_service_writes_history_once(store):
+    async def scenario():
+        await store.create_service(ALICE, job())
+        assert await finish(store, "wrong") is None
+        done = await finish(store)
+        assert done["name"] == "Carry" and "claim" not in done
+        assert await finish(store) is None
+        history = list(collection(store, "service_history").docs.values())
+        assert len(history) == 1
+        assert history[0]["status"] == "COMPLETED" and history[0]["customer_id"] == ALICE
+        assert not any(field in history[0] for field in ("e_otp", "claim", "closing_via"))
+        assert await store.get_service(ALICE) is None
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("collection_name, op", [
+    ("service_history", "update_one"),          # Claimed, history never written
+    ("active_services", "find_one_and_delete"),  # History written, job not deleted
+])
+def test_finish_service_retry_after_timeout(store, collection_name, op):
+    async def scenario():
+        await store.create_service(ALICE, job())
+        collection(store, collection_name).fail_before[op] = timeout()
+        with pytest.raises(StorageUnavailable):
+            await finish(store)
+        assert (await store.get_service(ALICE))["status"] == SERVICE_CLOSING
+        # The same command again finishes the claimed job
+        assert (await finish(store))["name"] == "Carry"
+        assert len(collection(store, "service_history").docs) == 1
+        assert await store.get_service(ALICE) is None
+    asyncio.run(scenario())
+
+
+def test_finish_service_timeout_after_delete(store):
+    async def scenario():
+        await store.create_service(ALICE, job())
+        collection(store, "active_services").fail_after["find_one_and_delete"] = timeout()
+        with pytest.raises(StorageUnavailable):
+            await finish(store)
+        # Everything was applied: a retry has nothing to do and writes nothing
+        assert await finish(store) is None
+        assert len(collection(store, "service_history").docs) == 1
+    asyncio.run(scenario())
+
+
+def test_closing_job_needs_the_same_otp(store):
+    async def scenario():
+        await store.create_service(ALICE, job())
+        collection(store, "service_history").fail_before["update_one"] = timeout()
+        with pytest.raises(StorageUnavailable):
+            await finish(store)
+        # A cancel can't take over a job claimed by a completion
+        cancel = await store.finish_service(ALICE, ["PENDING", "IN_PROGRESS"], "c_otp", "c-hash", "CANCELLED", {})
+        assert cancel is None
+        assert await store.advance_service(ALICE, ["IN_PROGRESS"], "e_otp", "e-hash", "PENDING") is None
+    asyncio.run(scenario())
+
+
+def bucket(store, kind, day):
+    return collection(store, "leaderboard_buckets").docs.get(f"{GUILD}:{kind}:{day}", {}).get("counts", {})
+
+
+def open_circuit(store):
+    store.breaker.state = store.breaker.OPEN
+    store.breaker.opened_at = float("inf")  # No probe until the test closes it
+
+
+def test_xp_timeout_after_write_is_applied_once(store):
+    async def scenario():
+        collection(store, "levels").fail_after["bulk_write"] = timeout()
+        assert await store.add_xp({ALICE: 5, BOB: 2}) == []
+        assert store.journal.pending == 1
+        # The write landed before the timeout: the replay's xp_batch guard skips it
+        assert await store.sync_journal() == 1
+        assert await store.get_xp(ALICE) == 5 and await store.get_xp(BOB) == 2
+        (record,) = collection(store, "leaderboard_buckets").docs.values()
+        assert record["counts"] == {"1": 5, "2": 2}
+    asyncio.run(scenario())
+
+
+def test_journaled_xp_is_read_then_replayed_once(store):
+    async def scenario():
+        await store.add_xp({ALICE: 1})
+        open_circuit(store)
+        await store.add_xp({ALICE: 4})
+        await store.add_vouch(BOB, 1, "fast")
+        store.breaker.record_success()
+        # Still journaling until replayed; reads fold the journal in
+        assert await store.get_xp(ALICE) == 5 and await store.get_vouches(BOB) == 1
+        assert collection(store, "levels").docs[ALICE]["xp"] == 1
+        (_, record), _ = store.journal.entries
+        assert await store.sync_journal() == 2
+        assert await store.get_xp(ALICE) == 5 and await store.get_vouches(BOB) == 1
+        # A crash before the .pos update replays the record again
+        await store._replay(record)
+        assert await store.get_xp(ALICE) == 5
+        assert bucket(store, "xp", record["day"]) == {"1": 5}
+    asyncio.run(scenario())
+
+
+def test_replay_drops_or_rekeys_legacy_records(store, monkeypatch):
+    async def scenario():
+        legacy = {"op": "xp", "inc": {"1": 3}, "batch": "b1", "day": "2026-01-01"}
+        monkeypatch.delenv("LEGACY_GUILD_ID", raising=False)
+        await store._replay(legacy)
+        assert not collection(store, "levels").docs
+        monkeypatch.setenv("LEGACY_GUILD_ID", GUILD)
+        await store._replay(legacy)
+        assert collection(store, "levels").docs[ALICE]["xp"] == 3
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("fail", ["fail_before", "fail_after"])
+def test_completed_count_survives_bucket_timeout(store, fail):
+    async def scenario():
+        getattr(collection(store, "leaderboard_buckets"), fail)["bulk_write"] = timeout()
+        assert await store.add_completed(ALICE) == 1
+        (_, record), = store.journal.entries
+        assert record["op"] == "buckets" and record["kind"] == "services"
+        # Replayed once whether or not the timed-out bump landed (last_batch)
+        assert await store.sync_journal() == 1
+        await store._replay(record)
+        assert bucket(store, "services", record["day"]) == {"1": 1}
+        assert await store.get_completed(ALICE) == 1
+    asyncio.run(scenario())
+
+
+def test_replayed_vouch_keeps_its_bucket(store):
+    async def scenario():
+        open_circuit(store)
+        assert await store.add_vouch(BOB, 1, "fast") is None
+        (_, record), = store.journal.entries
+        store.breaker.record_success()
+        collection(store, "leaderboard_buckets").fail_before["bulk_write"] = timeout()
+        # The vouch lands, its bucket is journaled behind it and replayed next
+        assert await store.sync_journal() == 2
+        day = datetime.fromtimestamp(record["at"], timezone.utc).strftime("%Y-%m-%d")
+        assert bucket(store, "vouches", day) == {"2": 1}
+        # Replaying the vouch again drops it as a duplicate, bucket untouched
+        await store._replay(record)
+        assert bucket(store, "vouches", day) == {"2": 1} and await store.get_vouches(BOB) == 1
+    asyncio.run(scenario())
+
+
+def test_rerun_fold_counts_once(store):
+    async def scenario():
+        for giver in (1, 3):
+            await store.add_vouch(BOB, giver, "fast")
+        await store.add_vouch(ALICE, 2, "kind")
+        assert await store.compact_vouches() == {GUILD: 3}
+        # A crash before the events were marked folded: the batch is rerun
+        for event in collection(store, "vouch_events").docs.values():
+            event["folded"] = False
+        assert await store.compact_vouches() == {GUILD: 3}
+        assert await store.get_vouches(BOB) == 2 and await store.get_vouches(ALICE) == 1
+        stats = await store.get_config(guild_config(GUILD, "vouch_stats"))
+        assert stats["total"] == 3 and (stats["top_id"], stats["top_count"]) == ("2", 2)
+    asyncio.run(scenario())
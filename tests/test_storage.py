@@ -0,0 +1,138 @@
+# Behaviour every backend shares. MongoStorage needs a live mongod, so only
+# the memory and SQLite backends run here.
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from storage import DuplicateVouch, MemoryStorage, SQLiteStorage, guild_config, member_key
+
+GUILD = "100"
+ALICE, BOB, CAROL = (member_key(GUILD, uid) for uid in ("1", "2", "3"))
+OUTSIDER = member_key("200", "1")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = MemoryStorage() if request.param == "memory" else SQLiteStorage(str(tmp_path / "vault.db"))
+    asyncio.run(store.ensure_indexes())
+    yield store
+    asyncio.run(store.close())
+
+
+def job(status="PENDING", minutes_ago=0):
+    return {
+        "name": "Carry", "staff": "staff", "staff_id": 7,
+        "s_otp": "s-hash", "e_otp": "e-hash", "c_otp": "c-hash",
+        "status": status, "created_at": datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    }
+
+
+def test_xp(store):
+    async def scenario():
+        assert await store.add_xp({ALICE: 5, BOB: 3, OUTSIDER: 50}) == []
+        assert await store.add_xp({ALICE: 2}) == []
+        assert await store.get_xp(ALICE) == 7
+        assert await store.get_xp(CAROL) == 0
+        top = await store.top_xp(GUILD, 10)
+        assert [(row["user_id"], row["xp"]) for row in top] == [("1", 7), ("2", 3)]
+        assert await store.xp_rank(GUILD, 3) == 2
+        assert [row["user_id"] for row in await store.xp_at_least(GUILD, 5)] == ["1"]
+        window = await store.top_window(GUILD, "xp", 7, 10)
+        assert window == [{"user_id": "1", "count": 7}, {"user_id": "2", "count": 3}]
+    asyncio.run(scenario())
+
+
+def test_vouches(store):
+    async def scenario():
+        assert await store.add_vouch(BOB, "1", "smooth trade") == 1
+        with pytest.raises(DuplicateVouch):
+            await store.add_vouch(BOB, "1", "again")
+        assert await store.add_vouch(BOB, "3", "fast") == 2
+        assert await store.add_vouch(CAROL, "1", "legit") == 1
+        assert await store.add_vouch(OUTSIDER, "2", "legit") == 1
+        assert await store.get_vouches(BOB) == 2
+        stats = await store.get_config(guild_config(GUILD, "vouch_stats"))
+        assert (stats["total"], stats["top_id"], stats["top_count"]) == (3, "2", 2)
+        assert (await store.rebuild_vouch_stats(GUILD))["total"] == 3
+        assert await store.top_window(GUILD, "vouches", 1, 10) == [{"user_id": "2", "count": 2}, {"user_id": "3", "count": 1}]
+    asyncio.run(scenario())
+
+
+def test_completed(store):
+    async def scenario():
+        assert await store.add_completed(ALICE) == 1
+        assert await store.add_completed(ALICE) == 2
+        assert await store.get_completed(ALICE) == 2
+        assert await store.get_completed(BOB) == 0
+        assert await store.top_window(GUILD, "services", 30, 10) == [{"user_id": "1", "count": 2}]
+    asyncio.run(scenario())
+
+
+def test_profile(store):
+    async def scenario():
+        await store.add_xp({ALICE: 40})
+        await store.add_vouch(ALICE, "2", "legit")
+        await store.add_completed(ALICE)
+        await store.add_completed(ALICE)
+        assert await store.get_profile(ALICE) == {"xp": 40, "vouches": 1, "completed": 2}
+        assert await store.get_profile(CAROL) == {"xp": 0, "vouches": 0, "completed": 0}
+    asyncio.run(scenario())
+
+
+def test_service_lifecycle(store):
+    async def scenario():
+        await store.create_service(ALICE, job())
+        assert await store.advance_service(ALICE, ["PENDING"], "s_otp", "wrong", "IN_PROGRESS") is None
+        started = await store.advance_service(ALICE, ["PENDING"], "s_otp", "s-hash", "IN_PROGRESS")
+        assert started["status"] == "IN_PROGRESS"
+        assert (await store.get_service(ALICE))["status"] == "IN_PROGRESS"
+        finished = await store.finish_service(ALICE, ["IN_PROGRESS"], "e_otp", "e-hash", "COMPLETED", {"rating": 5})
+        assert finished["name"] == "Carry"
+        # A repeated completion finds nothing left to finish
+        assert await store.finish_service(ALICE, ["IN_PROGRESS"], "e_otp", "e-hash", "COMPLETED", {}) is None
+        assert await store.get_service(ALICE) is None
+    asyncio.run(scenario())
+
+
+def test_list_services(store):
+    async def scenario():
+        await store.create_service(ALICE, job(minutes_ago=3))
+        await store.create_service(BOB, job("IN_PROGRESS", minutes_ago=2))
+        await store.create_service(CAROL, job(minutes_ago=1))
+        await store.create_service(OUTSIDER, job())
+        page = await store.list_services(GUILD, 2)
+        assert [j["_id"] for j in page] == [CAROL, BOB]
+        after = (page[-1]["created_at"], page[-1]["_id"])
+        assert [j["_id"] for j in await store.list_services(GUILD, 2, after=after)] == [ALICE]
+        assert [j["_id"] for j in await store.list_services(GUILD, 10, status="PENDING")] == [CAROL, ALICE]
+        assert [j["_id"] for j in await store.list_services(GUILD, 10, staff_id=7)] == [CAROL, BOB, ALICE]
+    asyncio.run(scenario())
+
+
+def test_expire_services(store):
+    async def scenario():
+        await store.create_service(ALICE, job(minutes_ago=100 * 60))
+        await store.create_service(BOB, job("IN_PROGRESS", minutes_ago=100 * 60))
+        await store.create_service(CAROL, job())
+        assert await store.expire_services() == 1
+        assert [j["_id"] for j in await store.list_services(GUILD, 10)] == [CAROL, BOB]
+    asyncio.run(scenario())
+
+
+def test_config(store):
+    async def scenario():
+        await store.set_config("100:settings", {"xp_channel": 5})
+        await store.set_config("100:settings", {"prefix": "!"})
+        assert await store.get_config("100:settings") == {"_id": "100:settings", "xp_channel": 5, "prefix": "!"}
+        assert await store.get_configs(["100:missing"]) == {}
+    asyncio.run(scenario())
+
+
+def test_import_counts(store):
+    async def scenario():
+        await store.import_counts("xp", GUILD, [(1, 100), ("2", 50)])
+        assert await store.get_xp(ALICE) == 100
+        assert await store.get_xp(BOB) == 50
+        assert await store.get_xp(OUTSIDER) == 0
+    asyncio.run(scenario())
@@ -0,0 +1,58 @@
+from leveling import XPThrottle
+
+MEMBER, OTHER, THIRD, FOURTH = ("1", "a"), ("1", "b"), ("1", "c"), ("1", "d")
+
+
+def throttle():
+    # One token every 10s, bursts of 2; pruning only when called
+    return XPThrottle(cooldown=10, burst=2, prune_interval=1e9)
+
+
+def test_burst_then_refill():
+    xp = throttle()
+    assert xp.allow(*MEMBER, now=0)
+    assert xp.allow(*MEMBER, now=0)
+    assert not xp.allow(*MEMBER, now=1)
+    assert not xp.allow(*MEMBER, now=9)
+    assert xp.allow(*MEMBER, now=10)
+    # Other members have their own bucket
+    assert xp.allow(*OTHER, now=10)
+
+
+def test_cooldown_off():
+    xp = XPThrottle(cooldown=0)
+    assert all(xp.allow(*MEMBER) for _ in range(10))
+    assert len(xp) == 0
+
+
+def test_prune_reuses_slots():
+    xp = throttle()
+    xp.allow(*MEMBER, now=0)
+    xp.allow(*OTHER, now=100)
+    xp.allow(*THIRD, now=100)
+    assert len(xp) == 3
+
+    # Only MEMBER has refilled by now; its slot is freed, the arrays keep
+    # their size because the last slot is still taken
+    assert xp.prune(now=101) == 1
+    assert len(xp) == 2 and len(xp.tokens) == 3
+    assert xp.free == [0]
+
+    xp.allow(*FOURTH, now=101)
+    assert xp.slots[FOURTH] == 0 and xp.owners[0] == FOURTH
+    assert len(xp.tokens) == 3
+
+
+def test_prune_trims_arrays():
+    xp = throttle()
+    xp.allow(*MEMBER, now=100)
+    xp.allow(*OTHER, now=0)
+    xp.allow(*THIRD, now=0)
+    assert xp.prune(now=101) == 2
+    assert len(xp.owners) == len(xp.tokens) == len(xp.stamps) == 1
+    assert xp.free == []
+
+    # A refilled member starts over with a full burst
+    assert xp.allow(*OTHER, now=101) and xp.allow(*OTHER, now=101)
+    assert xp.prune(now=1000) == 2
+    assert len(xp) == 0 and len(xp.tokens) == 0
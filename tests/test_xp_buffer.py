@@ -0,0 +1,139 @@
+import asyncio
+
+from leveling import XPBuffer
+from profiles import ProfileCache
+from storage import MemoryStorage, StorageUnavailable, member_key
+
+GUILD = "100"
+ALICE, BOB, CAROL = (member_key(GUILD, uid) for uid in ("1", "2", "3"))
+
+
+class FlakyStorage(MemoryStorage):
+    # Fails the XP write for the keys in `failing`, or entirely while `down`
+    failing = set()
+    down = False
+
+    async def add_xp(self, increments):
+        if self.down:
+            raise StorageUnavailable("down")
+        await super().add_xp({k: v for k, v in increments.items() if k not in self.failing})
+        return [k for k in increments if k in self.failing]
+
+    async def get_profile(self, key):
+        if self.down:
+            raise StorageUnavailable("down")
+        return await super().get_profile(key)
+
+
+def test_flush_writes_one_batch():
+    async def scenario():
+        store = MemoryStorage()
+        await store.add_xp({ALICE: 100})
+        buffer = XPBuffer(store, ProfileCache(store))
+        assert await buffer.add(ALICE, 5) == (100, 105)
+        assert await buffer.add(ALICE, 5) == (105, 110)
+        assert await buffer.add(BOB, 3) == (0, 3)
+        assert await store.get_xp(ALICE) == 100
+        assert await buffer.flush() == 2
+        assert await store.get_xp(ALICE) == 110 and await store.get_xp(BOB) == 3
+        assert buffer.pending == {}
+        assert await buffer.flush() == 0
+    asyncio.run(scenario())
+
+
+def test_close_waits_for_early_flush():
+    async def scenario():
+        store = MemoryStorage()
+        buffer = XPBuffer(store, ProfileCache(store), flush_threshold=2)
+        await buffer.add(ALICE, 5)
+        await buffer.add(BOB, 3)
+        assert buffer._flush_task is not None
+        await buffer.add(CAROL, 1)
+        assert await buffer.close() == 1
+        assert buffer._flush_task is None
+        assert store.xp == {ALICE: 5, BOB: 3, CAROL: 1}
+    asyncio.run(scenario())
+
+
+def test_board_overlays_pending_xp():
+    async def scenario():
+        store = MemoryStorage()
+        await store.add_xp({ALICE: 100, BOB: 50})
+        buffer = XPBuffer(store, ProfileCache(store))
+        await buffer.add(BOB, 70)
+        await buffer.add(CAROL, 10)
+        rows = buffer.overlay_top(GUILD, await store.top_xp(GUILD, 10), 2)
+        assert [(row["user_id"], row["xp"]) for row in rows] == [("2", 120), ("1", 100)]
+    asyncio.run(scenario())
+
+
+def test_failed_writes_are_requeued():
+    async def scenario():
+        store = FlakyStorage()
+        store.failing = {BOB}
+        buffer = XPBuffer(store, ProfileCache(store))
+        await buffer.add(ALICE, 5)
+        await buffer.add(BOB, 7)
+        assert await buffer.flush() == 1
+        assert buffer.pending == {BOB: 7}
+        await buffer.add(BOB, 1)
+
+        store.down = True
+        assert await buffer.flush() == 0
+        assert buffer.pending == {BOB: 8}
+        store.down, store.failing = False, set()
+        assert await buffer.flush() == 1
+        assert await store.get_xp(BOB) == 8
+    asyncio.run(scenario())
+
+
+def test_xp_kept_while_database_down():
+    async def scenario():
+        store = FlakyStorage()
+        await store.add_xp({CAROL: 50})
+        store.down = True
+        buffer = XPBuffer(store, ProfileCache(store))
+        # No total to compare against: no level check, but the XP is kept
+        assert await buffer.add(CAROL, 5) == (None, None)
+        store.down = False
+        assert await buffer.get(CAROL) == 55
+        assert await buffer.flush() == 1
+        assert await store.get_xp(CAROL) == 55
+        # The profile read before the flush isn't trusted afterwards
+        assert await buffer.add(CAROL, 1) == (55, 56)
+    asyncio.run(scenario())
+
+
+def test_lookups_are_not_cached():
+    async def scenario():
+        store = MemoryStorage()
+        await store.add_xp({ALICE: 40})
+        buffer = XPBuffer(store, ProfileCache(store))
+        # /level on members without XP in flight leaves nothing to evict
+        assert await buffer.get(ALICE) == 40 and await buffer.get(BOB) == 0
+        assert buffer.totals == {}
+        await buffer.add(ALICE, 2)
+        assert buffer.totals == {ALICE: 42} and await buffer.get(ALICE) == 42
+    asyncio.run(scenario())
+
+
+def test_flush_evicts_saved_totals():
+    async def scenario():
+        store = FlakyStorage()
+        store.failing = {BOB}
+        profiles = ProfileCache(store)
+        buffer = XPBuffer(store, profiles)
+        await buffer.add(ALICE, 5)
+        await buffer.add(BOB, 7)
+        assert await buffer.flush() == 1
+        # Saved members leave the buffer; a failed one stays with its XP queued
+        assert buffer.totals == {BOB: 7}
+        assert buffer.pending == {BOB: 7}
+        # The next message reads the saved total back through the profile cache
+        assert await buffer.add(ALICE, 1) == (5, 6)
+
+        store.failing = set()
+        assert await buffer.flush() == 2
+        assert buffer.totals == {} and buffer.pending == {}
+        assert (await profiles.get(BOB))["xp"] == 7
+    asyncio.run(scenario())